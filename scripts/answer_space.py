@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Espacio de respuestas precompilado
+Recorre el árbol una vez por cada combinación de respuestas posible y guarda el
+resultado en una tabla binaria que se lee con mmap, sin recorrer el árbol.
+
+Formato del archivo (little-endian):
+    cabecera   "<4sHHII": magic, versión, reservado, largo del JSON, número de slots
+    JSON       versión y huella del árbol, preguntas, hojas, caminos, resúmenes y grupos de consideraciones
+    relleno    hasta múltiplo de 8
+    slots      "<hHBB" por combinación: hoja, camino, resumen, máscara de consideraciones
+"""
+
+import hashlib
+import itertools
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from decision_tree import CONSIDERATION_GROUPS, DEFAULT_LEAF, DecisionTree
+from payload_store import Payload, intern_payload
+from response_cache import Response, ResponseCache, encode_parts, with_result_hash
+
+
+# Preguntas y valores posibles, en el mismo orden que lib/questions.ts
+QUESTIONS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("app-type", ("web", "mobile", "api", "desktop", "fullstack")),
+    ("audience", ("public", "internal", "b2b", "developers")),
+    ("scale", ("small", "medium", "large", "xlarge")),
+    ("budget", ("minimal", "low", "medium", "high")),
+    ("team-size", ("solo", "small", "medium", "large")),
+    ("timeline", ("fast", "normal", "long", "extended")),
+    ("complexity", ("simple", "moderate", "complex", "very-complex")),
+)
+
+QUESTION_IDS = tuple(question_id for question_id, _ in QUESTIONS)
+
+# Índice de cada valor dentro de su pregunta
+VALUE_INDEX: Dict[str, Dict[str, int]] = {
+    question_id: {value: index for index, value in enumerate(values)}
+    for question_id, values in QUESTIONS
+}
+
+
+def _strides() -> Tuple[int, ...]:
+    """Pesos del código en base mixta; la última pregunta varía más rápido"""
+    strides = []
+    stride = 1
+    for _, values in reversed(QUESTIONS):
+        strides.append(stride)
+        stride *= len(values)
+    return tuple(reversed(strides))
+
+
+STRIDES = _strides()
+SPACE_SIZE = STRIDES[0] * len(QUESTIONS[0][1])
+
+MAGIC = b"DTAS"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHII")
+SLOT = struct.Struct("<hHBB")
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "answer_space.bin")
+
+
+def encode_key(answers: Dict[str, str]) -> Optional[int]:
+    """
+    Codifica un conjunto completo de respuestas como entero
+
+    Returns:
+        Código de la combinación, o None si falta una pregunta o hay un valor desconocido
+    """
+    key = 0
+    for question_id, stride in zip(QUESTION_IDS, STRIDES):
+        index = VALUE_INDEX[question_id].get(answers.get(question_id))
+        if index is None:
+            return None
+        key += index * stride
+    return key
+
+
+def decode_key(key: int) -> Dict[str, str]:
+    """Operación inversa de encode_key"""
+    answers = {}
+    for (question_id, values), stride in zip(QUESTIONS, STRIDES):
+        answers[question_id] = values[(key // stride) % len(values)]
+    return answers
+
+
+def iter_answer_space() -> Iterator[Dict[str, str]]:
+    """Genera todas las combinaciones de respuestas en orden de código"""
+    for combination in itertools.product(*(values for _, values in QUESTIONS)):
+        yield dict(zip(QUESTION_IDS, combination))
+
+
+def answer_space_bitsets(tree: DecisionTree) -> Tuple[Dict[Tuple[str, str], int], Dict[int, int]]:
+    """
+    Conjuntos de bits del espacio de respuestas: el bit k corresponde al código k
+
+    Returns:
+        Tupla ({(pregunta, valor): bits}, {hoja: bits}); solo incluye hojas alcanzables,
+        con DEFAULT_LEAF para las combinaciones que caen en las recomendaciones por defecto
+    """
+    compiled = tree.compile()
+    size = SPACE_SIZE // 8 + 1
+    value_bits = {(question_id, value): bytearray(size) for question_id, values in QUESTIONS for value in values}
+    leaf_bits = {leaf_id: bytearray(size) for leaf_id in range(len(tree.leaves))}
+    leaf_bits[DEFAULT_LEAF] = bytearray(size)
+
+    for key, answers in enumerate(iter_answer_space()):
+        byte, bit = divmod(key, 8)
+        for pair in answers.items():
+            value_bits[pair][byte] |= 1 << bit
+        leaf, _ = compiled.traverse_codes(compiled.encode(answers))
+        leaf_bits[leaf][byte] |= 1 << bit
+
+    return (
+        {pair: int.from_bytes(bits, "little") for pair, bits in value_bits.items()},
+        {leaf: int.from_bytes(bits, "little") for leaf, bits in leaf_bits.items() if any(bits)},
+    )
+
+
+def tree_fingerprint(tree: DecisionTree) -> str:
+    """
+    sha256 del árbol: versión, caminos de las hojas, sus tecnologías y la salida
+    por defecto. Cambia con cualquier edición del árbol aunque su versión siga
+    siendo la misma (el árbol incorporado siempre es "builtin").
+    """
+    digest = hashlib.sha256(tree.version.encode("utf-8") + b"\0")
+    for name, leaf in zip(tree.leaf_names, tree.leaves):
+        digest.update(name.encode("utf-8") + b"\0" + leaf.recommendations.json + b"\0")
+    default = tree._get_default_recommendations({})
+    digest.update(json.dumps(
+        [default["technologies"], default["summary"], [list(group) for group in CONSIDERATION_GROUPS]],
+        ensure_ascii=False, sort_keys=True,
+    ).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def compile_table(tree: DecisionTree, path: str = DEFAULT_TABLE_PATH) -> int:
+    """
+    Recorre el árbol sobre todo el espacio de respuestas y escribe la tabla
+
+    Returns:
+        Número de combinaciones escritas
+    """
+    paths: Dict[str, int] = {}
+    summaries: Dict[str, int] = {}
+    slots = bytearray(SLOT.size * SPACE_SIZE)
+
+    for key, answers in enumerate(iter_answer_space()):
+        leaf, decision_path = tree.resolve(answers)
+
+        if leaf is not None:
+            leaf_id = leaf.leaf_id
+            path_text = " → ".join(decision_path)
+            summary = tree._generate_summary(answers)
+        else:
+            leaf_id = DEFAULT_LEAF
+            default = tree._get_default_recommendations(answers)
+            path_text = default["decision_path"]
+            summary = default["summary"]
+
+        path_id = paths.setdefault(path_text, len(paths))
+        summary_id = summaries.setdefault(summary, len(summaries))
+        mask = tree._considerations_mask(answers)
+        SLOT.pack_into(slots, key * SLOT.size, leaf_id, path_id, summary_id, mask)
+
+    header = json.dumps({
+        "version": tree.version,
+        "tree_hash": tree_fingerprint(tree),
+        "questions": [[question_id, list(values)] for question_id, values in QUESTIONS],
+        "leaves": [
+            {"name": name, "technologies": leaf.recommendations.to_dict()}
+            for name, leaf in zip(tree.leaf_names, tree.leaves)
+        ],
+        "default": tree._get_default_recommendations({})["technologies"],
+        "paths": list(paths),
+        "summaries": list(summaries),
+        "considerations": [list(group) for group in CONSIDERATION_GROUPS],
+    }, ensure_ascii=False).encode("utf-8")
+    padding = -(HEADER.size + len(header)) % 8
+
+    # Escritura atómica para no romper procesos que tengan la tabla abierta
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(header), SPACE_SIZE))
+        f.write(header)
+        f.write(b"\0" * padding)
+        f.write(slots)
+    os.replace(tmp_path, path)
+
+    return SPACE_SIZE
+
+
+class AnswerTable:
+    """
+    Lector de la tabla precompilada
+
+    El archivo se mapea en memoria de solo lectura, de modo que varios procesos
+    comparten la misma copia en el page cache. Las combinaciones incompletas o con
+    valores desconocidos se delegan a un DecisionTree construido solo si hace falta.
+
+    Args:
+        path: Archivo escrito por compile_table
+        tree: Árbol que debe haber compilado la tabla (por defecto el incorporado); una
+              tabla con otra huella se rechaza en lugar de servir recomendaciones de
+              otro árbol. También atiende las combinaciones que la tabla no cubre.
+    """
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH, tree: Optional[DecisionTree] = None):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, _, header_len, slots = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"Tabla de respuestas inválida: {path}")
+
+        header = json.loads(self._mm[HEADER.size:HEADER.size + header_len])
+        if tuple((question_id, tuple(values)) for question_id, values in header["questions"]) != QUESTIONS:
+            raise ValueError(f"La tabla {path} no corresponde a las preguntas actuales")
+        if slots != SPACE_SIZE:
+            raise ValueError(f"La tabla {path} tiene {slots} combinaciones, se esperaban {SPACE_SIZE}")
+        if tree is None:
+            tree = DecisionTree()
+        if header.get("tree_hash") != tree_fingerprint(tree):
+            raise ValueError(
+                f"La tabla {path} se compiló con otro árbol (versión {header['version']!r}) "
+                f"que el actual (versión {tree.version!r}); vuelva a compilarla con answer_space.py"
+            )
+
+        self._offset = HEADER.size + header_len + (-(HEADER.size + header_len) % 8)
+        self.tree = tree
+        self.version: str = tree.version
+        self.leaves: List[Payload] = [intern_payload(leaf["technologies"]) for leaf in header["leaves"]]
+        self.leaf_names: List[str] = [leaf["name"] for leaf in header["leaves"]]
+        self.default: Payload = intern_payload(header["default"])
+        self.paths: List[str] = header["paths"]
+        self.summaries: List[str] = header["summaries"]
+        self.considerations: List[List[str]] = header["considerations"]
+        self._fallback: Optional[ResponseCache] = None
+        # Slot -> salida serializada; hay tantas como salidas distintas (unos cientos)
+        self._responses: Dict[Tuple[int, int, int, int], Response] = {}
+
+    def close(self):
+        self._mm.close()
+
+    def lookup_slot(self, key: int) -> Tuple[int, int, int, int]:
+        """Devuelve (hoja, camino, resumen, máscara de consideraciones) de una combinación"""
+        return SLOT.unpack_from(self._mm, self._offset + key * SLOT.size)
+
+    def _considerations(self, mask: int) -> List[str]:
+        considerations = []
+        for bit, group in enumerate(self.considerations):
+            if mask & (1 << bit):
+                considerations.extend(group)
+        return considerations
+
+    def lookup(self, answers: Dict[str, str]) -> Optional[Dict]:
+        """Resultado precompilado (un diccionario nuevo), o None si las respuestas no están en la tabla"""
+        key = encode_key(answers)
+        if key is None:
+            return None
+
+        leaf_id, path_id, summary_id, mask = self.lookup_slot(key)
+        payload = self.default if leaf_id == DEFAULT_LEAF else self.leaves[leaf_id]
+        return {
+            "summary": self.summaries[summary_id],
+            "technologies": payload.to_dict(),
+            "considerations": self._considerations(mask),
+            "decision_path": self.paths[path_id]
+        }
+
+    def get(self, answers: Dict[str, str]) -> Response:
+        """Misma interfaz que ResponseCache.get: bytes JSON con result_hash y etag"""
+        key = encode_key(answers)
+        if key is None:
+            return self._fallback_cache().get(answers)
+
+        slot = self.lookup_slot(key)
+        response = self._responses.get(slot)
+        if response is None:
+            leaf_id, path_id, summary_id, mask = slot
+            payload = self.default if leaf_id == DEFAULT_LEAF else self.leaves[leaf_id]
+            response = with_result_hash(
+                encode_parts(self.summaries[summary_id], payload, self._considerations(mask), self.paths[path_id]),
+                self.version,
+            )
+            response.leaf = leaf_id
+            response.payload = payload
+            self._responses[slot] = response
+        return response
+
+    def traverse(self, answers: Dict[str, str]) -> Dict:
+        """Misma interfaz que DecisionTree.traverse"""
+        result = self.lookup(answers)
+        if result is not None:
+            return result
+        return self._fallback_cache().tree.traverse(answers)
+
+    def _fallback_cache(self) -> ResponseCache:
+        """Caché del árbol para las respuestas que la tabla no cubre"""
+        if self._fallback is None:
+            self._fallback = ResponseCache(self.tree)
+        return self._fallback
+
+
+def main():
+    """Compila la tabla del espacio de respuestas"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compila el espacio de respuestas a una tabla binaria")
+    parser.add_argument("-o", "--output", default=DEFAULT_TABLE_PATH, help="Ruta del archivo de salida")
+    args = parser.parse_args()
+
+    count = compile_table(DecisionTree(), args.output)
+    print(f"{count} combinaciones escritas en {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Respuestas por lotes
+Un lote es un arreglo de arreglos de respuestas [{questionId, value}], o un objeto
+{"answers": [...], "format": "rows" | "columns"}. Los conjuntos repetidos se resuelven
+una sola vez, y cada salida distinta y cada conjunto de tecnologías viajan una sola vez:
+
+    {
+      "count": 4,                  conjuntos recibidos
+      "unique": 3,                 conjuntos distintos resueltos
+      "payloads": [{tecnologías}, ...],
+      "results": [{"leaf": 3, "payload": 0, "summary": ..., "considerations": [...],
+                   "decision_path": ..., "result_hash": ...}, ...],
+      "rows": [{"leaf": 3, "result_hash": ..., "result": 0}, ...]
+    }
+
+Con "format": "columns", "rows" se reemplaza por
+    "columns": {"leaf": [...], "result_hash": [...], "result": [...]}
+
+results[i] con "technologies": payloads[results[i].payload] (y sin leaf ni payload) es
+la misma salida que una consulta individual, con el mismo result_hash. Un conjunto
+inválido deja null en su fila y el mensaje en "errors": {"<fila>": "..."}.
+"""
+
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+
+from decision_tree import _parse_answers
+from response_cache import encode_response
+
+
+FORMATS = ("rows", "columns")
+
+
+def parse_batch(request, format: Optional[str] = None) -> Tuple[List, bool]:
+    """
+    (conjuntos de respuestas sin validar, columnar) a partir del JSON de un lote
+
+    Args:
+        format: Formato pedido fuera del cuerpo (p. ej. ?format= en HTTP); tiene prioridad
+    """
+    if isinstance(request, dict):
+        format = format or request.get("format")
+        request = request.get("answers")
+    if not isinstance(request, list):
+        raise ValueError("Un lote es un arreglo de arreglos de respuestas")
+    format = format or "rows"
+    if format not in FORMATS:
+        raise ValueError(f"Formato desconocido: {format}")
+    return request, format == "columns"
+
+
+def encode_batch(respond: Callable[[Dict[str, str]], bytes], answer_sets: List, columnar: bool = False) -> bytes:
+    """
+    Bytes JSON compactos de un lote
+
+    Args:
+        respond: Función respuestas -> bytes JSON (p. ej. ResponseCache.get); con
+                 respuestas de ResponseCache el lote se arma sin decodificar JSON
+        answer_sets: Conjuntos de respuestas como arreglos [{questionId, value}]
+    """
+    leaves: List[Optional[int]] = []
+    hashes: List[Optional[str]] = []
+    indexes: List[Optional[int]] = []
+    errors: Dict[str, str] = {}
+
+    # Conjunto de respuestas -> (hoja, result_hash, índice en results)
+    resolved: Dict[frozenset, Tuple[Optional[int], Optional[str], int]] = {}
+    # Salida (result_hash o bytes) -> índice en results; payload -> índice en payloads
+    result_index: Dict[object, int] = {}
+    payload_index: Dict[object, int] = {}
+    results: List[bytes] = []
+    payloads: List[bytes] = []
+
+    for row, answers_list in enumerate(answer_sets):
+        try:
+            answers = _parse_answers(answers_list)
+            key = frozenset(answers.items())
+        except Exception as e:
+            leaves.append(None)
+            hashes.append(None)
+            indexes.append(None)
+            errors[str(row)] = str(e)
+            continue
+
+        entry = resolved.get(key)
+        if entry is None:
+            entry = resolved[key] = _resolve(respond(answers), result_index, payload_index, results, payloads)
+        leaves.append(entry[0])
+        hashes.append(entry[1])
+        indexes.append(entry[2])
+
+    dumps = json.dumps
+    if columnar:
+        table = b'"columns":{"leaf":%s,"result_hash":%s,"result":%s}' % (
+            dumps(leaves).encode("ascii"),
+            dumps(hashes).encode("ascii"),
+            dumps(indexes).encode("ascii"),
+        )
+    else:
+        table = b'"rows":' + dumps(
+            [{"leaf": leaf, "result_hash": digest, "result": index} for leaf, digest, index in zip(leaves, hashes, indexes)],
+            separators=(",", ":"),
+        ).encode("ascii")
+
+    parts = [
+        b'{"count":%d,"unique":%d' % (len(answer_sets), len(resolved)),
+        b',"payloads":[', b",".join(payloads), b"]",
+        b',"results":[', b",".join(results), b"],",
+        table,
+    ]
+    if errors:
+        parts += (b',"errors":', encode_response(errors))
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def _resolve(body: bytes, result_index: Dict, payload_index: Dict, results: List[bytes], payloads: List[bytes]) -> Tuple:
+    """Registra la salida (y su payload) si es nueva; retorna (hoja, result_hash, índice en results)"""
+    payload = getattr(body, "payload", None)
+    if payload is not None:
+        # Respuesta de ResponseCache: hoja, hash y tecnologías ya están a mano
+        leaf, digest = body.leaf, body.etag
+        key = digest
+        if key in result_index:
+            return leaf, digest, result_index[key]
+        technologies = payload.json
+        # El resumen es una cadena JSON: la primera aparición de la clave es la del objeto
+        segment = b',"technologies":' + technologies
+        start = body.index(segment)
+        rest = body[1:start] + body[start + len(segment):]
+        payload_key = payload
+    else:
+        # Otros motores (puntuación): decodificar la salida
+        result = json.loads(body)
+        leaf, digest = None, result.get("result_hash")
+        key = digest or bytes(body)
+        if key in result_index:
+            return leaf, digest, result_index[key]
+        technologies = encode_response(result.pop("technologies", {}))
+        rest = encode_response(result)[1:]
+        payload_key = technologies
+
+    index = payload_index.get(payload_key)
+    if index is None:
+        index = payload_index[payload_key] = len(payloads)
+        payloads.append(technologies)
+
+    result_index[key] = len(results)
+    results.append(b'{"leaf":%s,"payload":%d,%s' % (b"null" if leaf is None else b"%d" % leaf, index, rest))
+    return leaf, digest, result_index[key]
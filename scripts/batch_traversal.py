@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Recorrido vectorizado del árbol de decisión
+Codifica un lote de respuestas como matriz de enteros (una columna por pregunta)
+y resuelve hojas, caminos, consideraciones y resúmenes con operaciones de NumPy.
+
+NumPy es una dependencia opcional: solo este módulo la necesita.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+from answer_space import QUESTION_IDS, QUESTIONS
+from compiled_tree import CompiledTree
+from decision_tree import (
+    CONSIDER_COMPLEXITY, CONSIDER_INTERNAL, CONSIDER_MOBILE, CONSIDER_PUBLIC, CONSIDER_SCALE,
+    CONSIDER_TEAM, DEFAULT_LEAF, PRIORITY_ORDER, DecisionTree,
+)
+
+
+# Tipos de aplicación reconocidos por el resumen; cualquier otro usa la variante genérica
+SUMMARY_APP_TYPES = ("web", "mobile", "api", "desktop", "fullstack")
+COLUMN_INDEX = {question_id: index for index, question_id in enumerate(QUESTION_IDS)}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("traverse_many requiere NumPy (pip install numpy)")
+
+
+def _summary_table() -> Tuple[str, ...]:
+    """
+    Resúmenes de todas las variantes, generados con DecisionTree._generate_summary
+
+    Código de variante: ((tipo * 3 + escala) * 2 + rápido) * 2 + bajo presupuesto, donde
+    tipo es el índice en SUMMARY_APP_TYPES (o su largo si no aplica) y escala es
+    0 sin mención, 1 grande y 2 pequeña.
+    """
+    summaries = []
+    for app_type in range(len(SUMMARY_APP_TYPES) + 1):
+        for scale in range(3):
+            for fast in (False, True):
+                for low_budget in (False, True):
+                    answers = {
+                        "scale": ("", "large", "small")[scale],
+                        "timeline": "fast" if fast else "",
+                        "budget": "minimal" if low_budget else "",
+                    }
+                    if app_type < len(SUMMARY_APP_TYPES):
+                        answers["app-type"] = SUMMARY_APP_TYPES[app_type]
+                    summaries.append(DecisionTree._generate_summary(answers))
+    return tuple(summaries)
+
+
+class BatchResult:
+    """
+    Resultado columnar de traverse_many
+
+    - leaf: identificador de hoja por fila (DEFAULT_LEAF si no hay camino específico)
+    - path: identificador de camino por fila, índice en paths
+    - considerations: máscara de grupos de consideraciones por fila
+    - summary: código de variante de resumen por fila
+    """
+
+    def __init__(self, traverser: "BatchTraverser", leaf, path, paths: List[str], considerations, summary):
+        self._traverser = traverser
+        self.leaf = leaf
+        self.path = path
+        self.paths = paths
+        self.considerations = considerations
+        self.summary = summary
+
+    def __len__(self) -> int:
+        return len(self.leaf)
+
+    def row(self, index: int) -> Dict:
+        """Materializa una fila con el mismo formato que DecisionTree.traverse"""
+        traverser = self._traverser
+        compiled = traverser.compiled
+        leaf = int(self.leaf[index])
+        considerations = DecisionTree._considerations_from_mask(int(self.considerations[index]))
+
+        if leaf == DEFAULT_LEAF:
+            return {
+                "summary": compiled.default_summary,
+                "technologies": compiled.default_payload.to_dict(),
+                "considerations": considerations,
+                "decision_path": "default"
+            }
+
+        return {
+            "summary": traverser.summaries[int(self.summary[index])],
+            "technologies": compiled.payloads[leaf].to_dict(),
+            "considerations": considerations,
+            "decision_path": self.paths[int(self.path[index])]
+        }
+
+    def to_dicts(self) -> List[Dict]:
+        return [self.row(index) for index in range(len(self))]
+
+
+class BatchTraverser:
+    """Tablas NumPy derivadas de un CompiledTree para recorrer lotes completos"""
+
+    def __init__(self, compiled: CompiledTree):
+        _require_numpy()
+        self.compiled = compiled
+
+        # Vocabulario: valores del árbol primero (mismos códigos que CompiledTree),
+        # luego los valores de las preguntas que no aparecen como aristas
+        vocabulary = dict(compiled.value_codes)
+        for _, values in QUESTIONS:
+            for value in values:
+                vocabulary.setdefault(value, len(vocabulary))
+        self.vocabulary = vocabulary
+
+        # Transiciones con una columna extra de -1 para códigos sin arista;
+        # el código -1 (respuesta ausente) indexa esa última columna
+        node_count = len(compiled.node_leaf)
+        transitions = np.full((node_count, len(vocabulary) + 1), -1, dtype=np.int32)
+        transitions[:, :compiled.width] = np.frombuffer(compiled.transitions, dtype=np.int32).reshape(
+            node_count, compiled.width
+        )
+        self.transitions = transitions
+        self.node_leaf = np.frombuffer(compiled.node_leaf, dtype=np.int32)
+        self.summaries = _summary_table()
+
+        def lookup(mapping: Dict[str, int], default: int):
+            """Arreglo código de vocabulario -> valor; la última posición cubre el código -1"""
+            table = np.full(len(vocabulary) + 1, default, dtype=np.int16)
+            for value, result in mapping.items():
+                table[vocabulary[value]] = result
+            return table
+
+        self._app_type = lookup({v: i for i, v in enumerate(SUMMARY_APP_TYPES)}, len(SUMMARY_APP_TYPES))
+        self._scale = lookup({"large": 1, "xlarge": 1, "small": 2}, 0)
+        self._fast = lookup({"fast": 1}, 0)
+        self._low_budget = lookup({"minimal": 1, "low": 1}, 0)
+        self._public = lookup({"public": 1}, 0)
+        self._internal = lookup({"internal": 1}, 0)
+        self._complex = lookup({"complex": 1, "very-complex": 1}, 0)
+        self._large_team = lookup({"large": 1}, 0)
+        self._mobile = lookup({"mobile": 1}, 0)
+
+    def encode(self, answers_batch: Iterable[Dict[str, str]]):
+        """Codifica un lote de respuestas como matriz (filas x QUESTION_IDS); -1 si falta"""
+        vocabulary = self.vocabulary
+        flat = [
+            vocabulary.get(answers.get(question_id), -1)
+            for answers in answers_batch
+            for question_id in QUESTION_IDS
+        ]
+        return np.array(flat, dtype=np.int32).reshape(-1, len(QUESTION_IDS))
+
+    def traverse(self, codes) -> BatchResult:
+        """Recorre una matriz ya codificada (ver encode)"""
+        rows = codes.shape[0]
+        node = np.zeros(rows, dtype=np.int32)
+        matched = np.zeros(rows, dtype=np.uint8)
+        leaf = np.full(rows, DEFAULT_LEAF, dtype=np.int16)
+        done = np.zeros(rows, dtype=bool)
+
+        for position, key in enumerate(PRIORITY_ORDER):
+            target = self.transitions[node, codes[:, COLUMN_INDEX[key]]]
+            move = (target >= 0) & ~done
+            node = np.where(move, target, node)
+            matched |= move.astype(np.uint8) << position
+
+            reached_leaf = np.where(move, self.node_leaf[node], DEFAULT_LEAF)
+            reached = reached_leaf >= 0
+            leaf[reached] = reached_leaf[reached]
+            done |= reached
+
+        matched[~done] = 0
+
+        # Un camino queda determinado por la hoja y las claves que descendieron
+        path_keys = (leaf.astype(np.int32) + 1) * 256 + matched
+        unique_keys, path = np.unique(path_keys, return_inverse=True)
+        paths = [
+            self.compiled.decision_path(int(key) // 256 - 1, int(key) % 256)
+            for key in unique_keys
+        ]
+
+        return BatchResult(
+            self,
+            leaf,
+            path.reshape(-1).astype(np.int32),
+            paths,
+            self._considerations(codes),
+            self._summary(codes),
+        )
+
+    def _considerations(self, codes):
+        column = lambda key: codes[:, COLUMN_INDEX[key]]
+        mask = self._public[column("audience")] * CONSIDER_PUBLIC
+        mask |= self._internal[column("audience")] * CONSIDER_INTERNAL
+        mask |= (self._scale[column("scale")] == 1) * CONSIDER_SCALE
+        mask |= self._complex[column("complexity")] * CONSIDER_COMPLEXITY
+        mask |= self._large_team[column("team-size")] * CONSIDER_TEAM
+        mask |= self._mobile[column("app-type")] * CONSIDER_MOBILE
+        return mask.astype(np.uint8)
+
+    def _summary(self, codes):
+        column = lambda key: codes[:, COLUMN_INDEX[key]]
+        code = self._app_type[column("app-type")].astype(np.int16) * 3 + self._scale[column("scale")]
+        code = code * 2 + self._fast[column("timeline")]
+        code = code * 2 + self._low_budget[column("budget")]
+        return code.astype(np.uint8)
+
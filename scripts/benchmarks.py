@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks de decision_tree.py
+Mide cada etapa por separado sobre un corpus fijo que cubre todas las hojas y el
+camino por defecto, guarda los resultados en JSON y los compara con una línea base.
+
+Uso:
+    python benchmarks.py                          # imprime resultados
+    python benchmarks.py -o results.json          # guarda resultados
+    python benchmarks.py --baseline base.json     # marca regresiones (código de salida 1)
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from answer_space import iter_answer_space
+from batch_response import encode_batch
+from decision_tree import DEFAULT_LEAF, DecisionTree
+from response_cache import ResponseCache
+
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "decision_tree.py")
+
+# Módulos que el arranque de una sola consulta no debe cargar (ver decision_tree._one_shot)
+DEFERRED_IMPORTS = ("argparse", "typing", "threading", "shutil", "contextlib", "locale", "json", "re", "enum", "cli")
+
+# Cada muestra agrupa suficientes llamadas para que el reloj no domine la medición
+MIN_SAMPLE_NS = 20_000
+
+
+def build_corpus(tree: DecisionTree) -> List[Dict[str, str]]:
+    """Primera combinación (en orden de código) que llega a cada hoja, más una por defecto"""
+    corpus: Dict[int, Dict[str, str]] = {}
+    for answers in iter_answer_space():
+        leaf, _ = tree.resolve(answers)
+        leaf_id = leaf.leaf_id if leaf is not None else DEFAULT_LEAF
+        corpus.setdefault(leaf_id, answers)
+        if len(corpus) == len(tree.leaves) + 1:
+            break
+    return [corpus[leaf_id] for leaf_id in sorted(corpus)]
+
+
+def measure(func: Callable[[], object], samples: int) -> Dict[str, float]:
+    """
+    Latencia por llamada en microsegundos y operaciones por segundo
+
+    Calibra cuántas llamadas forman una muestra y reporta percentiles por llamada.
+    """
+    inner = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(inner):
+            func()
+        if time.perf_counter_ns() - start >= MIN_SAMPLE_NS or inner >= 1 << 16:
+            break
+        inner *= 2
+
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter_ns()
+        for _ in range(inner):
+            func()
+        latencies.append((time.perf_counter_ns() - start) / inner / 1000)
+
+    latencies.sort()
+    mean = statistics.fmean(latencies)
+    return {
+        "ops_per_sec": 1e6 / mean,
+        "mean_us": mean,
+        "p50_us": latencies[len(latencies) // 2],
+        "p95_us": latencies[int(len(latencies) * 0.95)],
+        "p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "calls_per_sample": inner,
+    }
+
+
+def _stdin_payload(answers: Dict[str, str]) -> bytes:
+    return json.dumps([{"questionId": k, "value": v} for k, v in answers.items()]).encode("utf-8")
+
+
+def cold_start(answers: Dict[str, str], runs: int, command: Optional[List[str]] = None) -> Dict[str, float]:
+    """Ejecución completa de main() en un proceso nuevo, como la invoca el servidor web"""
+    payload = _stdin_payload(answers)
+    command = command or [sys.executable, SCRIPT]
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter_ns()
+        subprocess.run(command, input=payload, stdout=subprocess.DEVNULL, check=True, cwd=os.path.dirname(SCRIPT))
+        latencies.append((time.perf_counter_ns() - start) / 1000)
+
+    latencies.sort()
+    mean = statistics.fmean(latencies)
+    return {
+        "ops_per_sec": 1e6 / mean,
+        "mean_us": mean,
+        "p50_us": latencies[len(latencies) // 2],
+        "p95_us": latencies[int(len(latencies) * 0.95)],
+        "p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "calls_per_sample": 1,
+    }
+
+
+def startup_imports(answers: Dict[str, str]) -> List[str]:
+    """Módulos de DEFERRED_IMPORTS que carga una consulta de main() sin argumentos"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", SCRIPT],
+        input=_stdin_payload(answers),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    # Formato de -X importtime: "import time: self | cumulative | [sangría]módulo"
+    loaded = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.decode().splitlines() if "|" in line}
+    return sorted(loaded & set(DEFERRED_IMPORTS))
+
+
+def cycle(items: List) -> Callable[[], object]:
+    """Función que devuelve los elementos de items en rotación (reparte el corpus entre llamadas)"""
+    state = {"index": 0}
+
+    def next_item():
+        index = state["index"]
+        state["index"] = (index + 1) % len(items)
+        return items[index]
+    return next_item
+
+
+def run_benchmarks(samples: int = 200, cold_runs: int = 20) -> Dict[str, Dict[str, float]]:
+    tree = DecisionTree()
+    corpus = build_corpus(tree)
+    compiled = tree.compile()
+    cache = ResponseCache(tree)
+    cache.prewarm()
+
+    results = [tree.traverse(answers) for answers in corpus]
+    specific = [(answers, *tree.resolve(answers)) for answers in corpus]
+    specific = [(answers, leaf, path) for answers, leaf, path in specific if leaf is not None]
+    codes = [compiled.encode(answers) for answers in corpus]
+    # Lote con repeticiones, como los que envían los clientes de reportes
+    batch = [[{"questionId": k, "value": v} for k, v in answers.items()] for answers in corpus] * 8
+
+    next_answers = cycle(corpus)
+    next_result = cycle(results)
+    next_specific = cycle(specific)
+    next_codes = cycle(codes)
+
+    def format_recommendations():
+        answers, leaf, path = next_specific()
+        return tree._format_recommendations(leaf.recommendations, answers, path)
+
+    stages = {
+        "build_tree": lambda: DecisionTree(),
+        # Construcción más recorrido: el trabajo de una consulta de main() sin argumentos
+        "one_shot": lambda: DecisionTree().traverse(next_answers()),
+        "traverse": lambda: tree.traverse(next_answers()),
+        "format_recommendations": format_recommendations,
+        "generate_considerations": lambda: tree._generate_considerations(next_answers()),
+        "json_dumps": lambda: json.dumps(next_result(), ensure_ascii=False, indent=2),
+        "compiled_traverse_codes": lambda: compiled.traverse_codes(next_codes()),
+        "response_cache_get": lambda: cache.get(next_answers()),
+        "encode_batch": lambda: encode_batch(cache.get, batch, columnar=True),
+    }
+
+    report = {name: measure(func, samples) for name, func in stages.items()}
+    if cold_runs:
+        report["main_cold_start"] = cold_start(corpus[0], cold_runs)
+        report["import_cold_start"] = cold_start(corpus[0], cold_runs, [sys.executable, "-c", "import decision_tree"])
+        report["python_cold_start"] = cold_start(corpus[0], cold_runs, [sys.executable, "-c", "pass"])
+    return report
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Etapas cuya latencia p50 subió más de threshold (fracción) respecto de la línea base
+
+    Se compara la mediana y no la media para no marcar ruido del sistema como regresión.
+    """
+    regressions = []
+    for name, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(name)
+        if previous is None:
+            continue
+        change = current["p50_us"] / previous["p50_us"] - 1
+        if change > threshold:
+            regressions.append(f"{name}: p50 {change:+.1%} ({previous['p50_us']:.2f} µs -> {current['p50_us']:.2f} µs)")
+    return regressions
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Microbenchmarks de decision_tree.py")
+    parser.add_argument("-o", "--output", help="Guardar resultados en este archivo JSON")
+    parser.add_argument("--baseline", help="Comparar contra un JSON de resultados previo")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Aumento tolerado de la latencia p50 (fracción)")
+    parser.add_argument("--samples", type=int, default=200, help="Muestras por etapa")
+    parser.add_argument("--cold-runs", type=int, default=20, help="Procesos para el arranque en frío (0 = omitir)")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.time(),
+        "stages": run_benchmarks(args.samples, args.cold_runs),
+        "startup_imports": startup_imports(build_corpus(DecisionTree())[0]),
+    }
+
+    print(f"{'etapa':<26}{'ops/s':>14}{'p50 µs':>12}{'p95 µs':>12}{'p99 µs':>12}")
+    for name, stats in report["stages"].items():
+        print(f"{name:<26}{stats['ops_per_sec']:>14.0f}{stats['p50_us']:>12.2f}{stats['p95_us']:>12.2f}{stats['p99_us']:>12.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    # Independiente de la línea base: cualquiera de estos módulos en el arranque es una regresión
+    regressions = [f"arranque de una consulta importa {name}" for name in report["startup_imports"]]
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions += compare(report, json.load(f), args.threshold)
+    for line in regressions:
+        print(f"REGRESIÓN {line}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
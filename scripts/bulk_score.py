@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Puntuación masiva de respuestas históricas
+Lee un archivo NDJSON o CSV por bloques, reparte los bloques entre procesos
+(cada uno con su propio DecisionTree) y escribe los resultados en orden. La
+memoria queda acotada por el número de bloques en vuelo, no por el tamaño del
+archivo, y un checkpoint permite reanudar tras una interrupción.
+
+Entrada NDJSON: una línea por envío, como arreglo [{questionId, value}], como
+objeto {"id": ..., "answers": [...]} o como objeto plano {questionId: value}.
+Entrada CSV: una columna por questionId y opcionalmente "id"; los campos entre comillas
+pueden contener saltos de línea. Los bloques se cortan entre registros, nunca dentro de uno.
+
+Una fila inválida (JSON roto, bytes que no son UTF-8, CSV malformado) produce una fila
+de error en su lugar y no afecta al resto del bloque.
+
+Uso:
+    python bulk_score.py envios.ndjson -o resultados.ndjson
+    python bulk_score.py envios.csv -o resultados.csv --workers 8
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from decision_tree import DEFAULT_LEAF, DecisionTree, _error_response, _parse_answers
+
+
+CSV_FIELDS = ("row", "id", "leaf", "decision_path", "considerations_mask")
+
+# Registro CSV ya separado en campos, o el error que impidió separarlo
+CsvRecord = Union[List[str], csv.Error]
+
+# Estado de cada proceso del pool
+_worker = {}
+
+
+def _init_worker(definition: Optional[str]):
+    if definition:
+        from tree_definition import load_definition
+        tree, _ = load_definition(definition, use_snapshot=False)
+    else:
+        tree = DecisionTree()
+
+    from response_cache import ResponseCache
+    _worker["compiled"] = tree.compile()
+    _worker["cache"] = ResponseCache(tree)
+
+
+def _parse_ndjson(line: bytes) -> Tuple[Optional[str], Dict[str, str]]:
+    record = json.loads(line)
+    if isinstance(record, list):
+        return None, _parse_answers(record)
+    if isinstance(record, dict) and "answers" in record:
+        return record.get("id"), _parse_answers(record["answers"])
+    if isinstance(record, dict):
+        record = dict(record)
+        return record.pop("id", None), record
+    raise ValueError("Cada línea debe ser un arreglo de respuestas o un objeto")
+
+
+def _parse_csv(header: List[str], record: CsvRecord) -> Tuple[Optional[str], Dict[str, str]]:
+    if isinstance(record, csv.Error):
+        raise ValueError(f"CSV inválido: {record}")
+    try:
+        "".join(record).encode("utf-8")
+    except UnicodeEncodeError:
+        # Los bytes que no son UTF-8 llegan como sustitutos (surrogateescape, ver _Lines)
+        raise ValueError("La fila contiene bytes que no son UTF-8 válido")
+    fields = dict(zip(header, record))
+    record_id = fields.pop("id", None)
+    return record_id, {key: value for key, value in fields.items() if value != ""}
+
+
+def _score_chunk(
+    input_format: str,
+    output_format: str,
+    header: Optional[List[str]],
+    first_row: int,
+    chunk,
+) -> bytes:
+    """Puntúa un bloque (líneas NDJSON, o los bytes de registros CSV completos) y devuelve su salida ya serializada"""
+    cache = _worker["cache"]
+    compiled = _worker["compiled"]
+    out = io.StringIO() if output_format == "csv" else io.BytesIO()
+    writer = csv.writer(out, lineterminator="\n") if output_format == "csv" else None
+
+    if input_format == "csv":
+        # Mismo recorrido que read_csv_chunks: los mismos registros en el mismo orden
+        records = iter_csv_records(io.StringIO(chunk.decode("utf-8", "surrogateescape"), newline=""))
+    else:
+        records = chunk
+
+    for row, record in enumerate(records, start=first_row):
+        try:
+            if input_format == "csv":
+                record_id, answers = _parse_csv(header, record)
+            else:
+                record_id, answers = _parse_ndjson(record)
+
+            if writer is not None:
+                leaf, matched = compiled.traverse_codes(compiled.encode(answers))
+                writer.writerow((
+                    row,
+                    record_id if record_id is not None else "",
+                    "default" if leaf == DEFAULT_LEAF else compiled.leaf_names[leaf],
+                    compiled.decision_path(leaf, matched),
+                    DecisionTree._considerations_mask(answers),
+                ))
+            else:
+                out.write(cache.get(answers))
+                out.write(b"\n")
+        except Exception as e:
+            if writer is not None:
+                writer.writerow((row, "", "error", str(e), ""))
+            else:
+                out.write(json.dumps(_error_response(e), ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+                out.write(b"\n")
+
+    return out.getvalue().encode("utf-8") if writer is not None else out.getvalue()
+
+
+def read_chunks(f, chunk_size: int) -> Iterator[Tuple[List[bytes], int]]:
+    """Genera (líneas no vacías, desplazamiento del archivo al final del bloque)"""
+    lines = []
+    for line in f:
+        if line.strip():
+            lines.append(line)
+        if len(lines) >= chunk_size:
+            yield lines, f.tell()
+            lines = []
+    if lines:
+        yield lines, f.tell()
+
+
+class _Lines:
+    """
+    Líneas de un archivo binario como texto, con el desplazamiento al final de la última leída
+
+    Los bytes que no son UTF-8 se conservan como sustitutos (surrogateescape): la
+    decodificación nunca falla aquí y la fila afectada se reporta al puntuarla.
+    """
+
+    def __init__(self, f, offset: int = 0):
+        self.f = f
+        self.offset = offset
+        # Bytes leídos desde la última vez que se vació (ver read_csv_chunks)
+        self.raw: List[bytes] = []
+
+    def __iter__(self) -> Iterator[str]:
+        raw = self.raw
+        for line in self.f:
+            self.offset += len(line)
+            raw.append(line)
+            yield line.decode("utf-8", "surrogateescape")
+
+    def take(self) -> bytes:
+        data = b"".join(self.raw)
+        self.raw.clear()
+        return data
+
+
+def iter_csv_records(lines: Iterable[str]) -> Iterator[CsvRecord]:
+    """Registros CSV no vacíos (un registro puede ocupar varias líneas); un registro malformado se entrega como csv.Error"""
+    reader = csv.reader(lines)
+    while True:
+        try:
+            for record in reader:
+                if record:
+                    yield record
+            return
+        except csv.Error as e:
+            yield e
+
+
+def read_csv_chunks(f, chunk_size: int, offset: int) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    Genera (bytes de registros CSV completos, número de registros, desplazamiento al final del bloque)
+
+    Los registros se separan aquí con csv solo para cortar los bloques entre registros;
+    cada worker vuelve a separar sus bytes con iter_csv_records y obtiene los mismos.
+    """
+    lines = _Lines(f, offset)
+    count = 0
+    for _ in iter_csv_records(lines):
+        count += 1
+        if count >= chunk_size:
+            # csv.reader no lee más allá del registro que entrega: offset es su final
+            yield lines.take(), count, lines.offset
+            count = 0
+    if count:
+        yield lines.take(), count, lines.offset
+
+
+def _load_checkpoint(path: str) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_checkpoint(path: str, state: Dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def run(
+    input_path: str,
+    output_path: str,
+    input_format: str,
+    output_format: str,
+    workers: Optional[int] = None,
+    chunk_size: int = 5000,
+    checkpoint_path: Optional[str] = None,
+    definition: Optional[str] = None,
+    progress_interval: float = 5.0,
+) -> int:
+    """
+    Puntúa input_path y escribe output_path; reanuda desde checkpoint_path si existe
+
+    Returns:
+        Número total de filas escritas
+    """
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    checkpoint = _load_checkpoint(checkpoint_path)
+    if checkpoint is not None and checkpoint.get("input") != os.path.abspath(input_path):
+        raise ValueError(f"El checkpoint {checkpoint_path} corresponde a otra entrada")
+
+    workers = workers or os.cpu_count() or 1
+    in_flight_limit = workers * 2
+
+    with open(input_path, "rb") as source, open(output_path, "ab") as sink:
+        header = None
+        if input_format == "csv":
+            header_lines = _Lines(source)
+            header = next(iter_csv_records(header_lines), [])
+            if isinstance(header, csv.Error):
+                raise ValueError(f"Cabecera CSV inválida: {header}")
+            header = [name.lstrip("\ufeff") for name in header]
+            source.seek(header_lines.offset)
+
+        if checkpoint is not None:
+            # Descartar lo escrito después del último checkpoint
+            sink.truncate(checkpoint["output_offset"])
+            source.seek(checkpoint["input_offset"])
+            rows_done = checkpoint["rows"]
+            print(f"Reanudando desde la fila {rows_done}", file=sys.stderr)
+        else:
+            sink.truncate(0)
+            rows_done = 0
+            if output_format == "csv":
+                sink.write((",".join(CSV_FIELDS) + "\n").encode("utf-8"))
+
+        start = time.monotonic()
+        last_report = start
+        rows_this_run = 0
+        pending = deque()
+        next_row = rows_done
+
+        def drain_one():
+            nonlocal rows_done, rows_this_run, last_report
+            future, rows, input_offset = pending.popleft()
+            sink.write(future.result())
+            sink.flush()
+            rows_done += rows
+            rows_this_run += rows
+            _save_checkpoint(checkpoint_path, {
+                "input": os.path.abspath(input_path),
+                "input_offset": input_offset,
+                "output_offset": sink.tell(),
+                "rows": rows_done,
+            })
+
+            now = time.monotonic()
+            if now - last_report >= progress_interval:
+                last_report = now
+                print(f"{rows_done} filas ({rows_this_run / (now - start):.0f} filas/s)", file=sys.stderr)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(definition,)) as pool:
+            if input_format == "csv":
+                chunks = read_csv_chunks(source, chunk_size, source.tell())
+            else:
+                chunks = ((lines, len(lines), input_offset) for lines, input_offset in read_chunks(source, chunk_size))
+            for chunk, rows, input_offset in chunks:
+                pending.append((
+                    pool.submit(_score_chunk, input_format, output_format, header, next_row, chunk),
+                    rows,
+                    input_offset,
+                ))
+                next_row += rows
+                if len(pending) >= in_flight_limit:
+                    drain_one()
+
+            while pending:
+                drain_one()
+
+        elapsed = time.monotonic() - start
+        rate = rows_this_run / elapsed if elapsed > 0 else 0.0
+        print(f"{rows_done} filas en total ({rate:.0f} filas/s)", file=sys.stderr)
+
+    # Una entrada sin filas nunca llega a escribir el checkpoint
+    try:
+        os.unlink(checkpoint_path)
+    except FileNotFoundError:
+        pass
+    return rows_done
+
+
+def _guess_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Puntuación masiva de envíos del cuestionario")
+    parser.add_argument("input", help="Archivo NDJSON o CSV de entrada")
+    parser.add_argument("-o", "--output", required=True, help="Archivo de salida")
+    parser.add_argument("--input-format", choices=("ndjson", "csv"), help="Por defecto según la extensión")
+    parser.add_argument("--output-format", choices=("ndjson", "csv"), help="Por defecto según la extensión")
+    parser.add_argument("--workers", type=int, help="Procesos del pool (por defecto, uno por núcleo)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Filas por bloque")
+    parser.add_argument("--checkpoint", help="Archivo de checkpoint (por defecto <salida>.checkpoint)")
+    parser.add_argument("--definition", help="Archivo de definición del árbol (ver tree_definition.py)")
+    args = parser.parse_args()
+
+    run(
+        args.input,
+        args.output,
+        args.input_format or _guess_format(args.input),
+        args.output_format or _guess_format(args.output),
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        definition=args.definition,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Línea de comandos de decision_tree.py
+Modos con opciones: stream NDJSON, servidor HTTP (un proceso o pre-fork), lotes,
+tabla precompilada, definiciones externas, variantes, métricas y captura de tráfico.
+decision_tree.main() delega aquí cuando recibe argumentos; la consulta única sin
+argumentos no importa este módulo.
+
+Uso:
+    python decision_tree.py --stream
+    python decision_tree.py --serve --workers 4
+    python decision_tree.py --batch columns < lote.json
+"""
+
+import json
+import sys
+from typing import Callable, Dict, List, Optional
+
+from decision_tree import DecisionTree, _error_response, _parse_answers
+
+
+def serve_stream(respond: Callable[[Dict[str, str]], bytes], stdin=None, stdout=None, variants: bool = False):
+    """
+    Modo persistente: lee un arreglo de respuestas por línea (NDJSON) y
+    escribe un resultado JSON compacto por línea, reutilizando el mismo árbol.
+
+    Args:
+        respond: Función respuestas -> bytes JSON (p. ej. ResponseCache.get)
+        variants: respond acepta (respuestas, variante) como TreeRegistry.respond
+
+    Una línea es un arreglo de respuestas o un objeto {"answers": [...]} con las claves
+    opcionales "variant" (requiere variants) e "if_none_match": si coincide con el
+    result_hash de la salida se escribe {"not_modified":true,"result_hash":...}.
+    Un objeto {"batch": [...], "format": ...} es un lote (ver batch_response.py).
+
+    Una línea inválida produce un objeto de error en su línea de salida
+    sin detener el stream.
+    """
+    stdin = stdin if stdin is not None else sys.stdin.buffer
+    stdout = stdout if stdout is not None else sys.stdout.buffer
+
+    for line in stdin:
+        if not line.strip():
+            continue
+
+        try:
+            request = json.loads(line)
+            variant = if_none_match = batch = None
+            if isinstance(request, dict):
+                variant = request.get("variant")
+                if_none_match = request.get("if_none_match")
+                batch = request.get("batch")
+                if variant is not None and not variants:
+                    raise ValueError("Variantes no habilitadas (ver --variants)")
+
+            if batch is not None:
+                from batch_response import encode_batch, parse_batch
+                answer_sets, columnar = parse_batch(batch, request.get("format"))
+                respond_one = (lambda answers: respond(answers, variant)) if variants else respond
+                payload = encode_batch(respond_one, answer_sets, columnar)
+            else:
+                if isinstance(request, dict):
+                    request = request.get("answers")
+                answers = _parse_answers(request)
+                payload = respond(answers, variant) if variants else respond(answers)
+
+                etag = getattr(payload, "etag", None)
+                if if_none_match is not None and if_none_match == etag:
+                    payload = b'{"not_modified":true,"result_hash":"%s"}' % etag.encode("ascii")
+        except Exception as e:
+            payload = json.dumps(_error_response(e), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        stdout.write(payload)
+        stdout.write(b"\n")
+        stdout.flush()
+
+
+def _no_stage(name: str):
+    """Sustituto de Metrics.stage cuando la instrumentación está apagada"""
+    from contextlib import nullcontext
+    return nullcontext()
+
+
+def _open_table(args):
+    """Tabla precompilada indicada con --table, o None para usar el árbol"""
+    if not args.table:
+        return None
+    from answer_space import AnswerTable
+    return AnswerTable(args.table)
+
+
+def _make_responder(tree, args) -> Callable[[Dict[str, str]], bytes]:
+    """Función respuestas -> bytes para los modos persistentes"""
+    from response_cache import ResponseCache, encode_response, with_result_hash
+
+    if tree is not None:
+        return tree.get
+
+    def cached(tree: DecisionTree) -> Callable[[Dict[str, str]], bytes]:
+        if args.engine == "scoring":
+            engine = _scoring_engine(tree, args)
+            # Sin caché: el hash se calcula sobre la salida completa, ranking incluido
+            return lambda answers: with_result_hash(
+                encode_response(engine.recommend(answers, args.top_k)), tree.version
+            )
+        cache = ResponseCache(tree, max_entries=args.cache_size)
+        if args.prewarm:
+            cache.prewarm()
+        return cache.get
+
+    if args.definition and args.watch:
+        from tree_definition import ReloadingResponder
+        return ReloadingResponder(args.definition, cached, args.reload_interval)
+    return cached(_load_tree(args))
+
+
+def _scoring_engine(tree: DecisionTree, args):
+    """Motor de puntuación ponderada para --engine scoring (ver scoring_engine.py)"""
+    from scoring_engine import ScoringEngine
+    if args.scoring_weights:
+        return ScoringEngine.from_file(tree, args.scoring_weights)
+    return ScoringEngine(tree)
+
+
+def _open_variants(args):
+    """Registro de variantes indicado con --variants, o None"""
+    if not args.variants:
+        return None
+    from tree_registry import TreeRegistry, parse_variant
+    registry = TreeRegistry(
+        args.variants,
+        max_variants=args.max_variants,
+        max_bytes=args.max_variant_bytes,
+        cache_size=args.cache_size,
+        default=parse_variant(args.variant),
+        # El servidor construye las variantes nuevas fuera del bucle de eventos
+        defer_builds=args.serve,
+    )
+    # Cargar la variante por defecto antes de atender: un error de definición aparece al arrancar
+    registry.get(registry.default)
+    return registry
+
+
+def _load_tree(args) -> DecisionTree:
+    """Árbol incorporado, o el del archivo indicado con --definition"""
+    if not args.definition:
+        return DecisionTree()
+    from tree_definition import load_definition
+    return load_definition(args.definition)[0]
+
+
+def _positive_int(text: str) -> int:
+    """Tipo de argparse para enteros mayores que cero"""
+    import argparse
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"debe ser un entero mayor que cero: {text}")
+    return value
+
+
+def main(argv: Optional[List[str]] = None):
+    """Procesa las opciones de línea de comandos y ejecuta el modo elegido"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Recomendaciones tecnológicas por árbol de decisión")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Proceso persistente: un arreglo de respuestas por línea en stdin, un resultado por línea en stdout"
+    )
+    # El árbol sale de la tabla precompilada o de un archivo de definición, no de ambos
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--table",
+        metavar="PATH",
+        help="Responder desde la tabla precompilada del espacio de respuestas (ver answer_space.py)"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="Máximo de respuestas serializadas en la caché LRU de los modos persistentes"
+    )
+    parser.add_argument(
+        "--prewarm",
+        action="store_true",
+        help="Serializar de antemano todas las respuestas posibles"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Servidor HTTP/1.1 con el contrato de app/api/recommendations (ver server.py)"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección de escucha del servidor")
+    parser.add_argument("--port", type=int, default=8000, help="Puerto de escucha del servidor")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Con --serve: número de procesos pre-fork (0 = un solo proceso sin supervisor)"
+    )
+    parser.add_argument(
+        "--max-body",
+        type=int,
+        default=64 * 1024,
+        help="Tamaño máximo en bytes del cuerpo de una petición HTTP"
+    )
+    parser.add_argument(
+        "--max-batch-body",
+        type=int,
+        default=8 * 1024 * 1024,
+        help="Tamaño máximo en bytes del cuerpo de una petición por lotes (ver batch_response.py)"
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=10.0,
+        help="Segundos para recibir la cabecera (desde su primer byte) y el cuerpo de una petición HTTP"
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Habilitar la instrumentación por etapas (el servidor expone /metrics y /metrics.json)"
+    )
+    parser.add_argument(
+        "--metrics-out",
+        metavar="PATH",
+        help="Volcar métricas al terminar y con SIGUSR1 (JSON si termina en .json, Prometheus si no)"
+    )
+    source.add_argument(
+        "--definition",
+        metavar="PATH",
+        help="Cargar el árbol desde un archivo de definición JSON (ver tree_definition.py)"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Con --definition en modos persistentes: recargar el árbol cuando cambie el archivo"
+    )
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=2.0,
+        help="Segundos entre comprobaciones del archivo de definición con --watch"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("tree", "scoring"),
+        default="tree",
+        help="tree: recorrido del árbol; scoring: hoja mejor puntuada por pesos (ver scoring_engine.py)"
+    )
+    parser.add_argument(
+        "--top-k",
+        type=_positive_int,
+        default=3,
+        help="Con --engine scoring: hojas incluidas en \"ranking\""
+    )
+    parser.add_argument(
+        "--scoring-weights",
+        metavar="PATH",
+        help="Con --engine scoring: JSON de ajustes {hoja: {\"pregunta=valor\": peso}}"
+    )
+    parser.add_argument(
+        "--variants",
+        metavar="DIR",
+        help="Directorio de variantes <locale>/<tenant>/<version>.json elegidas por petición (ver tree_registry.py)"
+    )
+    parser.add_argument(
+        "--variant",
+        metavar="KEY",
+        help="Con --variants: variante por defecto, \"locale/tenant/version\" (por defecto es/default/current)"
+    )
+    parser.add_argument(
+        "--max-variants",
+        type=int,
+        default=16,
+        help="Con --variants: máximo de variantes cargadas a la vez"
+    )
+    parser.add_argument(
+        "--max-variant-bytes",
+        type=int,
+        default=0,
+        help="Con --variants: presupuesto aproximado de memoria de las variantes cargadas (0 = sin límite)"
+    )
+    parser.add_argument(
+        "--capture",
+        metavar="PATH",
+        help="Guardar las respuestas recibidas en NDJSON para replay.py (ver traffic_capture.py)"
+    )
+    parser.add_argument(
+        "--capture-rate",
+        type=float,
+        default=1.0,
+        help="Con --capture: fracción de peticiones guardadas"
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="?",
+        const="",
+        metavar="FORMAT",
+        help="Leer de stdin un lote de conjuntos de respuestas; FORMAT rows o columns (ver batch_response.py)"
+    )
+    parser.add_argument(
+        "--export-definition",
+        metavar="PATH",
+        help="Escribir el árbol incorporado como archivo de definición y salir"
+    )
+    args = parser.parse_args(argv)
+    if args.engine == "scoring" and args.table:
+        parser.error("--engine scoring no es compatible con --table")
+    if args.variants and (args.table or args.definition or args.engine != "tree"):
+        parser.error("--variants no es compatible con --table, --definition ni --engine scoring")
+    if args.batch is not None and (args.stream or args.serve):
+        parser.error("--batch no es compatible con --stream ni --serve (ambos aceptan lotes, ver batch_response.py)")
+
+    if args.export_definition:
+        from tree_definition import export_definition
+        with open(args.export_definition, "w", encoding="utf-8") as f:
+            json.dump(export_definition(DecisionTree()), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        return
+
+    registry = _enable_metrics(args)
+    try:
+        _run(args, registry)
+    finally:
+        if registry is not None and args.metrics_out:
+            registry.dump(args.metrics_out)
+
+
+def _enable_metrics(args):
+    """Registro de métricas si se pidió instrumentación, o None"""
+    if not (args.metrics or args.metrics_out):
+        return None
+
+    import metrics
+    registry = metrics.enable()
+    if args.metrics_out:
+        import signal
+        signal.signal(signal.SIGUSR1, lambda signum, frame: registry.dump(args.metrics_out))
+    return registry
+
+
+def _run(args, registry):
+    """Ejecuta el modo de operación elegido en la línea de comandos"""
+    stage = registry.stage if registry is not None else _no_stage
+    tree = _open_table(args)
+    variants = _open_variants(args)
+    respond = variants.respond if variants is not None else None
+    capture = None
+    if args.capture:
+        from traffic_capture import TrafficCapture
+        capture = TrafficCapture(args.capture, args.capture_rate)
+    captured = capture.wrap if capture is not None else (lambda respond: respond)
+
+    if args.stream:
+        serve_stream(captured(respond or _make_responder(tree, args)), variants=respond is not None)
+        return
+
+    if args.serve and args.workers > 0:
+        from server import prefork
+        prefork(
+            # SIGHUP vuelve a llamar a factory: un registro nuevo relee las definiciones
+            lambda: captured(_open_variants(args).respond if args.variants else _make_responder(_open_table(args), args)),
+            args.workers,
+            args.host,
+            args.port,
+            max_body=args.max_body,
+            max_batch_body=args.max_batch_body,
+            read_timeout=args.read_timeout,
+            variants=respond is not None
+        )
+        return
+
+    if args.serve:
+        import asyncio
+        from server import serve
+        asyncio.run(serve(
+            captured(respond or _make_responder(tree, args)),
+            args.host,
+            args.port,
+            max_body=args.max_body,
+            max_batch_body=args.max_batch_body,
+            read_timeout=args.read_timeout,
+            variants=respond is not None
+        ))
+        return
+
+    if args.batch is not None:
+        _run_batch(args, captured(respond or _make_responder(tree, args)))
+        return
+
+    try:
+        # Leer respuestas desde stdin (JSON)
+        with stage("parse"):
+            input_data = sys.stdin.read()
+            answers_list = json.loads(input_data)
+            
+            # Convertir lista de respuestas a diccionario
+            answers = _parse_answers(answers_list)
+            if capture is not None:
+                capture.record(answers, args.variant if variants is not None else None)
+        
+        # Crear árbol de decisión
+        with stage("build"):
+            if variants is not None:
+                tree = variants.get(variants.default).tree
+            tree = tree or _load_tree(args)
+        
+        # Obtener recomendaciones
+        if args.engine == "scoring":
+            recommendations = _scoring_engine(tree, args).recommend(answers, args.top_k)
+        else:
+            recommendations = tree.traverse(answers)
+        
+        # Retornar como JSON
+        with stage("encode"):
+            output = json.dumps(recommendations, ensure_ascii=False, indent=2)
+        print(output)
+        
+    except Exception as e:
+        print(json.dumps(_error_response(e), ensure_ascii=False, indent=2))
+        sys.exit(1)
+
+
+
+def _run_batch(args, respond: Callable[[Dict[str, str]], bytes]):
+    """Un lote leído de stdin; la salida es JSON compacto en una línea"""
+    from batch_response import encode_batch, parse_batch
+
+    try:
+        answer_sets, columnar = parse_batch(json.loads(sys.stdin.read()), args.batch or None)
+        output = encode_batch(respond, answer_sets, columnar)
+    except Exception as e:
+        print(json.dumps(_error_response(e), ensure_ascii=False, indent=2))
+        sys.exit(1)
+
+    sys.stdout.buffer.write(output + b"\n")
+    sys.stdout.flush()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Representación compacta del árbol de decisión
+Los nodos TechNode siguen siendo la capa de autoría; este módulo los compila a
+arreglos planos de enteros con valores internados y una tabla única de hojas.
+"""
+
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+from decision_tree import DEFAULT_LEAF, PRIORITY_ORDER, DecisionTree, TechNode
+from payload_store import Payload, intern_payload
+
+
+# Código usado para respuestas ausentes o con valores que no aparecen en el árbol
+NO_VALUE = -1
+
+
+class CompiledTree:
+    """
+    Árbol compilado a arreglos planos
+
+    - values / value_codes: valores de respuesta internados como enteros pequeños
+    - transitions: tabla densa nodo x valor -> nodo hijo (o -1)
+    - node_leaf: identificador de hoja de cada nodo (o -1)
+    - payloads: recomendaciones internadas de cada hoja, compartidas por todos los caminos
+    """
+
+    __slots__ = (
+        "values", "value_codes", "width", "transitions", "node_leaf",
+        "payloads", "leaf_names", "leaf_conditions", "default_payload", "default_summary", "_labels",
+    )
+
+    def __init__(self, tree: DecisionTree):
+        values: List[str] = []
+        value_codes: Dict[str, int] = {}
+        nodes: List[TechNode] = []
+        leaf_conditions: Dict[int, Tuple[str, ...]] = {}
+
+        # Numerar nodos en anchura e internar las condiciones de las aristas
+        queue = [(tree.root, ())]
+        while queue:
+            node, conditions = queue.pop(0)
+            nodes.append(node)
+            if node.recommendations:
+                leaf_conditions[node.leaf_id] = conditions
+            for condition, child in node.children.items():
+                if condition not in value_codes:
+                    value_codes[condition] = len(values)
+                    values.append(condition)
+                queue.append((child, conditions + (condition,)))
+
+        node_ids = {id(node): index for index, node in enumerate(nodes)}
+        width = len(values)
+        transitions = array("i", [-1]) * (len(nodes) * width)
+        node_leaf = array("i", [DEFAULT_LEAF]) * len(nodes)
+
+        for index, node in enumerate(nodes):
+            for condition, child in node.children.items():
+                transitions[index * width + value_codes[condition]] = node_ids[id(child)]
+            if node.recommendations:
+                node_leaf[index] = node.leaf_id
+
+        self.values: Tuple[str, ...] = tuple(values)
+        self.value_codes = value_codes
+        self.width = width
+        self.transitions = transitions
+        self.node_leaf = node_leaf
+        self.payloads: Tuple[Payload, ...] = tuple(leaf.recommendations for leaf in tree.leaves)
+        self.leaf_names: Tuple[str, ...] = tuple(tree.leaf_names)
+        self.leaf_conditions: Tuple[Tuple[str, ...], ...] = tuple(
+            leaf_conditions[leaf_id] for leaf_id in range(len(tree.leaves))
+        )
+
+        default = tree._get_default_recommendations({})
+        self.default_payload: Payload = intern_payload(default["technologies"])
+        self.default_summary: str = default["summary"]
+        self._labels: Dict[Tuple[int, int], Tuple[str, str]] = {}
+
+    def encode(self, answers: Dict[str, str]) -> Tuple[int, ...]:
+        """Codifica las respuestas en el orden de PRIORITY_ORDER"""
+        value_codes = self.value_codes
+        return tuple(value_codes.get(answers.get(key), NO_VALUE) for key in PRIORITY_ORDER)
+
+    def traverse_codes(self, codes: Sequence[int]) -> Tuple[int, int]:
+        """
+        Recorre el árbol con respuestas ya codificadas
+
+        Args:
+            codes: Un código por clave de PRIORITY_ORDER (NO_VALUE si no aplica)
+
+        Returns:
+            Tupla (hoja o DEFAULT_LEAF, máscara de claves de PRIORITY_ORDER que descendieron)
+        """
+        transitions = self.transitions
+        node_leaf = self.node_leaf
+        width = self.width
+        node = 0
+        matched = 0
+
+        for position, code in enumerate(codes):
+            if code < 0:
+                continue
+
+            target = transitions[node * width + code]
+            if target >= 0:
+                node = target
+                matched |= 1 << position
+
+                leaf = node_leaf[node]
+                if leaf >= 0:
+                    return leaf, matched
+
+        return DEFAULT_LEAF, matched
+
+    def decision_path(self, leaf: int, matched: int) -> str:
+        """Reconstruye el texto del camino de decisión a partir de la hoja y la máscara"""
+        if leaf == DEFAULT_LEAF:
+            return "default"
+
+        keys = [key for position, key in enumerate(PRIORITY_ORDER) if matched & (1 << position)]
+        return " → ".join(f"{key}={value}" for key, value in zip(keys, self.leaf_conditions[leaf]))
+
+    def labels(self, leaf: int, matched: int) -> Tuple[str, str]:
+        """
+        (nombre de la hoja o "default", camino de decisión), memorizado
+
+        Los bits de matched solo tienen sentido en este árbol: cada árbol compilado
+        (variante, recarga) guarda sus propias etiquetas.
+        """
+        label = self._labels.get((leaf, matched))
+        if label is None:
+            leaf_name = "default" if leaf == DEFAULT_LEAF else self.leaf_names[leaf]
+            label = self._labels[(leaf, matched)] = (leaf_name, self.decision_path(leaf, matched))
+        return label
+
+    def resolve(self, answers: Dict[str, str]) -> Tuple[str, Payload, List[str], str]:
+        """Partes del resultado sin materializar: (resumen, payload, consideraciones, camino)"""
+        leaf, matched = self.traverse_codes(self.encode(answers))
+
+        if leaf == DEFAULT_LEAF:
+            return self.default_summary, self.default_payload, DecisionTree._generate_considerations(answers), "default"
+
+        return (
+            DecisionTree._generate_summary(answers),
+            self.payloads[leaf],
+            DecisionTree._generate_considerations(answers),
+            self.decision_path(leaf, matched),
+        )
+
+    def traverse(self, answers: Dict[str, str]) -> Dict:
+        """Misma interfaz y resultado que DecisionTree.traverse"""
+        summary, payload, considerations, decision_path = self.resolve(answers)
+        return {
+            "summary": summary,
+            "technologies": payload.to_dict(),
+            "considerations": considerations,
+            "decision_path": decision_path
+        }
+
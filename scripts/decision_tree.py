@@ -4,18 +4,87 @@
 Este script implementa la lógica de recomendación usando un árbol de decisión en Python
 """
 
-import json
+from __future__ import annotations
+
 import sys
-from typing import Dict, List, Optional
+
+from payload_store import Payload, intern_payload
+
+# typing y json no se importan en la consulta única (ver _one_shot): typing solo aparece en anotaciones
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Orden de prioridad para recorrer el árbol
+PRIORITY_ORDER = (
+    "app-type",      # Nivel 1: Tipo de aplicación
+    "timeline",      # Nivel 2: Timeline
+    "complexity",    # Nivel 3: Complejidad
+    "scale",         # Nivel 3: Escala
+    "budget",        # Nivel 2: Presupuesto (para mobile)
+    "team-size",     # Nivel 2: Tamaño de equipo (para fullstack)
+)
+
+# Identificador de hoja usado cuando se cae en las recomendaciones por defecto
+DEFAULT_LEAF = -1
+
+# Versión del árbol incorporado (las definiciones de tree_definition.py traen la suya)
+BUILTIN_VERSION = "builtin"
+
+# Grupos de consideraciones; el bit i de la máscara activa el grupo i
+CONSIDERATION_GROUPS = (
+    # Audiencia pública
+    (
+        "Implementa medidas de seguridad robustas (rate limiting, validación de inputs, HTTPS)",
+        "Considera SEO y accesibilidad desde el inicio",
+    ),
+    # Audiencia interna
+    (
+        "Integra con sistemas de autenticación corporativos (SSO, LDAP)",
+    ),
+    # Escala grande
+    (
+        "Planifica estrategia de caching y CDN desde el inicio",
+        "Implementa monitoreo y observabilidad comprehensivos",
+        "Considera arquitectura multi-región para latencia global",
+    ),
+    # Complejidad alta
+    (
+        "Documenta arquitectura y decisiones técnicas detalladamente",
+        "Implementa testing comprehensivo (unit, integration, e2e)",
+        "Establece prácticas de code review y CI/CD desde el inicio",
+    ),
+    # Equipo grande
+    (
+        "Define convenciones de código y guías de estilo claras",
+        "Implementa monorepo si tienes múltiples proyectos relacionados",
+    ),
+    # Aplicación móvil
+    (
+        "Planifica estrategia de actualizaciones y versionado de app",
+        "Considera offline-first architecture para mejor UX",
+    ),
+)
+
+CONSIDER_PUBLIC = 1 << 0
+CONSIDER_INTERNAL = 1 << 1
+CONSIDER_SCALE = 1 << 2
+CONSIDER_COMPLEXITY = 1 << 3
+CONSIDER_TEAM = 1 << 4
+CONSIDER_MOBILE = 1 << 5
 
 
 class TechNode:
     """Nodo del árbol de decisión"""
+    __slots__ = ("name", "description", "children", "recommendations", "leaf_id")
+    
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
         self.children: Dict[str, 'TechNode'] = {}
-        self.recommendations: Optional[Dict] = None
+        self.recommendations: Optional[Payload] = None
+        self.leaf_id: Optional[int] = None
     
     def add_child(self, condition: str, node: 'TechNode'):
         """Agrega un hijo al nodo basado en una condición"""
@@ -23,18 +92,74 @@ class TechNode:
         return node
     
     def set_recommendations(self, recommendations: Dict):
-        """Establece las recomendaciones para este nodo terminal"""
-        self.recommendations = recommendations
+        """Establece las recomendaciones para este nodo terminal (se guardan internadas, ver payload_store.py)"""
+        self.recommendations = intern_payload(recommendations)
 
 
 class DecisionTree:
     """Árbol de decisión para recomendaciones tecnológicas"""
     
-    def __init__(self):
-        self.root = self._build_tree()
+    def __init__(self, root: Optional[TechNode] = None):
+        """
+        Args:
+            root: Raíz ya construida (p. ej. desde tree_definition.load_definition);
+                  por defecto se construye el árbol incorporado
+        """
+        self.root = root if root is not None else self._build_tree()
+        self.version = BUILTIN_VERSION
+        self.leaves, self.leaf_names = self._index_leaves(self.root)
+        self._compiled = None
+        self._batch_traverser = None
+    
+    def compile(self):
+        """Forma compacta del árbol (ver compiled_tree.CompiledTree), construida una sola vez"""
+        if self._compiled is None:
+            from compiled_tree import CompiledTree
+            self._compiled = CompiledTree(self)
+        return self._compiled
+    
+    def traverse_codes(self, codes) -> Tuple[int, int]:
+        """Recorre el árbol compilado con respuestas ya codificadas (ver CompiledTree.traverse_codes)"""
+        return self.compile().traverse_codes(codes)
+    
+    def batch_traverser(self):
+        """Tablas NumPy para recorridos por lotes (ver batch_traversal.BatchTraverser)"""
+        if self._batch_traverser is None:
+            from batch_traversal import BatchTraverser
+            self._batch_traverser = BatchTraverser(self.compile())
+        return self._batch_traverser
+    
+    def traverse_many(self, answers_batch: List[Dict[str, str]]):
+        """
+        Recorre un lote de respuestas con operaciones vectorizadas (requiere NumPy)
+        
+        Returns:
+            batch_traversal.BatchResult columnar; BatchResult.row(i) equivale a traverse(answers_batch[i])
+        """
+        traverser = self.batch_traverser()
+        return traverser.traverse(traverser.encode(answers_batch))
+    
+    @staticmethod
+    def _index_leaves(root: TechNode) -> Tuple[List[TechNode], List[str]]:
+        """Asigna identificadores estables (orden de construcción) a los nodos terminales"""
+        leaves: List[TechNode] = []
+        names: List[str] = []
+        stack = [(root, [])]
+        
+        while stack:
+            node, conditions = stack.pop()
+            if node.recommendations:
+                node.leaf_id = len(leaves)
+                leaves.append(node)
+                names.append("/".join(conditions))
+            # Invertido para que la pila respete el orden de inserción
+            for condition, child in reversed(list(node.children.items())):
+                stack.append((child, conditions + [condition]))
+        
+        return leaves, names
     
     def _build_tree(self) -> TechNode:
-        """Construye el árbol de decisión completo"""
+        """Construye el árbol de decisión completo (ver tree_definition.py para cargarlo desde datos)"""
         root = TechNode("root", "Inicio del árbol de decisión")
         
         # Nivel 1: Tipo de aplicación
@@ -362,21 +487,26 @@ class DecisionTree:
         Returns:
             Diccionario con las recomendaciones
         """
+        leaf, path = self.resolve(answers)
+        
+        if leaf is not None:
+            return self._format_recommendations(leaf.recommendations, answers, path)
+        
+        # Si no encontramos recomendaciones específicas, usar recomendaciones por defecto
+        return self._get_default_recommendations(answers)
+    
+    def resolve(self, answers: Dict[str, str]) -> Tuple[Optional[TechNode], List[str]]:
+        """
+        Recorre el árbol sin formatear el resultado
+        
+        Returns:
+            Tupla (nodo terminal o None si no hay camino específico, camino de decisión)
+        """
         current = self.root
         path = []
         
-        # Orden de prioridad para recorrer el árbol
-        priority_order = [
-            "app-type",      # Nivel 1: Tipo de aplicación
-            "timeline",      # Nivel 2: Timeline
-            "complexity",    # Nivel 3: Complejidad
-            "scale",         # Nivel 3: Escala
-            "budget",        # Nivel 2: Presupuesto (para mobile)
-            "team-size",     # Nivel 2: Tamaño de equipo (para fullstack)
-        ]
-        
         # Recorrer el árbol según las respuestas
-        for key in priority_order:
+        for key in PRIORITY_ORDER:
             if key not in answers:
                 continue
                 
@@ -388,12 +518,11 @@ class DecisionTree:
             
             # Si llegamos a un nodo con recomendaciones, retornar
             if current.recommendations:
-                return self._format_recommendations(current.recommendations, answers, path)
+                return current, path
         
-        # Si no encontramos recomendaciones específicas, usar recomendaciones por defecto
-        return self._get_default_recommendations(answers)
+        return None, path
     
-    def _format_recommendations(self, recommendations: Dict, answers: Dict, path: List[str]) -> Dict:
+    def _format_recommendations(self, recommendations: Payload, answers: Dict, path: List[str]) -> Dict:
         """Formatea las recomendaciones con información adicional"""
         
         # Generar resumen
@@ -404,12 +533,13 @@ class DecisionTree:
         
         return {
             "summary": summary,
-            "technologies": recommendations,
+            "technologies": recommendations.to_dict(),
             "considerations": considerations,
             "decision_path": " → ".join(path)
         }
     
-    def _generate_summary(self, answers: Dict) -> str:
+    @staticmethod
+    def _generate_summary(answers: Dict) -> str:
         """Genera un resumen basado en las respuestas"""
         app_type = answers.get("app-type", "aplicación")
         scale = answers.get("scale", "")
@@ -440,9 +570,15 @@ class DecisionTree:
         
         return f"Basado en tus respuestas, recomendamos un stack para {', '.join(parts)}. Las tecnologías seleccionadas equilibran rendimiento, productividad y mantenibilidad."
     
-    def _generate_considerations(self, answers: Dict) -> List[str]:
+    @staticmethod
+    def _generate_considerations(answers: Dict) -> List[str]:
         """Genera consideraciones basadas en las respuestas"""
-        considerations = []
+        return DecisionTree._considerations_from_mask(DecisionTree._considerations_mask(answers))
+    
+    @staticmethod
+    def _considerations_mask(answers: Dict) -> int:
+        """Calcula la máscara de grupos de consideraciones (ver CONSIDERATION_GROUPS)"""
+        mask = 0
         
         audience = answers.get("audience")
         scale = answers.get("scale")
@@ -451,30 +587,32 @@ class DecisionTree:
         app_type = answers.get("app-type")
         
         if audience == "public":
-            considerations.append("Implementa medidas de seguridad robustas (rate limiting, validación de inputs, HTTPS)")
-            considerations.append("Considera SEO y accesibilidad desde el inicio")
+            mask |= CONSIDER_PUBLIC
         
         if audience == "internal":
-            considerations.append("Integra con sistemas de autenticación corporativos (SSO, LDAP)")
+            mask |= CONSIDER_INTERNAL
         
         if scale in ["large", "xlarge"]:
-            considerations.append("Planifica estrategia de caching y CDN desde el inicio")
-            considerations.append("Implementa monitoreo y observabilidad comprehensivos")
-            considerations.append("Considera arquitectura multi-región para latencia global")
+            mask |= CONSIDER_SCALE
         
         if complexity in ["complex", "very-complex"]:
-            considerations.append("Documenta arquitectura y decisiones técnicas detalladamente")
-            considerations.append("Implementa testing comprehensivo (unit, integration, e2e)")
-            considerations.append("Establece prácticas de code review y CI/CD desde el inicio")
+            mask |= CONSIDER_COMPLEXITY
         
         if team_size == "large":
-            considerations.append("Define convenciones de código y guías de estilo claras")
-            considerations.append("Implementa monorepo si tienes múltiples proyectos relacionados")
+            mask |= CONSIDER_TEAM
         
         if app_type == "mobile":
-            considerations.append("Planifica estrategia de actualizaciones y versionado de app")
-            considerations.append("Considera offline-first architecture para mejor UX")
+            mask |= CONSIDER_MOBILE
         
+        return mask
+    
+    @staticmethod
+    def _considerations_from_mask(mask: int) -> List[str]:
+        """Expande una máscara de consideraciones a la lista de textos"""
+        considerations = []
+        for bit, group in enumerate(CONSIDERATION_GROUPS):
+            if mask & (1 << bit):
+                considerations.extend(group)
         return considerations
     
     def _get_default_recommendations(self, answers: Dict) -> Dict:
@@ -508,35 +646,53 @@ class DecisionTree:
         }
 
 
-def main():
-    """Función principal que procesa las respuestas y retorna recomendaciones"""
+def _parse_answers(answers_list: List[Dict]) -> Dict[str, str]:
+    """Convierte la lista de respuestas [{questionId, value}] en un diccionario"""
+    return {answer["questionId"]: answer["value"] for answer in answers_list}
+
+
+def _error_response(error: Exception) -> Dict:
+    """Respuesta de error con la misma forma que una recomendación"""
+    return {
+        "error": str(error),
+        "summary": "Error al procesar las recomendaciones",
+        "technologies": {},
+        "considerations": []
+    }
+
+
+def _one_shot():
+    """
+    Una consulta con las opciones por defecto, sin argparse, instrumentación ni el
+    paquete json (ver json_lite.py)
+    """
+    from json_lite import dumps_indented, loads
+
     try:
-        # Leer respuestas desde stdin (JSON)
-        input_data = sys.stdin.read()
-        answers_list = json.loads(input_data)
-        
-        # Convertir lista de respuestas a diccionario
-        answers = {answer["questionId"]: answer["value"] for answer in answers_list}
-        
-        # Crear árbol de decisión
-        tree = DecisionTree()
-        
-        # Obtener recomendaciones
-        recommendations = tree.traverse(answers)
-        
-        # Retornar como JSON
-        print(json.dumps(recommendations, ensure_ascii=False, indent=2))
-        
+        answers = _parse_answers(loads(sys.stdin.read()))
+        recommendations = DecisionTree().traverse(answers)
+        print(dumps_indented(recommendations))
     except Exception as e:
-        error_response = {
-            "error": str(e),
-            "summary": "Error al procesar las recomendaciones",
-            "technologies": {},
-            "considerations": []
-        }
-        print(json.dumps(error_response, ensure_ascii=False, indent=2))
+        print(dumps_indented(_error_response(e)))
         sys.exit(1)
 
 
+def main(argv: Optional[List[str]] = None):
+    """Función principal que procesa las respuestas y retorna recomendaciones"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        # Una consulta por proceso: cada llamada paga el arranque completo
+        _one_shot()
+        return
+
+    # Modos con opciones (ver cli.py): viven fuera de este archivo porque el script
+    # principal se compila en cada ejecución y los demás módulos usan su .pyc
+    from cli import main as cli_main
+    cli_main(argv)
+
+
 if __name__ == "__main__":
+    # Los módulos auxiliares importan "decision_tree": compartir esta misma instancia
+    sys.modules.setdefault("decision_tree", sys.modules[__name__])
     main()
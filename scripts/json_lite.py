@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+JSON de la consulta única sin importar el paquete json
+import json carga re y, con él, enum: unos 15 ms, más que leer, recorrer y escribir
+la consulta. Aquí se usan directamente el escáner y el codificador de cadenas en C
+de _json, los mismos que usa json por dentro. Todo lo que no sea el caso simple
+(documento inválido, números especiales, tipos que no son dict/list/str) se delega
+en json, así que la salida y los mensajes de error no cambian.
+"""
+
+import _json
+
+# Espacios que json acepta alrededor del documento
+WHITESPACE = " \t\n\r"
+
+
+class _Context:
+    """Opciones que _json.make_scanner lee de un JSONDecoder por defecto"""
+    strict = True
+    object_hook = None
+    object_pairs_hook = None
+    parse_float = float
+    parse_int = int
+    parse_constant = {"-Infinity": float("-inf"), "Infinity": float("inf"), "NaN": float("nan")}.__getitem__
+    memo: dict = {}
+
+
+_scan = _json.make_scanner(_Context())
+_encode_string = _json.encode_basestring
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def loads(text: str):
+    """Equivale a json.loads(text)"""
+    try:
+        value, end = _scan(text, len(text) - len(text.lstrip(WHITESPACE)))
+        if not text[end:].strip(WHITESPACE):
+            return value
+    except Exception:
+        pass
+    import json
+    return json.loads(text)
+
+
+def dumps_indented(obj) -> str:
+    """Equivale a json.dumps(obj, ensure_ascii=False, indent=2)"""
+    parts = []
+    try:
+        _encode(obj, "\n", parts)
+    except _Unsupported:
+        import json
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+    return "".join(parts)
+
+
+def _encode(obj, newline: str, parts: list):
+    kind = type(obj)
+    if kind is str:
+        parts.append(_encode_string(obj))
+        return
+    if kind is not dict and kind is not list:
+        raise _Unsupported
+    if not obj:
+        parts.append("{}" if kind is dict else "[]")
+        return
+
+    inner = newline + "  "
+    separator = inner
+    if kind is dict:
+        parts.append("{")
+        for key, value in obj.items():
+            if type(key) is not str:
+                raise _Unsupported
+            parts.append(separator)
+            parts.append(_encode_string(key))
+            parts.append(": ")
+            _encode(value, inner, parts)
+            separator = "," + inner
+        parts.append(newline + "}")
+    else:
+        parts.append("[")
+        for value in obj:
+            parts.append(separator)
+            _encode(value, inner, parts)
+            separator = "," + inner
+        parts.append(newline + "]")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Instrumentación por etapas
+Contadores e histogramas de latencia en proceso, exportables en formato de texto
+de Prometheus o JSON. Los ganchos se instalan envolviendo los métodos solo cuando
+se llama a enable(); sin instrumentación el código original queda intacto.
+"""
+
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from decision_tree import DecisionTree
+
+
+# Límites superiores de los buckets, en segundos
+BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos"""
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class Metrics:
+    """Registro de contadores e histogramas de un proceso"""
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Labels], int] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    def inc(self, name: str, labels: Labels = (), amount: int = 1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, labels: Labels, seconds: float):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Mide un bloque como etapa de decision_tree_stage_seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("decision_tree_stage_seconds", (("stage", name),), time.perf_counter() - start)
+
+    def record_result(self, leaf: str, decision_path: str, seconds: float):
+        """Cuenta un resultado y su latencia por hoja y por camino de decisión"""
+        self.inc("decision_tree_results_total", (("leaf", leaf),))
+        self.inc("decision_tree_decision_path_total", (("decision_path", decision_path),))
+        if leaf == "default":
+            self.inc("decision_tree_default_fallback_total")
+        self.observe("decision_tree_leaf_seconds", (("leaf", leaf),), seconds)
+        self.observe("decision_tree_decision_path_seconds", (("decision_path", decision_path),), seconds)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (counter, labels), value in sorted(self.counters.items()):
+                if counter == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for name in sorted({name for name, _ in self.histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (histogram_name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                if histogram_name != name:
+                    continue
+                cumulative = histogram.cumulative()
+                for bound, count in zip(BUCKETS + (float("inf"),), cumulative):
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ],
+            "histograms": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "buckets": dict(zip([repr(b) for b in BUCKETS] + ["+Inf"], histogram.cumulative())),
+                }
+                for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0])
+            ],
+        }, ensure_ascii=False, indent=2)
+
+    def dump(self, path: str):
+        """Escribe las métricas en path (JSON si termina en .json, Prometheus si no)"""
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+_active: Optional[Metrics] = None
+_originals: Dict[Tuple[type, str], object] = {}
+_path_leaves: Dict[str, str] = {}
+
+
+def _leaf_from_path(decision_path: str) -> str:
+    """Nombre de hoja ("web/fast/simple") a partir del texto del camino de decisión"""
+    leaf = _path_leaves.get(decision_path)
+    if leaf is None:
+        if decision_path == "default":
+            leaf = "default"
+        else:
+            leaf = "/".join(step.split("=", 1)[1] for step in decision_path.split(" → "))
+        _path_leaves[decision_path] = leaf
+    return leaf
+
+
+def _wrap(cls: type, name: str, make_wrapper):
+    original = getattr(cls, name)
+    _originals[(cls, name)] = original
+    setattr(cls, name, make_wrapper(original))
+
+
+def enable(metrics: Optional[Metrics] = None) -> Metrics:
+    """
+    Instala los ganchos de instrumentación en DecisionTree y ResponseCache
+
+    Returns:
+        El registro activo (reutiliza el existente si ya estaba habilitado)
+    """
+    global _active
+    if _active is not None:
+        return _active
+    _active = metrics or Metrics()
+    active = _active
+    perf_counter = time.perf_counter
+
+    def traverse_wrapper(original):
+        def traverse(self, answers):
+            start = perf_counter()
+            result = original(self, answers)
+            elapsed = perf_counter() - start
+            active.observe("decision_tree_stage_seconds", (("stage", "traverse"),), elapsed)
+            decision_path = result["decision_path"]
+            active.record_result(_leaf_from_path(decision_path), decision_path, elapsed)
+            return result
+        return traverse
+
+    def format_wrapper(original):
+        def _format_recommendations(self, recommendations, answers, path):
+            start = perf_counter()
+            result = original(self, recommendations, answers, path)
+            active.observe("decision_tree_stage_seconds", (("stage", "format"),), perf_counter() - start)
+            return result
+        return _format_recommendations
+
+    def get_wrapper(original):
+        def get(self, answers, key=None):
+            start = perf_counter()
+            # La clave se calcula aquí y se pasa a get(): etiqueta esta misma petición
+            if key is None:
+                key = self.key(answers)
+            misses = self.misses
+            payload = original(self, answers, key)
+            elapsed = perf_counter() - start
+            active.observe("decision_tree_stage_seconds", (("stage", "respond"),), elapsed)
+            active.inc("decision_tree_response_cache_total", (("result", "miss" if self.misses != misses else "hit"),))
+
+            leaf_name, decision_path = self.compiled.labels(*key[:2])
+            active.record_result(leaf_name, decision_path, elapsed)
+            return payload
+        return get
+
+    from response_cache import ResponseCache
+
+    _wrap(DecisionTree, "traverse", traverse_wrapper)
+    _wrap(DecisionTree, "_format_recommendations", format_wrapper)
+    _wrap(ResponseCache, "get", get_wrapper)
+    return active
+
+
+def disable():
+    """Restaura los métodos originales"""
+    global _active
+    for (cls, name), original in _originals.items():
+        setattr(cls, name, original)
+    _originals.clear()
+    _active = None
+
+
+def current() -> Optional[Metrics]:
+    """Registro habilitado, o None si la instrumentación está apagada"""
+    return _active
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Recomendaciones internadas
+Las hojas repiten los mismos textos ("GitHub", "PostgreSQL", "Vercel"...) y cada una
+guardaba sus propias listas y diccionarios. Aquí cada texto recibe un id en una tabla
+compartida por todo el proceso, las listas son tuplas de ids deduplicadas y cada
+conjunto de recomendaciones es un Payload inmutable, también deduplicado: dos árboles
+(o dos hojas) con las mismas recomendaciones comparten el mismo objeto.
+
+Los diccionarios del contrato JSON solo se construyen en el borde de salida
+(Payload.to_dict) o ni siquiera eso: Payload.json arma los bytes directamente a partir
+de los fragmentos JSON de cada id.
+
+La tabla no retiene a los payloads: los guarda con referencias débiles y cuenta cuántos
+payloads vivos usan cada texto y cada tupla. Cuando un árbol se descarta (expulsión del
+registro de variantes, recarga) y nadie más usa sus payloads, sus textos y tuplas se
+liberan en la siguiente operación de la tabla y los ids quedan para reutilizar.
+
+Uso (informe de memoria):
+    python payload_store.py
+    python payload_store.py --definition arbol.json --definition arbol-en.json
+"""
+
+from __future__ import annotations
+
+import sys
+# threading.Lock es _thread.allocate_lock y weakref.ref es _weakref.ref; importar threading
+# o weakref alarga el arranque de decision_tree.py
+from _thread import allocate_lock
+from _weakref import ref
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Tuple
+
+    # (categoría, ids principales, id de razonamiento, ids alternativos)
+    Entry = Tuple[int, Tuple[int, ...], int, Tuple[int, ...]]
+
+
+class Payload:
+    """Recomendaciones de una hoja como ids internados; inmutable y compartido"""
+    __slots__ = ("store", "entries", "_json", "__weakref__")
+
+    def __init__(self, store: "PayloadStore", entries: Tuple[Entry, ...]):
+        self.store = store
+        self.entries = entries
+        self._json = None
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    def __reduce__(self):
+        # Las instantáneas (tree_definition) vuelven a internar en la tabla del proceso que las lee
+        return intern_payload, (self.to_dict(),)
+
+    def to_dict(self) -> Dict:
+        """Diccionario nuevo con el formato {categoría: {primary, reasoning, alternatives}}"""
+        strings = self.store.strings
+        return {
+            strings[category]: {
+                "primary": [strings[i] for i in primary],
+                "reasoning": strings[reasoning],
+                "alternatives": [strings[i] for i in alternatives],
+            }
+            for category, primary, reasoning, alternatives in self.entries
+        }
+
+    @property
+    def json(self) -> bytes:
+        """Bytes JSON compactos (UTF-8) equivalentes a to_dict(), armados una sola vez"""
+        if self._json is None:
+            fragment = self.store.fragment
+            parts = []
+            for category, primary, reasoning, alternatives in self.entries:
+                parts.append(
+                    b"%s:{\"primary\":[%s],\"reasoning\":%s,\"alternatives\":[%s]}" % (
+                        fragment(category),
+                        b",".join(fragment(i) for i in primary),
+                        fragment(reasoning),
+                        b",".join(fragment(i) for i in alternatives),
+                    )
+                )
+            self._json = b"{" + b",".join(parts) + b"}"
+        return self._json
+
+
+class PayloadStore:
+    """
+    Tabla de textos internados, tuplas compartidas y payloads deduplicados
+
+    strings[i] es None si el id i quedó libre; los payloads vivos nunca usan ids libres.
+    """
+
+    def __init__(self):
+        self.strings: List[Optional[str]] = []
+        self.ids: Dict[str, int] = {}
+        self._refs: List[int] = []
+        self._free: List[int] = []
+        self._fragments: List[Optional[bytes]] = []
+        self._tuples: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+        self._tuple_refs: Dict[Tuple[int, ...], int] = {}
+        self._payloads: Dict[Tuple[Entry, ...], ref] = {}
+        # Entradas de payloads ya destruidos; el callback de la referencia débil solo
+        # agrega aquí (puede ejecutarse en cualquier punto, incluso con el lock tomado)
+        self._released: List[Tuple[Entry, ...]] = []
+        self._lock = allocate_lock()
+
+    def intern(self, text: str) -> int:
+        string_id = self.ids.get(text)
+        if string_id is None:
+            text = sys.intern(text)
+            if self._free:
+                string_id = self._free.pop()
+                self.strings[string_id] = text
+            else:
+                string_id = len(self.strings)
+                self.strings.append(text)
+                self._refs.append(0)
+            self.ids[text] = string_id
+        return string_id
+
+    def fragment(self, string_id: int) -> bytes:
+        """Texto ya codificado como cadena JSON (se codifica al pedirlo por primera vez)"""
+        fragments = self._fragments
+        if string_id < len(fragments):
+            fragment = fragments[string_id]
+            if fragment is not None:
+                return fragment
+        # La consulta única nunca llega aquí: así no importa json
+        from json import dumps
+        with self._lock:
+            fragments.extend([None] * (len(self.strings) - len(fragments)))
+            fragment = fragments[string_id] = dumps(self.strings[string_id], ensure_ascii=False).encode("utf-8")
+        return fragment
+
+    def _ids(self, texts) -> Tuple[int, ...]:
+        ids = tuple(self.intern(text) for text in texts)
+        return self._tuples.setdefault(ids, ids)
+
+    def payload(self, recommendations: Dict) -> Payload:
+        """Payload compartido para un diccionario de recomendaciones"""
+        if isinstance(recommendations, Payload):
+            return recommendations
+        with self._lock:
+            self._collect()
+            entries = tuple(
+                (
+                    self.intern(category),
+                    self._ids(entry["primary"]),
+                    self.intern(entry["reasoning"]),
+                    self._ids(entry["alternatives"]),
+                )
+                for category, entry in recommendations.items()
+            )
+            current = self._payloads.get(entries)
+            payload = current() if current is not None else None
+            if payload is None:
+                payload = Payload(self, entries)
+                self._payloads[entries] = ref(payload, lambda _, entries=entries: self._released.append(entries))
+                self._count(entries, 1)
+            return payload
+
+    def collect(self):
+        """Libera ya los textos y tuplas de los payloads destruidos"""
+        with self._lock:
+            self._collect()
+
+    def stats(self) -> Dict[str, int]:
+        """Textos, tuplas y payloads vivos en la tabla"""
+        with self._lock:
+            self._collect()
+            return {
+                "strings": len(self.ids),
+                "tuples": len(self._tuples),
+                "payloads": len(self._payloads),
+            }
+
+    def _collect(self):
+        released = self._released
+        while released:
+            entries = released.pop()
+            current = self._payloads.get(entries)
+            # Si ya hay otro payload vivo con las mismas entradas, su referencia se conserva
+            if current is not None and current() is None:
+                del self._payloads[entries]
+            self._count(entries, -1)
+
+    def _count(self, entries: Tuple[Entry, ...], delta: int):
+        """Suma delta a los usos de cada texto y tupla de entries; libera los que quedan sin uso"""
+        refs = self._refs
+        tuple_refs = self._tuple_refs
+        for category, primary, reasoning, alternatives in entries:
+            for string_id in (category, reasoning) + primary + alternatives:
+                refs[string_id] += delta
+                if not refs[string_id]:
+                    del self.ids[self.strings[string_id]]
+                    self.strings[string_id] = None
+                    if string_id < len(self._fragments):
+                        self._fragments[string_id] = None
+                    self._free.append(string_id)
+            for ids in (primary, alternatives):
+                count = tuple_refs[ids] = tuple_refs.get(ids, 0) + delta
+                if not count:
+                    del tuple_refs[ids]
+                    del self._tuples[ids]
+
+
+# Tabla única del proceso: todos los árboles y variantes la comparten
+STORE = PayloadStore()
+
+
+def intern_payload(recommendations: Dict) -> Payload:
+    return STORE.payload(recommendations)
+
+
+def deep_size(obj, seen=None) -> int:
+    """Bytes de obj y de todo lo que referencia, contando cada objeto una sola vez"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif isinstance(obj, Payload):
+        size += deep_size(obj.entries, seen)
+    return size
+
+
+def memory_report(tree, seen=None) -> Dict[str, int]:
+    """
+    Bytes de las recomendaciones de un árbol con diccionarios propios por hoja
+    (como los deja json.load) frente a los payloads internados
+
+    "after" incluye solo la parte de la tabla compartida que usa este árbol; con un
+    conjunto seen compartido entre llamadas cuenta solo lo que no usaban los árboles anteriores.
+    """
+    import json
+
+    payloads = [leaf.recommendations for leaf in tree.leaves]
+    before = deep_size(json.loads(json.dumps([payload.to_dict() for payload in payloads])))
+
+    if seen is None:
+        seen = set()
+    return {"leaves": len(payloads), "before": before, "after": payloads_size(payloads, seen)}
+
+
+def payloads_size(payloads, seen) -> int:
+    """Bytes de los payloads y de los textos internados que usan"""
+    size = sum(deep_size(payload, seen) for payload in payloads)
+    strings = STORE.strings
+    used = {
+        string_id
+        for payload in payloads
+        for category, primary, reasoning, alternatives in payload.entries
+        for string_id in (category, reasoning) + primary + alternatives
+    }
+    return size + sum(deep_size(strings[string_id], seen) for string_id in used)
+
+
+def main():
+    import argparse
+
+    from decision_tree import DecisionTree
+
+    parser = argparse.ArgumentParser(description="Informe de memoria de las recomendaciones internadas")
+    parser.add_argument(
+        "--definition",
+        action="append",
+        default=[],
+        help="Archivo de definición del árbol (repetible; por defecto, el árbol incorporado)"
+    )
+    args = parser.parse_args()
+
+    if args.definition:
+        from tree_definition import load_definition
+        trees = [(path, load_definition(path, use_snapshot=False)[0]) for path in args.definition]
+    else:
+        trees = [("builtin", DecisionTree())]
+
+    seen = set()
+    for name, tree in trees:
+        report = memory_report(tree)
+        shared = memory_report(tree, seen)["after"]
+        print(
+            f"{name}: {report['leaves']} hojas, {report['before']} bytes con diccionarios, "
+            f"{report['after']} bytes internados ({shared} bytes nuevos respecto de los árboles anteriores)"
+        )
+    stats = STORE.stats()
+    print(f"Tabla compartida: {stats['strings']} textos, {stats['tuples']} tuplas, {stats['payloads']} payloads")
+
+
+if __name__ == "__main__":
+    # decision_tree importa "payload_store": compartir esta misma instancia y su tabla
+    sys.modules.setdefault("payload_store", sys.modules[__name__])
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Reproducción de tráfico capturado
+Envía una captura de traffic_capture.py contra un servidor local (decision_tree.py
+--serve) a una tasa fija (lazo abierto) o con una concurrencia fija (lazo cerrado) y
+mide throughput, latencias p50/p95/p99/p999 y tasa de errores. Dos reportes se pueden
+comparar para validar un cambio antes de desplegarlo.
+
+En modo --rate la latencia se mide desde el instante en que la petición debía salir,
+no desde que salió: si el servidor se atrasa, la espera cuenta como latencia. Una
+petición sin respuesta completa tras --timeout segundos cuenta como error ("timeout").
+
+Uso:
+    python replay.py captura.ndjson --concurrency 32 --duration 30 -o base.json
+    python replay.py captura.ndjson --rate 2000 --duration 30 -o nuevo.json
+    python replay.py --compare base.json nuevo.json
+"""
+
+import asyncio
+import json
+import math
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+PERCENTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("p999", 0.999))
+
+
+def load_corpus(path: str, host: str, target: str) -> List[bytes]:
+    """Peticiones HTTP ya serializadas, una por línea de la captura"""
+    requests = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            body = json.dumps(entry["answers"], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            variant = entry.get("variant")
+            requests.append(
+                b"POST %s HTTP/1.1\r\n"
+                b"Host: %s\r\n"
+                b"Content-Type: application/json\r\n"
+                b"Content-Length: %d\r\n"
+                b"%s\r\n%s" % (
+                    target.encode("ascii"),
+                    host.encode("ascii"),
+                    len(body),
+                    b"X-Tree-Variant: %s\r\n" % variant.encode("utf-8") if variant else b"",
+                    body,
+                )
+            )
+    if not requests:
+        raise ValueError(f"{path}: la captura está vacía")
+    return requests
+
+
+class Connection:
+    """Conexión keep-alive con una petición en vuelo a la vez"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> "Connection":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, raw: bytes) -> Tuple[int, bool]:
+        """Envía una petición y lee la respuesta completa; retorna (estado, conexión reutilizable)"""
+        self.writer.write(raw)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+        status = int(status_line.split(" ", 2)[1])
+
+        length = 0
+        keep_alive = True
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection":
+                keep_alive = value.strip().lower() != "close"
+        if length and status != 304:
+            await self.reader.readexactly(length)
+        return status, keep_alive
+
+    def close(self):
+        self.writer.close()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors = 0
+
+    def observe(self, status: Optional[int], latency: float, error: str = "exception"):
+        self.latencies.append(latency)
+        if status is None:
+            self.statuses[error] += 1
+            self.errors += 1
+        else:
+            self.statuses[str(status)] += 1
+            if status >= 400:
+                self.errors += 1
+
+
+class _Pool:
+    """Conexiones libres reutilizables, hasta limit abiertas a la vez"""
+
+    def __init__(self, host: str, port: int, limit: int):
+        self.host = host
+        self.port = port
+        self.idle: List[Connection] = []
+        self.open = 0
+        self.available = asyncio.Semaphore(limit)
+
+    async def send(self, raw: bytes) -> int:
+        async with self.available:
+            connection = self.idle.pop() if self.idle else None
+            if connection is None:
+                connection = await Connection.open(self.host, self.port)
+                self.open += 1
+            try:
+                status, keep_alive = await connection.request(raw)
+            except BaseException:
+                connection.close()
+                self.open -= 1
+                raise
+            if keep_alive:
+                self.idle.append(connection)
+            else:
+                connection.close()
+                self.open -= 1
+            return status
+
+    def close(self):
+        for connection in self.idle:
+            connection.close()
+        self.idle.clear()
+
+
+async def _timed(pool: _Pool, raw: bytes, start: float, recorder: Recorder, timeout: float):
+    error = "exception"
+    try:
+        if timeout > 0:
+            status = await asyncio.wait_for(pool.send(raw), timeout)
+        else:
+            status = await pool.send(raw)
+    except asyncio.TimeoutError:
+        # Antes que OSError: desde Python 3.11 TimeoutError es subclase de OSError
+        status, error = None, "timeout"
+    except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+        status = None
+    recorder.observe(status, time.perf_counter() - start, error)
+
+
+async def run_closed(
+    pool: _Pool, corpus: List[bytes], concurrency: int, duration: float, total: int, timeout: float = 0.0
+) -> Recorder:
+    """Lazo cerrado: concurrency clientes, cada uno envía la siguiente petición al recibir la respuesta"""
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+    sent = 0
+
+    async def client():
+        nonlocal sent
+        while time.perf_counter() < deadline and (not total or sent < total):
+            raw = corpus[sent % len(corpus)]
+            sent += 1
+            await _timed(pool, raw, time.perf_counter(), recorder, timeout)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return recorder
+
+
+async def run_open(
+    pool: _Pool, corpus: List[bytes], rate: float, duration: float, total: int, timeout: float = 0.0
+) -> Recorder:
+    """Lazo abierto: una petición cada 1/rate segundos, independientemente de las respuestas"""
+    recorder = Recorder()
+    count = int(rate * duration)
+    if total:
+        count = min(count, total)
+    begin = time.perf_counter()
+    tasks = []
+
+    for index in range(count):
+        intended = begin + index / rate
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(_timed(pool, corpus[index % len(corpus)], intended, recorder, timeout)))
+        if len(tasks) >= 4096:
+            tasks = [task for task in tasks if not task.done()]
+
+    await asyncio.gather(*tasks)
+    return recorder
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def summarize(recorder: Recorder, elapsed: float, settings: Dict) -> Dict:
+    latencies = sorted(recorder.latencies)
+    requests = len(latencies)
+    report = {
+        "settings": settings,
+        "requests": requests,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1) if elapsed > 0 else 0.0,
+        "errors": recorder.errors,
+        "error_rate": round(recorder.errors / requests, 6) if requests else 0.0,
+        "statuses": dict(recorder.statuses),
+        "latency_ms": {
+            name: round(percentile(latencies, fraction) * 1e3, 3) for name, fraction in PERCENTILES
+        },
+    }
+    report["latency_ms"]["mean"] = round(sum(latencies) / requests * 1e3, 3) if requests else 0.0
+    report["latency_ms"]["max"] = round(latencies[-1] * 1e3, 3) if requests else 0.0
+    return report
+
+
+def replay(
+    corpus_path: str,
+    url: str,
+    concurrency: int = 16,
+    rate: float = 0.0,
+    duration: float = 10.0,
+    total: int = 0,
+    max_connections: int = 256,
+    timeout: float = 10.0,
+) -> Dict:
+    """Ejecuta una reproducción completa y retorna el reporte (timeout <= 0: sin límite por petición)"""
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    corpus = load_corpus(corpus_path, parts.netloc, target)
+    settings = {
+        "corpus": corpus_path,
+        "corpus_size": len(corpus),
+        "url": url,
+        "mode": "rate" if rate else "concurrency",
+        "rate": rate,
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "requests_limit": total,
+        "timeout_s": timeout,
+    }
+
+    async def main() -> Tuple[Recorder, float]:
+        pool = _Pool(host, port, max_connections if rate else concurrency)
+        start = time.perf_counter()
+        try:
+            if rate:
+                recorder = await run_open(pool, corpus, rate, duration, total, timeout)
+            else:
+                recorder = await run_closed(pool, corpus, concurrency, duration, total, timeout)
+        finally:
+            pool.close()
+        return recorder, time.perf_counter() - start
+
+    recorder, elapsed = asyncio.run(main())
+    return summarize(recorder, elapsed, settings)
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """
+    Regresiones del reporte actual respecto de la línea base
+
+    Latencias p50/p99 o throughput que empeoran más de threshold (fracción), o una
+    tasa de errores mayor.
+    """
+    regressions = []
+    for name in ("p50", "p99"):
+        before, after = baseline["latency_ms"][name], current["latency_ms"][name]
+        if before > 0 and after / before - 1 > threshold:
+            regressions.append(f"latencia {name}: {after / before - 1:+.1%} ({before:.3f} ms -> {after:.3f} ms)")
+
+    before, after = baseline["throughput_rps"], current["throughput_rps"]
+    if before > 0 and 1 - after / before > threshold:
+        regressions.append(f"throughput: {after / before - 1:+.1%} ({before:.0f} -> {after:.0f} req/s)")
+
+    before, after = baseline["error_rate"], current["error_rate"]
+    if after > before:
+        regressions.append(f"tasa de errores: {before:.4%} -> {after:.4%}")
+    return regressions
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    rows = [("requests", "requests"), ("throughput req/s", "throughput_rps"), ("error_rate", "error_rate")]
+    rows += [(f"{name} ms", name) for name, _ in PERCENTILES] + [("max ms", "max")]
+
+    def value(data: Dict, key: str) -> float:
+        return data["latency_ms"][key] if key in data["latency_ms"] else data[key]
+
+    if baseline is None:
+        for label, key in rows:
+            print(f"{label:<20}{value(report, key):>14}")
+        return
+
+    print(f"{'':<20}{'base':>14}{'actual':>14}{'cambio':>10}")
+    for label, key in rows:
+        before, after = value(baseline, key), value(report, key)
+        change = f"{after / before - 1:+.1%}" if before else ""
+        print(f"{label:<20}{before:>14}{after:>14}{change:>10}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reproduce una captura de tráfico contra un servidor local")
+    parser.add_argument("corpus", nargs="?", help="Captura NDJSON (ver traffic_capture.py)")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/recommendations", help="Endpoint de destino")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes simultáneos (modo lazo cerrado)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Peticiones por segundo (modo lazo abierto)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Duración en segundos")
+    parser.add_argument("--requests", type=int, default=0, help="Máximo de peticiones (0 = sin límite)")
+    parser.add_argument("--max-connections", type=int, default=256, help="Conexiones abiertas como máximo con --rate")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Segundos por petición antes de contarla como error (0 = sin límite)")
+    parser.add_argument("-o", "--output", help="Guardar el reporte en este archivo JSON")
+    parser.add_argument("--baseline", help="Comparar contra un reporte previo (código de salida 1 si hay regresiones)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "ACTUAL"), help="Comparar dos reportes sin ejecutar")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Empeoramiento tolerado (fracción)")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            report = json.load(f)
+    else:
+        if not args.corpus:
+            parser.error("indicar una captura o --compare")
+        report = replay(
+            args.corpus,
+            args.url,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            duration=args.duration,
+            total=args.requests,
+            max_connections=args.max_connections,
+            timeout=args.timeout,
+        )
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+
+    print_report(report, baseline)
+    if baseline is not None:
+        regressions = compare(baseline, report, args.threshold)
+        for line in regressions:
+            print(f"REGRESIÓN {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
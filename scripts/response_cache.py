@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Caché de respuestas serializadas
+Solo existen unos cientos de salidas distintas (hoja x camino x variante de resumen x
+consideraciones), así que cada una se guarda como bytes JSON UTF-8 listos para enviar.
+Las tecnologías se copian de los bytes ya armados del payload internado, sin
+construir diccionarios.
+
+Cada salida lleva un hash de contenido ("result_hash", también usado como ETag por
+el servidor) calculado una sola vez al crear la entrada: depende del payload de la
+hoja, las consideraciones, el resumen, el camino y la versión del árbol.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from decision_tree import DEFAULT_LEAF, DecisionTree
+from payload_store import Payload
+
+
+# Tipos de aplicación con resumen propio (ver DecisionTree._generate_summary)
+SUMMARY_APP_TYPES = ("web", "mobile", "api", "desktop", "fullstack")
+
+
+def encode_response(result: Dict) -> bytes:
+    """Serialización compacta usada por los modos de servicio"""
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_parts(summary: str, payload, considerations, decision_path: str) -> bytes:
+    """Mismos bytes que encode_response, con las tecnologías tomadas de Payload.json"""
+    dumps = json.dumps
+    return b"".join((
+        b'{"summary":', dumps(summary, ensure_ascii=False).encode("utf-8"),
+        b',"technologies":', payload.json,
+        b',"considerations":', dumps(considerations, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        b',"decision_path":', dumps(decision_path, ensure_ascii=False).encode("utf-8"),
+        b"}",
+    ))
+
+
+class Response(bytes):
+    """
+    Bytes JSON de una salida con su hash de contenido en etag
+
+    Las de ResponseCache llevan además la hoja (o DEFAULT_LEAF) y el payload internado
+    de sus tecnologías (ver batch_response.py)
+    """
+    etag: str
+    leaf: int
+    payload: Payload
+
+
+def with_result_hash(body: bytes, version: str) -> Response:
+    """Agrega "result_hash" al final del objeto JSON y retorna los bytes con su etag"""
+    digest = hashlib.sha256(version.encode("utf-8") + b"\0" + body).hexdigest()[:20]
+    response = Response(b'%s,"result_hash":"%s"}' % (body[:-1], digest.encode("ascii")))
+    response.etag = digest
+    return response
+
+
+def summary_variant(answers: Dict[str, str]) -> Tuple:
+    """Entradas que determinan el texto de DecisionTree._generate_summary"""
+    app_type = answers.get("app-type")
+    scale = answers.get("scale")
+    return (
+        app_type if app_type in SUMMARY_APP_TYPES else None,
+        1 if scale in ("large", "xlarge") else 2 if scale == "small" else 0,
+        answers.get("timeline") == "fast",
+        answers.get("budget") in ("minimal", "low"),
+    )
+
+
+class ResponseCache:
+    """
+    Caché LRU de respuestas ya serializadas
+
+    La clave se calcula con el árbol compilado sin construir diccionarios de resultado;
+    solo un fallo de caché formatea y codifica la respuesta. No es seguro entre hilos:
+    cada proceso o bucle de eventos usa su propia instancia.
+    """
+
+    def __init__(self, tree: DecisionTree, max_entries: int = 1024):
+        self.tree = tree
+        self.compiled = tree.compile()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Response]" = OrderedDict()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes de las respuestas serializadas en caché"""
+        return self._nbytes
+
+    def shrink(self, max_bytes: int):
+        """Descarta las entradas menos usadas hasta ocupar como máximo max_bytes"""
+        entries = self._entries
+        while entries and self._nbytes > max_bytes:
+            self._nbytes -= len(entries.popitem(last=False)[1])
+
+    def key(self, answers: Dict[str, str]) -> Tuple:
+        """Clave de la salida: (hoja, claves que descendieron, variante de resumen, consideraciones)"""
+        compiled = self.compiled
+        leaf, matched = compiled.traverse_codes(compiled.encode(answers))
+        mask = DecisionTree._considerations_mask(answers)
+
+        # El camino y el resumen por defecto no dependen de las respuestas
+        if leaf == DEFAULT_LEAF:
+            return leaf, 0, None, mask
+        return leaf, matched, summary_variant(answers), mask
+
+    def get(self, answers: Dict[str, str], key: Optional[Tuple] = None) -> Response:
+        """
+        Bytes JSON de la recomendación para estas respuestas, con result_hash y etag
+
+        Args:
+            key: self.key(answers) si quien llama ya la calculó
+        """
+        if key is None:
+            key = self.key(answers)
+        entries = self._entries
+        payload: Optional[Response] = entries.get(key)
+
+        if payload is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return payload
+
+        self.misses += 1
+        return self._add(answers, key)
+
+    def _add(self, answers: Dict[str, str], key: Tuple) -> Response:
+        """Construye y guarda la salida de una clave que no está en caché"""
+        entries = self._entries
+        summary, technologies, considerations, decision_path = self.compiled.resolve(answers)
+        payload = with_result_hash(encode_parts(summary, technologies, considerations, decision_path), self.tree.version)
+        payload.leaf = key[0]
+        payload.payload = technologies
+        entries[key] = payload
+        self._nbytes += len(payload)
+        if len(entries) > self.max_entries:
+            self._nbytes -= len(entries.popitem(last=False)[1])
+        return payload
+
+    def prewarm(self) -> int:
+        """
+        Construye todas las salidas (y sus hashes) del espacio de respuestas de lib/questions.ts
+
+        No pasa por get(): no cuenta aciertos ni fallos ni queda en las métricas como tráfico.
+
+        Returns:
+            Número de entradas en caché tras el precalentamiento
+        """
+        from answer_space import iter_answer_space
+
+        for answers in iter_answer_space():
+            key = self.key(answers)
+            if key not in self._entries:
+                self._add(answers, key)
+        return len(self._entries)
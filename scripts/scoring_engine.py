@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Motor de puntuación ponderada
+Alternativa al recorrido todo-o-nada: cada hoja tiene un vector de pesos sobre
+todos los pares pregunta/valor y un conjunto de respuestas se puntúa contra todas
+las hojas con un único producto matriz-vector (o matriz-matriz para lotes).
+
+Los pesos se derivan del propio árbol: para cada hoja, el log-cociente entre la
+frecuencia de cada valor en las combinaciones que llegan a esa hoja y su
+frecuencia en todo el espacio de respuestas (suavizado de Laplace). Así las
+combinaciones que el árbol no contempla caen en la hoja más parecida en lugar
+de en las recomendaciones por defecto. Se pueden sumar ajustes manuales por hoja.
+
+NumPy es una dependencia opcional: solo este módulo la necesita.
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+from answer_space import QUESTIONS, iter_answer_space
+from decision_tree import DEFAULT_LEAF, DecisionTree
+
+
+# Índice de columna de cada par pregunta/valor
+FEATURES: Dict[Tuple[str, str], int] = {}
+for _question_id, _values in QUESTIONS:
+    for _value in _values:
+        FEATURES[(_question_id, _value)] = len(FEATURES)
+
+SMOOTHING = 1.0
+
+
+class ScoringEngine:
+    """
+    Pesos hoja x característica y puntuación vectorizada
+
+    Args:
+        tree: Árbol del que se derivan las hojas y los pesos
+        overrides: Ajustes aditivos {nombre de hoja: {"pregunta=valor": peso}}
+    """
+
+    def __init__(self, tree: DecisionTree, overrides: Optional[Dict[str, Dict[str, float]]] = None):
+        if np is None:
+            raise ImportError("El motor de puntuación requiere NumPy (pip install numpy)")
+
+        self.tree = tree
+        self.compiled = tree.compile()
+        self.leaf_names = list(tree.leaf_names)
+        leaf_count = len(self.leaf_names)
+
+        counts = np.zeros((leaf_count, len(FEATURES)), dtype=np.float64)
+        totals = np.zeros(len(FEATURES), dtype=np.float64)
+        for answers in iter_answer_space():
+            columns = [FEATURES[pair] for pair in answers.items()]
+            totals[columns] += 1
+            leaf, _ = self.compiled.traverse_codes(self.compiled.encode(answers))
+            if leaf != DEFAULT_LEAF:
+                counts[leaf, columns] += 1
+
+        # P(valor | hoja) / P(valor), ambos dentro de la misma pregunta
+        weights = np.zeros_like(counts)
+        for question_id, values in QUESTIONS:
+            columns = [FEATURES[(question_id, value)] for value in values]
+            leaf_freq = (counts[:, columns] + SMOOTHING) / (
+                counts[:, columns].sum(axis=1, keepdims=True) + SMOOTHING * len(values)
+            )
+            space_freq = totals[columns] / totals[columns].sum()
+            weights[:, columns] = np.log(leaf_freq / space_freq)
+
+        for leaf_name, adjustments in (overrides or {}).items():
+            if leaf_name not in self.leaf_names:
+                raise ValueError(f"Hoja desconocida en los ajustes: {leaf_name}")
+            row = self.leaf_names.index(leaf_name)
+            for feature, weight in adjustments.items():
+                question_id, _, value = feature.partition("=")
+                if (question_id, value) not in FEATURES:
+                    raise ValueError(f"Característica desconocida en los ajustes: {feature}")
+                weights[row, FEATURES[(question_id, value)]] += weight
+
+        self.weights = weights
+
+    @classmethod
+    def from_file(cls, tree: DecisionTree, path: str) -> "ScoringEngine":
+        with open(path, encoding="utf-8") as f:
+            return cls(tree, json.load(f))
+
+    def encode(self, answers: Dict[str, str]):
+        """Vector one-hot de las respuestas; valores desconocidos no aportan"""
+        vector = np.zeros(len(FEATURES), dtype=np.float64)
+        for pair in answers.items():
+            column = FEATURES.get(pair)
+            if column is not None:
+                vector[column] = 1.0
+        return vector
+
+    def encode_many(self, answers_batch: Iterable[Dict[str, str]]):
+        rows = [self.encode(answers) for answers in answers_batch]
+        if not rows:
+            return np.zeros((0, len(FEATURES)), dtype=np.float64)
+        return np.vstack(rows)
+
+    def scores(self, answers: Dict[str, str]):
+        """Puntuación de todas las hojas: un producto matriz-vector"""
+        return self.weights @ self.encode(answers)
+
+    def top_k(self, answers: Dict[str, str], k: int = 3) -> List[Tuple[int, float]]:
+        """Las k hojas mejor puntuadas como (hoja, puntuación), de mayor a menor"""
+        _check_k(k)
+        scores = self.scores(answers)
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(leaf), float(scores[leaf])) for leaf in best]
+
+    def top_k_many(self, matrix, k: int = 3):
+        """
+        Puntuación por lotes: un producto matriz-matriz
+
+        Args:
+            matrix: Matriz filas x características (ver encode_many)
+
+        Returns:
+            Tupla (hojas, puntuaciones), ambas de forma filas x k, de mayor a menor
+        """
+        _check_k(k)
+        scores = matrix @ self.weights.T
+        k = min(k, scores.shape[1])
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def recommend(self, answers: Dict[str, str], k: int = 3) -> Dict:
+        """
+        Resultado con la forma de DecisionTree.traverse para la hoja mejor puntuada,
+        más "ranking" con las k mejores
+        """
+        ranking = self.top_k(answers, k)
+        leaf = ranking[0][0]
+        return {
+            "summary": DecisionTree._generate_summary(answers),
+            "technologies": self.compiled.payloads[leaf].to_dict(),
+            "considerations": DecisionTree._generate_considerations(answers),
+            "decision_path": f"scoring={self.leaf_names[leaf]}",
+            "ranking": [
+                {"leaf": self.leaf_names[leaf_id], "score": round(score, 4)}
+                for leaf_id, score in ranking
+            ]
+        }
+
+
+def _check_k(k: int):
+    if k < 1:
+        raise ValueError(f"k debe ser al menos 1 (recibido {k})")
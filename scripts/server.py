@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP/1.1 de recomendaciones (solo biblioteca estándar)
+Expone el mismo contrato que app/api/recommendations: POST con un arreglo de
+{questionId, value} y respuesta JSON con summary, technologies, considerations
+y decision_path. Un solo bucle de eventos comparte un árbol y su caché.
+
+Cada recomendación lleva ETag (el result_hash de response_cache.py) y una petición con
+If-None-Match que coincide recibe 304 sin cuerpo. GET acepta las respuestas en la
+query (?app-type=web&timeline=fast) para que un CDN pueda guardarlas.
+
+POST /api/recommendations/batch resuelve muchos conjuntos de respuestas en una sola
+petición (contrato en batch_response.py; ?format=columns para la forma columnar).
+
+Con variantes (ver tree_registry.py) la petición elige el árbol con la cabecera
+X-Tree-Variant o el parámetro ?variant=, con el formato "locale/tenant/version".
+Una variante que aún no está cargada se construye en un hilo del executor mientras
+el bucle sigue atendiendo otras peticiones.
+"""
+
+import asyncio
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs
+
+import metrics
+from batch_response import encode_batch, parse_batch
+from decision_tree import _parse_answers
+from tree_registry import UnknownVariant, VariantNotLoaded
+
+
+RECOMMENDATIONS_PATH = "/api/recommendations"
+BATCH_PATH = "/api/recommendations/batch"
+HEALTH_PATH = "/healthz"
+METRICS_PATH = "/metrics"
+METRICS_JSON_PATH = "/metrics.json"
+
+# Misma respuesta de error que app/api/recommendations/route.ts
+ERROR_BODY = json.dumps({
+    "error": "Error al generar recomendaciones",
+    "summary": "Ocurrió un error al procesar tu solicitud",
+    "technologies": {},
+    "considerations": []
+}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    411: "Length Required",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+}
+
+
+class HTTPError(Exception):
+    """Error de protocolo que se responde (con el mensaje en el cuerpo) y cierra la conexión"""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def error_body(message: str) -> bytes:
+    """Cuerpo JSON {"error": mensaje} de las respuestas de error propias del servidor"""
+    return json.dumps({"error": message}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RecommendationServer:
+    """
+    Servidor asyncio con keep-alive y pipelining
+
+    Las peticiones de una conexión se atienden en orden: la siguiente petición
+    en el buffer se lee cuando la respuesta anterior ya fue escrita.
+    """
+
+    def __init__(
+        self,
+        respond: Callable[[Dict[str, str]], bytes],
+        max_body: int = 64 * 1024,
+        max_header: int = 16 * 1024,
+        max_batch_body: int = 8 * 1024 * 1024,
+        keepalive_timeout: float = 15.0,
+        variants: bool = False,
+        read_timeout: float = 10.0,
+    ):
+        """
+        Args:
+            variants: respond acepta (respuestas, variante) como TreeRegistry.respond
+            max_batch_body: Límite del cuerpo en BATCH_PATH (max_body vale para el resto)
+            keepalive_timeout: Segundos de espera del primer byte de la siguiente petición
+            read_timeout: Segundos para recibir el resto de la cabecera y, aparte, el cuerpo;
+                          un cliente más lento recibe 408 y se cierra la conexión
+        """
+        self.respond = respond
+        self.variants = variants
+        self.max_body = max_body
+        self.max_batch_body = max_batch_body
+        self.max_header = max_header
+        self.keepalive_timeout = keepalive_timeout
+        self.read_timeout = read_timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._idle: Set[asyncio.StreamWriter] = set()
+        self._busy: Set[asyncio.StreamWriter] = set()
+        self._closing = False
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000, sock=None):
+        """Abre el socket de escucha (o usa uno ya abierto)"""
+        if sock is not None:
+            self._server = await asyncio.start_server(self._handle, sock=sock, limit=self.max_header)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port, limit=self.max_header)
+        return self._server
+
+    async def shutdown(self, grace: float = 10.0):
+        """
+        Cierre ordenado: deja de aceptar conexiones, cierra las inactivas y
+        espera hasta grace segundos a que terminen las peticiones en curso
+        """
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+
+        for writer in list(self._idle):
+            writer.close()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + grace
+        while self._busy and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+
+        for writer in list(self._busy):
+            writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._idle.add(writer)
+        try:
+            loop = asyncio.get_running_loop()
+            while not self._closing:
+                # Conexión inactiva hasta el primer byte; desde ahí corre read_timeout
+                try:
+                    first = await asyncio.wait_for(reader.readexactly(1), self.keepalive_timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                # Un temporizador en lugar de wait_for: no crea una tarea por lectura
+                timer = loop.call_later(self.read_timeout, self._read_timed_out, writer)
+                try:
+                    head = first + await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    timer.cancel()
+                    break
+                except (asyncio.LimitOverrunError, ValueError):
+                    timer.cancel()
+                    await self._send(writer, 431, error_body("Cabecera demasiado grande"), keep_alive=False)
+                    break
+
+                self._idle.discard(writer)
+                self._busy.add(writer)
+                try:
+                    keep_alive = await self._serve_request(head, reader, writer, timer)
+                except HTTPError as e:
+                    await self._send(writer, e.status, error_body(str(e)), keep_alive=False)
+                    keep_alive = False
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    keep_alive = False
+                finally:
+                    timer.cancel()
+                    self._busy.discard(writer)
+
+                if not keep_alive:
+                    break
+                self._idle.add(writer)
+        finally:
+            self._idle.discard(writer)
+            self._busy.discard(writer)
+            writer.close()
+
+    def _read_timed_out(self, writer: asyncio.StreamWriter):
+        """La petición no terminó de llegar en read_timeout: 408 y cierre (la lectura pendiente ve EOF)"""
+        body = error_body("Tiempo agotado esperando la petición")
+        writer.write(self._response_head(408, body, keep_alive=False) + body)
+        writer.close()
+
+    async def _serve_request(
+        self,
+        head: bytes,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        timer: asyncio.TimerHandle,
+    ) -> bool:
+        """Atiende una petición; retorna si la conexión sigue abierta (timer vence si el cuerpo no llega)"""
+        try:
+            request_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ")
+        except ValueError:
+            raise HTTPError(400, "Línea de petición inválida")
+
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+        keep_alive = keep_alive and not self._closing
+
+        if "transfer-encoding" in headers:
+            raise HTTPError(501, "Transfer-Encoding no soportado")
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "Content-Length inválido")
+        if length < 0:
+            raise HTTPError(400, "Content-Length inválido")
+        path, _, query = target.partition("?")
+        if length > (self.max_batch_body if path == BATCH_PATH else self.max_body):
+            raise HTTPError(413, "Cuerpo demasiado grande")
+
+        body = await reader.readexactly(length) if length else b""
+        timer.cancel()
+
+        if path == HEALTH_PATH and method in ("GET", "HEAD"):
+            await self._send(writer, 200, b'{"status":"ok"}', keep_alive, head_only=method == "HEAD")
+        elif path in (METRICS_PATH, METRICS_JSON_PATH) and method == "GET" and metrics.current() is not None:
+            # Con pre-fork cada worker expone solo sus propias métricas
+            registry = metrics.current()
+            if path == METRICS_JSON_PATH:
+                await self._send(writer, 200, registry.to_json().encode("utf-8"), keep_alive)
+            else:
+                await self._send(
+                    writer, 200, registry.to_prometheus().encode("utf-8"), keep_alive,
+                    content_type=b"text/plain; version=0.0.4; charset=utf-8"
+                )
+        elif path == BATCH_PATH:
+            if method != "POST":
+                await self._send(writer, 405, b'{"error":"Method Not Allowed"}', keep_alive, extra=b"Allow: POST\r\n")
+            elif "content-length" not in headers:
+                raise HTTPError(411, "Falta Content-Length")
+            else:
+                status, payload = await self._call(self._respond_batch, body, parse_qs(query), headers)
+                await self._send(writer, status, payload, keep_alive)
+        elif path != RECOMMENDATIONS_PATH:
+            await self._send(writer, 404, b'{"error":"Not Found"}', keep_alive)
+        elif method not in ("POST", "GET"):
+            await self._send(writer, 405, b'{"error":"Method Not Allowed"}', keep_alive, extra=b"Allow: GET, POST\r\n")
+        elif method == "POST" and "content-length" not in headers:
+            raise HTTPError(411, "Falta Content-Length")
+        else:
+            params = parse_qs(query)
+            try:
+                if method == "GET":
+                    # Respuestas en la query (?app-type=web&timeline=fast): cacheable por un CDN
+                    answers = {key: values[0] for key, values in params.items() if key != "variant"}
+                else:
+                    answers = _parse_answers(json.loads(body))
+                if self.variants:
+                    variant = headers.get("x-tree-variant") or params.get("variant", [None])[0]
+                    payload = await self._call(self.respond, answers, variant)
+                else:
+                    payload = self.respond(answers)
+                status = 200
+            except UnknownVariant:
+                payload = b'{"error":"Variante desconocida"}'
+                status = 400
+            except Exception:
+                payload = ERROR_BODY
+                status = 500
+
+            etag = getattr(payload, "etag", None) if status == 200 else None
+            if etag is None:
+                await self._send(writer, status, payload, keep_alive)
+            else:
+                extra = b'ETag: "%s"\r\nCache-Control: no-cache\r\n' % etag.encode("ascii")
+                if self.variants:
+                    extra += b"Vary: X-Tree-Variant\r\n"
+                if _etag_matches(headers.get("if-none-match"), etag):
+                    # Content-Length del cuerpo que se habría enviado, sin enviarlo
+                    await self._send(writer, 304, payload, keep_alive, head_only=True, extra=extra)
+                else:
+                    await self._send(writer, 200, payload, keep_alive, extra=extra)
+
+        return keep_alive
+
+    def _respond_batch(self, body: bytes, params: Dict[str, List[str]], headers: Dict[str, str]) -> Tuple[int, bytes]:
+        """Estado y cuerpo de una petición por lotes (ver batch_response.py)"""
+        try:
+            answer_sets, columnar = parse_batch(json.loads(body), params.get("format", [None])[0])
+        except ValueError as e:
+            return 400, error_body(str(e))
+
+        respond = self.respond
+        if self.variants:
+            variant = headers.get("x-tree-variant") or params.get("variant", [None])[0]
+            respond = lambda answers: self.respond(answers, variant)
+        try:
+            return 200, encode_batch(respond, answer_sets, columnar)
+        except UnknownVariant:
+            return 400, b'{"error":"Variante desconocida"}'
+        except VariantNotLoaded:
+            raise
+        except Exception:
+            return 500, ERROR_BODY
+
+    async def _call(self, function: Callable, *args):
+        """function(*args); si falta cargar una variante, la construye en el executor y repite"""
+        while True:
+            try:
+                return function(*args)
+            except VariantNotLoaded as e:
+                await asyncio.get_running_loop().run_in_executor(None, e.load)
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        keep_alive: bool,
+        head_only: bool = False,
+        extra: bytes = b"",
+        content_type: bytes = b"application/json; charset=utf-8",
+    ):
+        head = self._response_head(status, body, keep_alive, extra, content_type)
+        # Una sola escritura: cabecera y cuerpo salen en el mismo segmento
+        writer.write(head if head_only else head + body)
+        await writer.drain()
+
+    @staticmethod
+    def _response_head(
+        status: int,
+        body: bytes,
+        keep_alive: bool,
+        extra: bytes = b"",
+        content_type: bytes = b"application/json; charset=utf-8",
+    ) -> bytes:
+        return (
+            b"HTTP/1.1 %d %s\r\n"
+            b"Content-Type: %s\r\n"
+            b"Content-Length: %d\r\n"
+            b"Connection: %s\r\n"
+            b"%s\r\n" % (
+                status,
+                REASONS[status].encode("ascii"),
+                content_type,
+                len(body),
+                b"keep-alive" if keep_alive else b"close",
+                extra,
+            )
+        )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara la cabecera If-None-Match (lista, comodín o etiquetas débiles) con el etag"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"') == etag:
+            return True
+    return False
+
+
+async def serve(
+    respond: Callable[[Dict[str, str]], bytes],
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    sock=None,
+    max_body: int = 64 * 1024,
+    grace: float = 10.0,
+    variants: bool = False,
+    max_batch_body: int = 8 * 1024 * 1024,
+    read_timeout: float = 10.0,
+):
+    """Atiende peticiones hasta recibir SIGINT/SIGTERM y luego cierra de forma ordenada"""
+    server = RecommendationServer(
+        respond, max_body=max_body, variants=variants, max_batch_body=max_batch_body, read_timeout=read_timeout
+    )
+    listener = await server.start(host, port, sock=sock)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    addresses = ", ".join(str(s.getsockname()) for s in listener.sockets)
+    print(f"Escuchando en {addresses}", file=sys.stderr)
+
+    await stop.wait()
+    await server.shutdown(grace)
+
+
+def _listen(host: str, port: int, backlog: int = 1024) -> socket.socket:
+    """Socket de escucha compartido por todos los workers"""
+    # proto explícito: asyncio solo activa TCP_NODELAY en sockets con proto IPPROTO_TCP, y sin
+    # él la cabecera y el cuerpo de cada respuesta esperan el ACK retardado del cliente (~40 ms)
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+def _spawn_worker(
+    respond: Callable[[Dict[str, str]], bytes],
+    sock: socket.socket,
+    max_body: int,
+    grace: float,
+    variants: bool,
+    max_batch_body: int,
+    read_timeout: float,
+) -> int:
+    """Crea un worker con fork; el hijo hereda respond y el socket sin reconstruirlos"""
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # Proceso hijo: las señales de supervisión son solo del padre
+    status = 0
+    try:
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        asyncio.run(serve(
+            respond, sock=sock, max_body=max_body, grace=grace, variants=variants,
+            max_batch_body=max_batch_body, read_timeout=read_timeout
+        ))
+    except BaseException:
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def prefork(
+    factory: Callable[[], Callable[[Dict[str, str]], bytes]],
+    workers: int,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    max_body: int = 64 * 1024,
+    grace: float = 10.0,
+    variants: bool = False,
+    max_batch_body: int = 8 * 1024 * 1024,
+    read_timeout: float = 10.0,
+):
+    """
+    Servidor pre-fork supervisado
+
+    El padre construye el estado de solo lectura (factory) y abre el socket una vez;
+    los workers lo heredan por fork y comparten sus páginas copy-on-write.
+
+    - Un worker que termina inesperadamente se reemplaza
+    - SIGHUP reconstruye el estado en el padre y reinicia los workers de a uno
+    - SIGINT/SIGTERM detienen a todos los workers de forma ordenada
+    """
+    sock = _listen(host, port)
+    respond = factory()
+    # Sacar el estado construido del recolector para no ensuciar páginas compartidas
+    gc.freeze()
+
+    pending = []
+    signal.signal(signal.SIGHUP, lambda signum, frame: pending.append("reload"))
+    signal.signal(signal.SIGTERM, lambda signum, frame: pending.append("stop"))
+    signal.signal(signal.SIGINT, lambda signum, frame: pending.append("stop"))
+
+    children = {_spawn_worker(respond, sock, max_body, grace, variants, max_batch_body, read_timeout) for _ in range(workers)}
+    print(f"{workers} workers escuchando en {sock.getsockname()}", file=sys.stderr)
+
+    def reap(block: bool) -> Optional[int]:
+        try:
+            pid, _ = os.waitpid(-1, 0 if block else os.WNOHANG)
+        except ChildProcessError:
+            return None
+        return pid or None
+
+    last_respawn = 0.0
+    while True:
+        if "stop" in pending:
+            break
+
+        if "reload" in pending:
+            pending.clear()
+            gc.unfreeze()
+            try:
+                respond = factory()
+            except Exception as e:
+                # Una definición rota no debe tumbar al supervisor: se sigue con el estado anterior
+                print(f"Recarga fallida, se mantienen los workers actuales: {e}", file=sys.stderr)
+                continue
+            finally:
+                gc.freeze()
+            print("Reinicio escalonado de workers", file=sys.stderr)
+            for old in list(children):
+                children.add(_spawn_worker(respond, sock, max_body, grace, variants, max_batch_body, read_timeout))
+                children.discard(old)
+                os.kill(old, signal.SIGTERM)
+                try:
+                    os.waitpid(old, 0)
+                except ChildProcessError:
+                    pass
+            continue
+
+        pid = reap(block=False)
+        if pid is None:
+            time.sleep(0.2)
+            continue
+
+        if pid in children:
+            children.discard(pid)
+            # Evitar un bucle de reinicios si los workers mueren al arrancar
+            if time.monotonic() - last_respawn < 1.0:
+                time.sleep(1.0)
+            last_respawn = time.monotonic()
+            print(f"Worker {pid} terminó; se reemplaza", file=sys.stderr)
+            children.add(_spawn_worker(respond, sock, max_body, grace, variants, max_batch_body, read_timeout))
+
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    while reap(block=True) is not None:
+        pass
+    sock.close()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Análisis exhaustivo del espacio de respuestas
+Recorre todas las combinaciones de lib/questions.ts con DecisionTree.resolve (el
+mismo recorrido que traverse, sin formatear), repartidas en rangos de códigos entre
+procesos; cada proceso genera sus combinaciones a partir del código, así que la
+memoria no depende del tamaño del espacio. Reporta:
+
+- combinaciones por hoja y por camino de decisión
+- cuántas caen en las recomendaciones por defecto
+- hojas inalcanzables con PRIORITY_ORDER
+- preguntas que el recorrido nunca consulta, y qué cambian (consideraciones, resumen)
+
+Con una captura de tráfico (traffic_capture.py) pondera las hojas y caminos por
+uso real y sugiere cuáles precalentar.
+
+Uso:
+    python space_analyzer.py
+    python space_analyzer.py --traffic captura.ndjson --json reporte.json
+    python space_analyzer.py --definition arbol.json --workers 8
+"""
+
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from answer_space import QUESTIONS, SPACE_SIZE, decode_key
+from decision_tree import DEFAULT_LEAF, DecisionTree, _parse_answers
+from response_cache import summary_variant
+
+
+# Fracción del tráfico que deben cubrir las hojas sugeridas para precalentar
+PREWARM_COVERAGE = 0.9
+
+# Estado de cada proceso del pool
+_worker = {}
+
+
+def _init_worker(definition: Optional[str]):
+    if definition:
+        from tree_definition import load_definition
+        tree, _ = load_definition(definition, use_snapshot=False)
+    else:
+        tree = DecisionTree()
+    _worker["tree"] = tree
+
+
+def _outcome(tree: DecisionTree, answers: Dict[str, str]) -> Tuple[int, List[str]]:
+    leaf, path = tree.resolve(answers)
+    return (leaf.leaf_id if leaf is not None else DEFAULT_LEAF), path
+
+
+def _analyze_shard(start: int, stop: int) -> Dict:
+    """Cuenta hojas, caminos y preguntas consultadas para los códigos [start, stop)"""
+    tree = _worker["tree"]
+    leaves: Counter = Counter()
+    paths: Counter = Counter()
+    consulted: Counter = Counter()
+    # Qué aspectos del resultado cambian al variar cada pregunta
+    affects: Dict[str, set] = {question_id: set() for question_id, _ in QUESTIONS}
+
+    for key in range(start, stop):
+        answers = decode_key(key)
+        leaf, path = _outcome(tree, answers)
+        leaves[leaf] += 1
+        paths[" → ".join(path) if leaf != DEFAULT_LEAF else "default"] += 1
+        for step in path:
+            consulted[step.split("=", 1)[0]] += 1
+
+        mask = DecisionTree._considerations_mask(answers)
+        summary = summary_variant(answers)
+        for question_id, values in QUESTIONS:
+            # Basta comparar contra el primer valor: cualquier diferencia aparece en algún par
+            if answers[question_id] == values[0] or len(affects[question_id]) == 3:
+                continue
+            changed = {**answers, question_id: values[0]}
+            if _outcome(tree, changed)[0] != leaf:
+                affects[question_id].add("leaf")
+            if DecisionTree._considerations_mask(changed) != mask:
+                affects[question_id].add("considerations")
+            if summary_variant(changed) != summary:
+                affects[question_id].add("summary")
+
+    return {
+        "leaves": dict(leaves),
+        "paths": dict(paths),
+        "consulted": dict(consulted),
+        "affects": {question_id: sorted(aspects) for question_id, aspects in affects.items()},
+    }
+
+
+def _analyze_traffic(lines: List[bytes]) -> Dict:
+    """Cuenta hojas y caminos de un bloque de líneas de captura"""
+    tree = _worker["tree"]
+    leaves: Counter = Counter()
+    paths: Counter = Counter()
+    invalid = 0
+    for line in lines:
+        try:
+            answers = _parse_answers(json.loads(line)["answers"])
+        except (ValueError, KeyError, TypeError):
+            invalid += 1
+            continue
+        leaf, path = _outcome(tree, answers)
+        leaves[leaf] += 1
+        paths[" → ".join(path) if leaf != DEFAULT_LEAF else "default"] += 1
+    return {"leaves": dict(leaves), "paths": dict(paths), "invalid": invalid}
+
+
+def _merge(total: Dict, part: Dict):
+    for field in ("leaves", "paths", "consulted"):
+        if field in part:
+            counter = total.setdefault(field, Counter())
+            counter.update(part[field])
+    if "affects" in part:
+        affects = total.setdefault("affects", {})
+        for question_id, aspects in part["affects"].items():
+            affects.setdefault(question_id, set()).update(aspects)
+    if "invalid" in part:
+        total["invalid"] = total.get("invalid", 0) + part["invalid"]
+
+
+def analyze(
+    definition: Optional[str] = None,
+    workers: Optional[int] = None,
+    shards: Optional[int] = None,
+    traffic: Optional[str] = None,
+    chunk_size: int = 5000,
+) -> Dict:
+    """Ejecuta el análisis y retorna el reporte como diccionario serializable"""
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers * 4
+    bounds = [SPACE_SIZE * index // shards for index in range(shards + 1)]
+
+    tree = DecisionTree()
+    if definition:
+        from tree_definition import load_definition
+        tree, _ = load_definition(definition, use_snapshot=False)
+    leaf_names = {leaf_id: name for leaf_id, name in enumerate(tree.leaf_names)}
+    leaf_names[DEFAULT_LEAF] = "default"
+
+    space: Dict = {}
+    usage: Dict = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(definition,)) as pool:
+        futures = [pool.submit(_analyze_shard, start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+        if traffic:
+            from bulk_score import read_chunks
+            with open(traffic, "rb") as f:
+                traffic_futures = [pool.submit(_analyze_traffic, lines) for lines, _ in read_chunks(f, chunk_size)]
+            for future in traffic_futures:
+                _merge(usage, future.result())
+        for future in futures:
+            _merge(space, future.result())
+
+    leaves = space["leaves"]
+    consulted = space.get("consulted", Counter())
+    report = {
+        "tree_version": tree.version,
+        "combinations": SPACE_SIZE,
+        "leaves": {leaf_names[leaf]: leaves.get(leaf, 0) for leaf in sorted(leaf_names) if leaf != DEFAULT_LEAF},
+        "default": leaves.get(DEFAULT_LEAF, 0),
+        "unreachable_leaves": [name for leaf, name in leaf_names.items() if leaf != DEFAULT_LEAF and not leaves.get(leaf)],
+        "paths": dict(space["paths"].most_common()),
+        "questions": {
+            question_id: {
+                "consulted": consulted.get(question_id, 0),
+                "affects": sorted(space["affects"].get(question_id, ())),
+            }
+            for question_id, _ in QUESTIONS
+        },
+        "never_consulted": [question_id for question_id, _ in QUESTIONS if not consulted.get(question_id)],
+    }
+
+    if traffic:
+        total = sum(usage.get("leaves", {}).values())
+        traffic_leaves = usage.get("leaves", Counter())
+        ranked = [(leaf_names[leaf], count) for leaf, count in traffic_leaves.most_common()]
+        prewarm, covered = [], 0
+        for name, count in ranked:
+            if total and covered / total >= PREWARM_COVERAGE:
+                break
+            prewarm.append(name)
+            covered += count
+        report["traffic"] = {
+            "requests": total,
+            "invalid": usage.get("invalid", 0),
+            "leaves": dict(ranked),
+            "paths": dict(usage.get("paths", Counter()).most_common()),
+            "prewarm": prewarm,
+            "prewarm_coverage": round(covered / total, 4) if total else 0.0,
+        }
+    return report
+
+
+def print_report(report: Dict, top_paths: int = 10):
+    combinations = report["combinations"]
+    traffic = report.get("traffic")
+
+    def share(count: int, total: int) -> str:
+        return f"{count / total:7.2%}" if total else "       "
+
+    print(f"Árbol {report['tree_version']!r}: {combinations} combinaciones\n")
+    print(f"{'hoja':<22}{'combinaciones':>14}{'':>9}" + (f"{'tráfico':>10}{'':>9}" if traffic else ""))
+    rows = list(report["leaves"].items()) + [("default", report["default"])]
+    for name, count in rows:
+        line = f"{name:<22}{count:>14}{share(count, combinations):>9}"
+        if traffic:
+            used = traffic["leaves"].get(name, 0)
+            line += f"{used:>10}{share(used, traffic['requests']):>9}"
+        print(line)
+
+    print(f"\nHojas inalcanzables: {', '.join(report['unreachable_leaves']) or 'ninguna'}")
+    print("\nPreguntas:")
+    for question_id, stats in report["questions"].items():
+        affects = ", ".join(stats["affects"]) or "nada"
+        print(f"  {question_id:<12} consultada en {stats['consulted']:>6} combinaciones; cambia: {affects}")
+    print(f"Nunca consultadas por el recorrido: {', '.join(report['never_consulted']) or 'ninguna'}")
+
+    print(f"\nCaminos más frecuentes (de {len(report['paths'])}):")
+    for path, count in list(report["paths"].items())[:top_paths]:
+        print(f"{count:>8}  {path}")
+
+    if traffic:
+        print(f"\nTráfico: {traffic['requests']} peticiones ({traffic['invalid']} inválidas)")
+        for path, count in list(traffic["paths"].items())[:top_paths]:
+            print(f"{count:>8}  {path}")
+        print(
+            f"Precalentar: {', '.join(traffic['prewarm'])} "
+            f"({traffic['prewarm_coverage']:.1%} del tráfico)"
+        )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Análisis exhaustivo del espacio de respuestas")
+    parser.add_argument("--definition", help="Archivo de definición del árbol (ver tree_definition.py)")
+    parser.add_argument("--workers", type=int, help="Procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--shards", type=int, help="Rangos de códigos (por defecto, 4 por proceso)")
+    parser.add_argument("--traffic", help="Captura NDJSON para ponderar por uso real (ver traffic_capture.py)")
+    parser.add_argument("--top-paths", type=int, default=10, help="Caminos a mostrar")
+    parser.add_argument("--json", metavar="PATH", help="Guardar el reporte completo en JSON")
+    args = parser.parse_args()
+
+    report = analyze(args.definition, args.workers, args.shards, args.traffic)
+    print_report(report, args.top_paths)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
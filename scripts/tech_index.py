@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Índice invertido de tecnologías
+Responde qué combinaciones de respuestas reciben una tecnología recomendada sin
+recorrer el árbol: cada tecnología tiene su lista de apariciones (hoja, categoría,
+rol) y cada hoja el conjunto de bits de las combinaciones que llegan a ella, así
+que una consulta es una unión y una intersección de enteros.
+
+Sintaxis de consulta (términos unidos con AND, sin distinguir mayúsculas):
+    Redis                      la recomienda como principal o como alternativa
+    Kubernetes:primary         solo como principal (primary) o alternativa (alternative)
+    audience=public            filtro por respuesta
+
+Uso:
+    python tech_index.py "Redis AND Kubernetes:primary AND audience=public"
+    python tech_index.py "PostgreSQL:primary" --list 5
+    python tech_index.py --technologies
+"""
+
+import re
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from answer_space import QUESTION_IDS, SPACE_SIZE, answer_space_bitsets, decode_key
+from decision_tree import DEFAULT_LEAF, DecisionTree
+
+
+ROLES = {"primary": "primary", "alternative": "alternatives", "alternatives": "alternatives"}
+
+_AND = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+
+class Posting(NamedTuple):
+    """Aparición de una tecnología en las recomendaciones de una hoja"""
+    leaf: int
+    category: str
+    role: str
+
+
+class QueryResult(NamedTuple):
+    count: int
+    bits: int
+    # Combinaciones por hoja: {nombre de hoja: cantidad}
+    leaves: Dict[str, int]
+
+
+class TechIndex:
+    """Índice tecnología -> hojas y hoja -> combinaciones de un DecisionTree"""
+
+    def __init__(self, tree: DecisionTree):
+        compiled = tree.compile()
+        self.leaf_names: Dict[int, str] = dict(enumerate(compiled.leaf_names))
+        self.leaf_names[DEFAULT_LEAF] = "default"
+
+        payloads = {leaf: payload.to_dict() for leaf, payload in enumerate(compiled.payloads)}
+        payloads[DEFAULT_LEAF] = compiled.default_payload.to_dict()
+
+        self.names: Dict[str, str] = {}
+        self.postings: Dict[str, List[Posting]] = defaultdict(list)
+        for leaf, payload in payloads.items():
+            for category, entry in payload.items():
+                for role in ("primary", "alternatives"):
+                    for technology in entry.get(role, ()):
+                        key = technology.casefold()
+                        self.names.setdefault(key, technology)
+                        self.postings[key].append(Posting(leaf, category, role))
+        self.postings = dict(self.postings)
+
+        self.value_bits, self.leaf_bits = answer_space_bitsets(tree)
+
+    def technologies(self) -> List[Tuple[str, int]]:
+        """Todas las tecnologías con el número de combinaciones que las reciben, de más a menos"""
+        counts = [(self.names[key], bin(self.combinations(key)).count("1")) for key in self.postings]
+        return sorted(counts, key=lambda item: (-item[1], item[0].casefold()))
+
+    def leaves_for(self, technology: str, role: Optional[str] = None, category: Optional[str] = None) -> List[Posting]:
+        """Apariciones de una tecnología, opcionalmente filtradas por rol y categoría"""
+        postings = self.postings.get(technology.casefold())
+        if postings is None:
+            raise KeyError(f"Tecnología desconocida: {technology}")
+        if role is not None:
+            role = ROLES[role]
+        return [
+            posting for posting in postings
+            if (role is None or posting.role == role) and (category is None or posting.category == category)
+        ]
+
+    def combinations(self, technology: str, role: Optional[str] = None, category: Optional[str] = None) -> int:
+        """Conjunto de bits de las combinaciones que reciben la tecnología"""
+        bits = 0
+        for leaf in {posting.leaf for posting in self.leaves_for(technology, role, category)}:
+            bits |= self.leaf_bits.get(leaf, 0)
+        return bits
+
+    def query(self, text: str) -> QueryResult:
+        """Evalúa una consulta como "Redis AND Kubernetes:primary AND audience=public" """
+        bits = (1 << SPACE_SIZE) - 1
+        for term in _AND.split(text.strip()):
+            if "=" in term:
+                question_id, _, value = (part.strip() for part in term.partition("="))
+                pair_bits = self.value_bits.get((question_id, value))
+                if pair_bits is None:
+                    raise ValueError(f"Respuesta desconocida: {question_id}={value}")
+                bits &= pair_bits
+            else:
+                technology, _, role = term.partition(":")
+                technology, role = technology.strip(), role.strip()
+                if role and role.casefold() not in ROLES:
+                    raise ValueError(f"Rol desconocido: {role} (válidos: primary, alternative)")
+                bits &= self.combinations(technology, role.casefold() or None)
+
+        leaves = {}
+        for leaf, leaf_bits in self.leaf_bits.items():
+            count = bin(bits & leaf_bits).count("1")
+            if count:
+                leaves[self.leaf_names[leaf]] = count
+        return QueryResult(bin(bits).count("1"), bits, leaves)
+
+
+def iter_combinations(bits: int):
+    """Respuestas de cada combinación de un conjunto de bits, en orden de código"""
+    while bits:
+        lowest = bits & -bits
+        yield decode_key(lowest.bit_length() - 1)
+        bits ^= lowest
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consultas sobre el índice invertido de tecnologías")
+    parser.add_argument("query", nargs="?", help='Consulta, por ejemplo "Redis AND audience=public"')
+    parser.add_argument("--list", type=int, default=0, metavar="N", help="Mostrar las primeras N combinaciones")
+    parser.add_argument("--technologies", action="store_true", help="Listar todas las tecnologías con su conteo")
+    parser.add_argument("--definition", help="Archivo de definición del árbol (ver tree_definition.py)")
+    args = parser.parse_args()
+    if not args.query and not args.technologies:
+        parser.error("indicar una consulta o --technologies")
+
+    if args.definition:
+        from tree_definition import load_definition
+        tree, _ = load_definition(args.definition)
+    else:
+        tree = DecisionTree()
+    index = TechIndex(tree)
+
+    if args.technologies:
+        for technology, count in index.technologies():
+            print(f"{count:>7}  {technology}")
+        return
+
+    try:
+        result = index.query(args.query)
+    except (KeyError, ValueError) as e:
+        print(e.args[0], file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{result.count} de {SPACE_SIZE} combinaciones")
+    for leaf, count in sorted(result.leaves.items(), key=lambda item: -item[1]):
+        print(f"{count:>7}  {leaf}")
+    for position, answers in enumerate(iter_combinations(result.bits)):
+        if position >= args.list:
+            break
+        print("  " + ", ".join(f"{question_id}={answers[question_id]}" for question_id in QUESTION_IDS))
+
+
+if __name__ == "__main__":
+    main()
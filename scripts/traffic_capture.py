@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Captura de tráfico
+Guarda en NDJSON las respuestas que llegan a main() o a los modos persistentes, con
+muestreo opcional, para reproducirlas luego con replay.py.
+
+Formato: una línea por petición
+    {"ts": 1718000000.123, "answers": [{"questionId": ..., "value": ...}], "variant": "..."}
+
+"variant" solo aparece si la petición eligió una variante (ver tree_registry.py).
+Cada línea se escribe con una sola llamada a write sobre un descriptor en modo
+append, así que varios workers pre-fork pueden compartir el mismo archivo.
+"""
+
+import json
+import os
+import random
+import time
+from typing import Callable, Dict, Optional
+
+from tree_registry import VariantNotLoaded
+
+
+class TrafficCapture:
+    """
+    Escritor de capturas con muestreo
+
+    Args:
+        path: Archivo NDJSON de destino (se agrega al final)
+        sample_rate: Fracción de peticiones guardadas (1.0 = todas)
+    """
+
+    def __init__(self, path: str, sample_rate: float = 1.0):
+        if not 0.0 < sample_rate <= 1.0:
+            raise ValueError("sample_rate debe estar en (0, 1]")
+        self.path = path
+        self.sample_rate = sample_rate
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._random = random.random
+        self.recorded = 0
+
+    def record(self, answers: Dict[str, str], variant: Optional[str] = None):
+        if self.sample_rate < 1.0 and self._random() >= self.sample_rate:
+            return
+        entry = {
+            "ts": round(time.time(), 3),
+            "answers": [{"questionId": question_id, "value": value} for question_id, value in answers.items()],
+        }
+        if variant is not None:
+            entry["variant"] = variant
+        os.write(self._fd, json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        self.recorded += 1
+
+    def wrap(self, respond: Callable) -> Callable:
+        """
+        Responder que registra cada petición atendida por respond
+
+        También se registran las peticiones en las que respond falla, salvo
+        VariantNotLoaded: el servidor la repite cuando la variante termina de cargar y
+        así queda registrada una sola vez.
+        """
+        record = self.record
+
+        def capturing(answers, *variant):
+            try:
+                payload = respond(answers, *variant)
+            except VariantNotLoaded:
+                raise
+            except BaseException:
+                record(answers, *variant)
+                raise
+            record(answers, *variant)
+            return payload
+        return capturing
+
+    def close(self):
+        os.close(self._fd)
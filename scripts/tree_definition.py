@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Definición externa del árbol de decisión
+Carga el árbol y sus recomendaciones desde un archivo JSON, lo valida y guarda
+una instantánea compilada en un directorio de caché privado, con el sha256 del
+contenido del archivo como nombre. Al editar una rama solo esa rama se vuelve a
+validar y construir; el resto se toma de la instantánea anterior del mismo archivo.
+
+Las instantáneas son pickles: solo se leen de un directorio del usuario que nadie
+más puede escribir ($XDG_CACHE_HOME/asistente/tree-snapshots, o ~/.cache/...).
+
+Formato:
+    {
+      "version": "2024-06-01",
+      "tree": {
+        "description": "Inicio del árbol de decisión",
+        "children": {
+          "web": {"description": "Aplicación Web", "children": {...}},
+          ...
+        }
+      }
+    }
+
+Cada nodo tiene "description" y, o bien "children" (condición -> nodo, puede estar
+vacío), o bien "recommendations" (categoría -> {primary, reasoning, alternatives}).
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from decision_tree import DecisionTree, TechNode
+
+
+CATEGORIES = ("frontend", "backend", "infrastructure", "tools")
+SNAPSHOT_FORMAT = 3
+
+
+class DefinitionError(ValueError):
+    """Definición de árbol inválida; el mensaje indica la ruta del nodo"""
+
+
+def export_definition(tree: DecisionTree, version: str = "builtin") -> Dict:
+    """Convierte un DecisionTree construido en código al formato de datos"""
+    def export_node(node: TechNode) -> Dict:
+        data = {"description": node.description}
+        if node.recommendations:
+            data["recommendations"] = node.recommendations.to_dict()
+        else:
+            data["children"] = {condition: export_node(child) for condition, child in node.children.items()}
+        return data
+
+    return {"version": version, "tree": export_node(tree.root)}
+
+
+def _validate_recommendations(recommendations, where: str):
+    if not isinstance(recommendations, dict) or not recommendations:
+        raise DefinitionError(f"{where}: recommendations debe ser un objeto no vacío")
+
+    for category, entry in recommendations.items():
+        at = f"{where}.{category}"
+        if category not in CATEGORIES:
+            raise DefinitionError(f"{at}: categoría desconocida (válidas: {', '.join(CATEGORIES)})")
+        if not isinstance(entry, dict):
+            raise DefinitionError(f"{at}: debe ser un objeto")
+        if not isinstance(entry.get("reasoning"), str):
+            raise DefinitionError(f"{at}.reasoning: debe ser texto")
+        for field in ("primary", "alternatives"):
+            values = entry.get(field)
+            if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+                raise DefinitionError(f"{at}.{field}: debe ser una lista de textos")
+        if not entry["primary"]:
+            raise DefinitionError(f"{at}.primary: no puede estar vacía")
+
+
+def build_node(name: str, data, where: str) -> TechNode:
+    """Valida un nodo de la definición y construye su subárbol de TechNode"""
+    if not isinstance(data, dict):
+        raise DefinitionError(f"{where}: el nodo debe ser un objeto")
+    if not isinstance(data.get("description"), str):
+        raise DefinitionError(f"{where}.description: debe ser texto")
+
+    has_children = "children" in data
+    has_recommendations = "recommendations" in data
+    if has_children == has_recommendations:
+        raise DefinitionError(f"{where}: el nodo necesita 'children' o 'recommendations' (no ambos)")
+
+    node = TechNode(name, data["description"])
+    if has_recommendations:
+        _validate_recommendations(data["recommendations"], f"{where}.recommendations")
+        node.set_recommendations(data["recommendations"])
+        return node
+
+    # Un nodo sin hijos ni recomendaciones es válido: cae en las recomendaciones por defecto
+    children = data["children"]
+    if not isinstance(children, dict):
+        raise DefinitionError(f"{where}.children: debe ser un objeto")
+    for condition, child in children.items():
+        node.add_child(condition, build_node(condition, child, f"{where}.{condition}"))
+    return node
+
+
+def _branch_hash(data) -> str:
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def snapshot_dir() -> Optional[str]:
+    """Directorio privado de instantáneas, o None si no existe uno seguro"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "asistente", "tree-snapshots")
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        stat = os.stat(path)
+    except OSError:
+        return None
+    # pickle ejecuta código al cargar: el directorio debe ser propio y no escribible por otros
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+        return None
+    return path
+
+
+def _read_snapshot(directory: str, digest: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(directory, f"{digest}.pickle"), "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT or snapshot.get("digest") != digest:
+        return None
+    return snapshot
+
+
+def _latest_path(directory: str, path: str) -> str:
+    """Archivo con el digest de la última instantánea escrita para esta ruta de definición"""
+    key = hashlib.sha256(os.path.realpath(path).encode("utf-8")).hexdigest()
+    return os.path.join(directory, f"{key}.latest")
+
+
+def _replace(path: str, data: bytes):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        # La instantánea es solo una caché; un disco lleno o de solo lectura no es un error
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def _previous_snapshot(directory: str, path: str) -> Optional[Dict]:
+    """Última instantánea del mismo archivo (de otro contenido), para reutilizar ramas"""
+    try:
+        with open(_latest_path(directory, path), encoding="ascii") as f:
+            digest = f.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+        return None
+    return _read_snapshot(directory, digest)
+
+
+def _write_snapshot(directory: str, path: str, snapshot: Dict, previous: Optional[Dict]):
+    digest = snapshot["digest"]
+    _replace(os.path.join(directory, f"{digest}.pickle"), pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+    _replace(_latest_path(directory, path), digest.encode("ascii"))
+    # La instantánea anterior de este archivo ya no corresponde a ningún contenido vigente
+    if previous is not None and previous["digest"] != digest:
+        try:
+            os.unlink(os.path.join(directory, f"{previous['digest']}.pickle"))
+        except OSError:
+            pass
+
+
+def load_definition(path: str, use_snapshot: bool = True) -> Tuple[DecisionTree, Dict[str, int]]:
+    """
+    Carga un DecisionTree desde un archivo de definición
+
+    Returns:
+        Tupla (árbol, estadísticas {"reused": ramas tomadas de la instantánea, "built": ramas construidas})
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    directory = snapshot_dir() if use_snapshot else None
+
+    # Contenido ya visto: el árbol completo sale de la instantánea sin leer el JSON
+    snapshot = _read_snapshot(directory, digest) if directory is not None else None
+    if snapshot is not None:
+        tree = DecisionTree(root=snapshot["root"])
+        tree.version = snapshot["version"]
+        return tree, {"reused": len(snapshot["branches"]), "built": 0}
+
+    try:
+        definition = json.loads(data.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise DefinitionError(f"{path}: JSON inválido ({e})")
+
+    if not isinstance(definition, dict) or not isinstance(definition.get("tree"), dict):
+        raise DefinitionError(f"{path}: falta el objeto 'tree'")
+    version = str(definition.get("version", ""))
+    tree_data = definition["tree"]
+    if not isinstance(tree_data.get("description"), str):
+        raise DefinitionError("tree.description: debe ser texto")
+    if not isinstance(tree_data.get("children"), dict) or not tree_data["children"]:
+        raise DefinitionError("tree.children: debe ser un objeto no vacío")
+
+    snapshot = _previous_snapshot(directory, path) if directory is not None else None
+    previous = snapshot["branches"] if snapshot is not None else {}
+    branches: Dict[str, Tuple[str, TechNode]] = {}
+    stats = {"reused": 0, "built": 0}
+    root = TechNode("root", tree_data["description"])
+
+    for condition, branch in tree_data["children"].items():
+        branch_digest = _branch_hash(branch)
+        cached = previous.get(condition)
+        if cached is not None and cached[0] == branch_digest:
+            node = cached[1]
+            stats["reused"] += 1
+        else:
+            node = build_node(condition, branch, f"tree.{condition}")
+            stats["built"] += 1
+        branches[condition] = (branch_digest, node)
+        root.add_child(condition, node)
+
+    tree = DecisionTree(root=root)
+    tree.version = version
+
+    if directory is not None:
+        _write_snapshot(directory, path, {
+            "format": SNAPSHOT_FORMAT,
+            "digest": digest,
+            "version": version,
+            "root": root,
+            "branches": branches,
+        }, snapshot)
+    return tree, stats
+
+
+class ReloadingResponder:
+    """
+    Función respuestas -> bytes que sigue a un archivo de definición
+
+    Un hilo de fondo compara la firma del archivo cada interval segundos; si cambió,
+    construye el árbol y el responder nuevos (caché precalentada incluida) fuera del
+    camino de las peticiones y los reemplaza con una sola asignación. Las peticiones
+    siguen usando el responder anterior mientras tanto. Una definición inválida se
+    reporta y se sigue sirviendo el árbol vigente.
+
+    El hilo arranca con la primera petición de cada proceso: los workers pre-fork
+    (ver server.prefork) heredan el objeto pero no los hilos del padre.
+    """
+
+    def __init__(self, path: str, make_responder: Callable[[DecisionTree], Callable[[Dict[str, str]], bytes]], interval: float = 2.0):
+        self.path = path
+        self.make_responder = make_responder
+        self.interval = interval
+        self._signature = self._stat()
+        tree, _ = load_definition(path)
+        self._respond = make_responder(tree)
+        self._watcher_pid: Optional[int] = None
+        self._stopped = threading.Event()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> bool:
+        """Recarga si el archivo cambió (en el hilo que llama); retorna si se cambió de árbol"""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+
+        self._signature = signature
+        try:
+            tree, stats = load_definition(self.path)
+        except (OSError, DefinitionError) as e:
+            print(f"Definición no recargada: {e}", file=sys.stderr)
+            return False
+
+        self._respond = self.make_responder(tree)
+        print(
+            f"Árbol recargado (versión {tree.version!r}, "
+            f"{stats['built']} ramas reconstruidas, {stats['reused']} reutilizadas)",
+            file=sys.stderr
+        )
+        return True
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Definición no recargada: {e}", file=sys.stderr)
+
+    def close(self):
+        """Detiene el hilo de recarga"""
+        self._stopped.set()
+
+    def __call__(self, answers: Dict[str, str]) -> bytes:
+        if self._watcher_pid != os.getpid():
+            self._watcher_pid = os.getpid()
+            threading.Thread(target=self._watch, name="definition-reload", daemon=True).start()
+        return self._respond(answers)
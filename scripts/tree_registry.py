@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Registro de variantes del árbol
+Carga bajo demanda variantes nombradas del árbol (idioma, cliente, versión) desde un
+directorio de definiciones y mantiene las ya compiladas, con su caché de respuestas,
+en una LRU acotada por cantidad y por bytes (el presupuesto de bytes también se aplica
+cuando crecen las cachés de respuestas). Si varias peticiones piden a la vez una variante
+que aún no está cargada, solo una la construye y las demás la esperan.
+
+En el servidor (defer_builds) respond no construye: lanza VariantNotLoaded y el servidor
+ejecuta VariantNotLoaded.load en un hilo del executor, sin bloquear el bucle de eventos,
+antes de repetir la petición. Las variantes ya cargadas se atienden en el bucle.
+
+Estructura del directorio (formato de tree_definition.py):
+    <dir>/<locale>/<tenant>/<version>.json     p. ej. variants/en/acme/current.json
+
+Clave de variante: "locale/tenant/version"; las partes omitidas se toman de la variante
+por defecto ("en" equivale a "en/default/current"). La variante por defecto sin archivo
+es el árbol incorporado.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from decision_tree import DecisionTree
+from payload_store import deep_size, payloads_size
+from response_cache import ResponseCache
+
+
+class VariantKey(NamedTuple):
+    locale: str
+    tenant: str
+    version: str
+
+    def __str__(self) -> str:
+        return "/".join(self)
+
+
+DEFAULT_VARIANT = VariantKey("es", "default", "current")
+
+
+class UnknownVariant(KeyError):
+    """No existe una definición para la variante pedida"""
+
+    def __str__(self) -> str:
+        return f"Variante desconocida: {self.args[0]}"
+
+
+class VariantNotLoaded(Exception):
+    """La variante pedida aún no está cargada; load() la construye (bloquea)"""
+
+    def __init__(self, key: VariantKey, load: Callable[[], object]):
+        super().__init__(str(key))
+        self.key = key
+        self.load = load
+
+
+def parse_variant(text: Optional[str], default: VariantKey = DEFAULT_VARIANT) -> VariantKey:
+    """Clave a partir de "locale/tenant/version" (las partes vacías u omitidas toman el valor por defecto)"""
+    if not text:
+        return default
+    parts = text.strip().split("/")
+    if len(parts) > 3 or any(part in (".", "..") or "\\" in part for part in parts):
+        raise UnknownVariant(text)
+    parts += [""] * (3 - len(parts))
+    return VariantKey(*(part or fallback for part, fallback in zip(parts, default)))
+
+
+def tree_footprint(tree: DecisionTree) -> int:
+    """Bytes aproximados de los nodos, el árbol compilado y los payloads (con sus textos) de un árbol"""
+    seen = set()
+    size = 0
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        # deep_size no entra en los TechNode: cada nodo se cuenta al visitarlo
+        for part in (node, node.children, node.name, node.description):
+            size += deep_size(part, seen)
+        stack.extend(node.children.values())
+
+    size += payloads_size([leaf.recommendations for leaf in tree.leaves], seen)
+
+    compiled = tree.compile()
+    for part in (compiled.transitions, compiled.node_leaf, compiled.values, compiled.value_codes, compiled.leaf_conditions):
+        size += deep_size(part, seen)
+    return size
+
+
+class Variant:
+    """Árbol cargado de una variante con su caché de respuestas"""
+    __slots__ = ("key", "tree", "cache", "respond", "tree_bytes")
+
+    def __init__(self, key: VariantKey, tree: DecisionTree, cache_size: int):
+        self.key = key
+        self.tree = tree
+        self.cache = ResponseCache(tree, max_entries=cache_size)
+        self.respond = self.cache.get
+        self.tree_bytes = tree_footprint(tree)
+
+    @property
+    def nbytes(self) -> int:
+        """Árbol más respuestas serializadas en caché"""
+        return self.tree_bytes + self.cache.nbytes
+
+
+class _PendingBuild:
+    __slots__ = ("done", "variant", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.variant: Optional[Variant] = None
+        self.error: Optional[BaseException] = None
+
+
+class TreeRegistry:
+    """
+    Variantes compiladas en una LRU acotada
+
+    Args:
+        directory: Directorio de definiciones (None: solo la variante por defecto incorporada)
+        max_variants: Máximo de variantes cargadas a la vez
+        max_bytes: Presupuesto de memoria aproximado (ver Variant.nbytes); 0 = sin límite
+        cache_size: Entradas de la caché de respuestas de cada variante
+        defer_builds: respond lanza VariantNotLoaded en lugar de construir (ver server.py)
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_variants: int = 16,
+        max_bytes: int = 0,
+        cache_size: int = 1024,
+        default: VariantKey = DEFAULT_VARIANT,
+        defer_builds: bool = False,
+    ):
+        self.directory = directory
+        self.max_variants = max_variants
+        self.max_bytes = max_bytes
+        self.cache_size = cache_size
+        self.default = default
+        self.defer_builds = defer_builds
+        self._variants: "OrderedDict[VariantKey, Variant]" = OrderedDict()
+        self._pending: Dict[VariantKey, _PendingBuild] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.evictions = 0
+
+    def definition_path(self, key: VariantKey) -> Optional[str]:
+        if self.directory is None:
+            return None
+        path = os.path.join(self.directory, key.locale, key.tenant, f"{key.version}.json")
+        return path if os.path.isfile(path) else None
+
+    def loaded(self, key: VariantKey) -> Optional[Variant]:
+        """Variante ya cargada, o None (nunca construye)"""
+        with self._lock:
+            variant = self._variants.get(key)
+            if variant is not None:
+                self._variants.move_to_end(key)
+            return variant
+
+    def get(self, key: VariantKey) -> Variant:
+        """Variante cargada; la construye (una sola vez aunque haya peticiones concurrentes) si hace falta"""
+        with self._lock:
+            variant = self._variants.get(key)
+            if variant is not None:
+                self._variants.move_to_end(key)
+                return variant
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _PendingBuild()
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.variant
+
+        try:
+            pending.variant = self._build(key)
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+                if pending.variant is not None:
+                    self._variants[key] = pending.variant
+                    self._evict(keep=key)
+            pending.done.set()
+        return pending.variant
+
+    def _build(self, key: VariantKey) -> Variant:
+        path = self.definition_path(key)
+        if path is not None:
+            from tree_definition import load_definition
+            tree, _ = load_definition(path)
+        elif key == self.default:
+            tree = DecisionTree()
+        else:
+            raise UnknownVariant(str(key))
+
+        self.builds += 1
+        _count("decision_tree_variant_builds_total", key)
+        return Variant(key, tree, self.cache_size)
+
+    def _evict(self, keep: VariantKey):
+        """Descarta las variantes menos usadas hasta cumplir los límites (nunca la recién cargada)"""
+        variants = self._variants
+        while len(variants) > 1:
+            over_count = len(variants) > self.max_variants
+            over_bytes = self.max_bytes and self.nbytes > self.max_bytes
+            if not (over_count or over_bytes):
+                break
+            key = next(iter(variants))
+            if key == keep:
+                variants.move_to_end(key)
+                key = next(iter(variants))
+            del variants[key]
+            self.evictions += 1
+            _count("decision_tree_variant_evictions_total", key)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(variant.nbytes for variant in self._variants.values())
+
+    def respond(self, answers: Dict[str, str], variant: Optional[str] = None) -> bytes:
+        """Bytes JSON de la recomendación con la variante indicada (o la por defecto)"""
+        key = parse_variant(variant, self.default)
+        current = self.loaded(key)
+        if current is None:
+            if self.defer_builds:
+                raise VariantNotLoaded(key, lambda: self.get(key))
+            current = self.get(key)
+
+        cache = current.cache
+        misses = cache.misses
+        payload = current.respond(answers)
+        if self.max_bytes and cache.misses != misses:
+            self._enforce_budget(current)
+        return payload
+
+    def _enforce_budget(self, variant: Variant):
+        """Tras crecer la caché de variant: descarta otras variantes y, si no alcanza, recorta esa caché"""
+        with self._lock:
+            self._evict(keep=variant.key)
+            excess = self.nbytes - self.max_bytes
+        if excess > 0:
+            variant.cache.shrink(max(0, variant.cache.nbytes - excess))
+
+    def stats(self) -> List[Dict]:
+        """Variantes cargadas, de la menos a la más recientemente usada"""
+        with self._lock:
+            variants = list(self._variants.values())
+        return [
+            {
+                "variant": str(variant.key),
+                "version": variant.tree.version,
+                "tree_bytes": variant.tree_bytes,
+                "cache_entries": len(variant.cache),
+                "bytes": variant.nbytes,
+            }
+            for variant in variants
+        ]
+
+
+def _count(name: str, key: VariantKey):
+    import metrics
+    registry = metrics.current()
+    if registry is not None:
+        registry.inc(name, (("variant", str(key)),))
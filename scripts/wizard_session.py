@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Recorrido incremental para el asistente paso a paso
+components/question-step.tsx pregunta de a una; este módulo responde, para un
+conjunto parcial de respuestas, en qué nodo está el recorrido, qué hojas siguen
+siendo alcanzables, si el resultado ya está decidido y qué pregunta conviene
+hacer a continuación.
+
+Cada combinación del espacio de respuestas es un bit; una respuesta es la
+intersección con el conjunto de bits de ese valor, así que agregar una respuesta a
+un estado ya calculado cuesta una operación AND sobre enteros de Python.
+"""
+
+import math
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from answer_space import QUESTIONS, SPACE_SIZE, VALUE_INDEX, answer_space_bitsets
+from decision_tree import DEFAULT_LEAF, PRIORITY_ORDER, DecisionTree, TechNode
+
+
+Prefix = Tuple[Tuple[str, str], ...]
+
+_UNSET = object()
+
+
+class PartialState:
+    """Estado del recorrido para un prefijo de respuestas"""
+    __slots__ = (
+        "_index", "answers", "candidates", "current_node", "reachable_leaves", "determined", "_next_question",
+    )
+
+    def __init__(
+        self,
+        index: "WizardIndex",
+        answers: Dict[str, str],
+        candidates: int,
+        current_node: TechNode,
+        reachable_leaves: FrozenSet[int],
+    ):
+        self._index = index
+        self.answers = answers
+        # Conjunto de bits de las combinaciones compatibles con las respuestas
+        self.candidates = candidates
+        self.current_node = current_node
+        self.reachable_leaves = reachable_leaves
+        self.determined = len(reachable_leaves) == 1
+        self._next_question = _UNSET
+
+    @property
+    def next_question(self) -> Optional[str]:
+        """Pregunta que más reduce las hojas candidatas (None si ya está decidido); se calcula al pedirla"""
+        if self._next_question is _UNSET:
+            self._next_question = None
+            if not self.determined:
+                self._next_question = self._index._best_question(
+                    self.answers, self.candidates, self.reachable_leaves
+                )
+        return self._next_question
+
+
+class WizardIndex:
+    """
+    Índice de bits del espacio de respuestas para un DecisionTree
+
+    Se construye una vez por árbol; los estados se guardan en una caché LRU
+    indexada por el prefijo de respuestas.
+    """
+
+    def __init__(self, tree: DecisionTree, max_states: int = 4096):
+        self.tree = tree
+        self.max_states = max_states
+        self.value_bits, self.leaf_bits = answer_space_bitsets(tree)
+        self.all_combinations = (1 << SPACE_SIZE) - 1
+        self._states: "OrderedDict[Prefix, PartialState]" = OrderedDict()
+
+    def session(self) -> "WizardSession":
+        return WizardSession(self)
+
+    def state(self, prefix: Sequence[Tuple[str, str]]) -> PartialState:
+        """
+        Estado para un prefijo de respuestas (pregunta, valor) en el orden en que se dieron
+
+        Reutiliza el estado del prefijo más largo en caché y aplica solo las respuestas nuevas.
+        """
+        prefix = tuple(prefix)
+        states = self._states
+        state = states.get(prefix)
+        if state is not None:
+            states.move_to_end(prefix)
+            return state
+
+        if prefix:
+            parent = self.state(prefix[:-1])
+            candidates, answers = parent.candidates, parent.answers
+        else:
+            candidates, answers = self.all_combinations, {}
+
+        if prefix:
+            question_id, value = prefix[-1]
+            if value not in VALUE_INDEX.get(question_id, {}):
+                raise ValueError(f"Respuesta desconocida: {question_id}={value}")
+            if question_id in answers:
+                # Cambiar una respuesta previa: recalcular la intersección desde cero
+                answers = {**answers, question_id: value}
+                candidates = self.all_combinations
+                for pair in answers.items():
+                    candidates &= self.value_bits[pair]
+            else:
+                answers = {**answers, question_id: value}
+                candidates &= self.value_bits[(question_id, value)]
+
+        state = self._build_state(answers, candidates)
+        states[prefix] = state
+        if len(states) > self.max_states:
+            states.popitem(last=False)
+        return state
+
+    def _build_state(self, answers: Dict[str, str], candidates: int) -> PartialState:
+        reachable = frozenset(leaf for leaf, bits in self.leaf_bits.items() if bits & candidates)
+        return PartialState(self, answers, candidates, self._current_node(answers, reachable), reachable)
+
+    def _current_node(self, answers: Dict[str, str], reachable: FrozenSet[int]) -> TechNode:
+        """
+        Nodo alcanzado siguiendo PRIORITY_ORDER hasta la primera pregunta sin responder,
+        o la hoja misma si ya es la única alcanzable
+        """
+        if len(reachable) == 1 and DEFAULT_LEAF not in reachable:
+            return self.tree.leaves[next(iter(reachable))]
+
+        current = self.tree.root
+        for key in PRIORITY_ORDER:
+            if key not in answers:
+                break
+            value = answers[key]
+            if value in current.children:
+                current = current.children[value]
+            if current.recommendations:
+                break
+        return current
+
+    def _best_question(self, answers: Dict[str, str], candidates: int, reachable: FrozenSet[int]) -> Optional[str]:
+        """
+        Pregunta sin responder que minimiza la entropía esperada de la hoja
+
+        Cada combinación compatible cuenta lo mismo; a igual ganancia se prefiere
+        el orden de PRIORITY_ORDER y luego el de lib/questions.ts.
+        """
+        total = bin(candidates).count("1")
+        order = list(PRIORITY_ORDER) + [q for q, _ in QUESTIONS if q not in PRIORITY_ORDER]
+        best, best_entropy = None, self._entropy(candidates, reachable, total)
+
+        for question_id in order:
+            if question_id in answers:
+                continue
+            expected = 0.0
+            for value in VALUE_INDEX[question_id]:
+                subset = candidates & self.value_bits[(question_id, value)]
+                count = bin(subset).count("1")
+                if count:
+                    expected += count / total * self._entropy(subset, reachable, count)
+            if expected < best_entropy - 1e-12:
+                best, best_entropy = question_id, expected
+        return best
+
+    def _entropy(self, candidates: int, reachable: FrozenSet[int], total: int) -> float:
+        entropy = 0.0
+        for leaf in reachable:
+            count = bin(self.leaf_bits[leaf] & candidates).count("1")
+            if count:
+                p = count / total
+                entropy -= p * math.log2(p)
+        return entropy
+
+
+class WizardSession:
+    """Sesión de un usuario: acumula respuestas y consulta estados en el índice compartido"""
+
+    def __init__(self, index: WizardIndex):
+        self.index = index
+        self.prefix: List[Tuple[str, str]] = []
+
+    @property
+    def state(self) -> PartialState:
+        return self.index.state(self.prefix)
+
+    def answer(self, question_id: str, value: str) -> PartialState:
+        self.prefix.append((question_id, value))
+        try:
+            return self.state
+        except ValueError:
+            self.prefix.pop()
+            raise
+
+    def undo(self) -> PartialState:
+        if self.prefix:
+            self.prefix.pop()
+        return self.state
+
+    def result(self) -> Optional[Dict]:
+        """
+        Recomendación si la hoja ya está decidida, o None
+
+        Mientras queden preguntas sin responder solo incluye las tecnologías: el
+        resumen, las consideraciones y el camino dependen también de las respuestas
+        que faltan. Con todas respondidas es el resultado de DecisionTree.traverse.
+        """
+        state = self.state
+        if not state.determined:
+            return None
+        tree = self.index.tree
+        if len(state.answers) == len(QUESTIONS):
+            return tree.traverse(state.answers)
+        leaf = next(iter(state.reachable_leaves))
+        if leaf == DEFAULT_LEAF:
+            return {"technologies": tree._get_default_recommendations(state.answers)["technologies"]}
+        return {"technologies": tree.leaves[leaf].recommendations.to_dict()}
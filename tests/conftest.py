@@ -0,0 +1,102 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+sys.path.insert(0, SCRIPTS)
+
+SCRIPT = os.path.join(SCRIPTS, "decision_tree.py")
+
+
+def answers_list(answers):
+    return [{"questionId": key, "value": value} for key, value in answers.items()]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"El servidor no respondió en el puerto {port}")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def snapshot_cache(tmp_path_factory):
+    """Instantáneas de tree_definition.py (también las de los subprocesos) fuera de ~/.cache"""
+    previous = os.environ.get("XDG_CACHE_HOME")
+    os.environ["XDG_CACHE_HOME"] = str(tmp_path_factory.mktemp("cache"))
+    yield
+    if previous is None:
+        del os.environ["XDG_CACHE_HOME"]
+    else:
+        os.environ["XDG_CACHE_HOME"] = previous
+
+
+@pytest.fixture(scope="session")
+def tree():
+    from decision_tree import DecisionTree
+    return DecisionTree()
+
+
+@pytest.fixture
+def variants_dir(tmp_path):
+    """Directorio de variantes de tree_registry.py con los locales en y pt"""
+    from decision_tree import DecisionTree
+    from tree_definition import export_definition
+    for locale in ("en", "pt"):
+        path = tmp_path / locale / "default" / "current.json"
+        path.parent.mkdir(parents=True)
+        path.write_text(json.dumps(export_definition(DecisionTree(), locale)), encoding="utf-8")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def start_server():
+    """Arranca decision_tree.py --serve con los argumentos dados; retorna (proceso, puerto)"""
+    processes = []
+
+    def start(*args):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, SCRIPT, "--serve", "--port", str(port), *args],
+            stderr=subprocess.PIPE,
+        )
+        processes.append(process)
+        wait_for_server(port)
+        return process, port
+
+    yield start
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        process.stderr.close()
+
+
+def post_json(port: int, path: str, body, headers=None):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
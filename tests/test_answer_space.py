@@ -0,0 +1,101 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from answer_space import AnswerTable, compile_table, decode_key, iter_answer_space
+from conftest import SCRIPT, answers_list, post_json
+from decision_tree import DecisionTree
+from payload_store import intern_payload
+from response_cache import ResponseCache, encode_response, with_result_hash
+
+
+@pytest.fixture(scope="module")
+def table_path(tmp_path_factory, tree):
+    path = str(tmp_path_factory.mktemp("table") / "answer_space.bin")
+    compile_table(tree, path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def table(table_path):
+    table = AnswerTable(table_path)
+    yield table
+    table.close()
+
+
+def test_scalar_compiled_and_table_agree(tree, table):
+    compiled = tree.compile()
+    cache = ResponseCache(tree, max_entries=len(table.summaries) * 1024)
+    for answers in iter_answer_space():
+        expected = tree.traverse(answers)
+        assert compiled.traverse(answers) == expected
+        assert table.traverse(answers) == expected
+
+        body = with_result_hash(encode_response(expected), tree.version)
+        cached = cache.get(answers)
+        assert cached == body and cached.etag == body.etag
+        response = table.get(answers)
+        assert response == body and response.etag == body.etag and response.leaf == cached.leaf
+
+
+def test_incomplete_answers_fall_back_to_tree(tree, table):
+    answers = {"app-type": "web", "scale": "large"}
+    assert table.lookup(answers) is None
+    assert table.traverse(answers) == tree.traverse(answers)
+    assert table.get(answers) == ResponseCache(tree).get(answers)
+
+
+def test_lookup_returns_independent_results(table):
+    answers = next(iter_answer_space())
+    first = table.lookup(answers)
+    first["technologies"].clear()
+    first["considerations"].append("x")
+    second = table.lookup(answers)
+    assert second["technologies"] and "x" not in second["considerations"]
+
+
+def test_table_from_another_tree_version_is_rejected(tmp_path):
+    other = DecisionTree()
+    other.version = "2024-06-01"
+    path = str(tmp_path / "other.bin")
+    compile_table(other, path)
+
+    assert AnswerTable(path, other).version == "2024-06-01"
+    with pytest.raises(ValueError, match="2024-06-01"):
+        AnswerTable(path)
+
+
+def test_table_from_an_edited_tree_with_the_same_version_is_rejected(tmp_path):
+    edited = DecisionTree()
+    leaf = edited.leaves[0]
+    technologies = leaf.recommendations.to_dict()
+    technologies["frontend"]["primary"] = ["Otra tecnología"]
+    leaf.recommendations = intern_payload(technologies)
+    path = str(tmp_path / "edited.bin")
+    compile_table(edited, path)
+
+    assert AnswerTable(path, edited).lookup(decode_key(0)) is not None
+    with pytest.raises(ValueError, match="otro árbol"):
+        AnswerTable(path)
+
+
+def test_table_and_definition_are_exclusive(table_path, tmp_path):
+    result = subprocess.run(
+        [sys.executable, SCRIPT, "--stream", "--table", table_path, "--definition", str(tmp_path / "tree.json")],
+        input="", capture_output=True, text=True,
+    )
+    assert result.returncode == 2
+    assert "not allowed with argument" in result.stderr
+
+
+def test_served_table_responses_carry_etag(tree, table_path, start_server):
+    _, port = start_server("--table", table_path)
+    answers = next(iter_answer_space())
+    status, headers, body = post_json(port, "/api/recommendations", answers_list(answers))
+
+    assert status == 200
+    result = json.loads(body)
+    assert headers["ETag"] == f'"{result.pop("result_hash")}"'
+    assert result == tree.traverse(answers)
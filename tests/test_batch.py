@@ -0,0 +1,86 @@
+import itertools
+import json
+
+import pytest
+
+from answer_space import iter_answer_space
+from batch_response import encode_batch, parse_batch
+from conftest import answers_list, post_json
+from response_cache import ResponseCache, encode_response
+
+
+@pytest.fixture(scope="module")
+def answer_sets():
+    sets = [answers_list(answers) for answers in itertools.islice(iter_answer_space(), 0, 20480, 37)]
+    return sets + sets[:50]
+
+
+def rows_of(batch):
+    if "rows" in batch:
+        return batch["rows"]
+    columns = batch["columns"]
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def expand(batch, row):
+    result = dict(batch["results"][row["result"]])
+    assert result.pop("leaf") == row["leaf"]
+    result["technologies"] = batch["payloads"][result.pop("payload")]
+    return result
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_batch_rows_match_single_responses(tree, answer_sets, columnar):
+    cache = ResponseCache(tree)
+    batch = json.loads(encode_batch(cache.get, answer_sets, columnar))
+
+    assert batch["count"] == len(answer_sets)
+    assert batch["unique"] == len(answer_sets) - 50
+    assert len(batch["payloads"]) == len(tree.leaves) + 1
+    for answers, row in zip(answer_sets, rows_of(batch)):
+        single = json.loads(cache.get({answer["questionId"]: answer["value"] for answer in answers}))
+        assert row["result_hash"] == single["result_hash"]
+        assert expand(batch, row) == single
+
+
+def test_batch_reports_invalid_rows_without_failing(tree, answer_sets):
+    batch = json.loads(encode_batch(ResponseCache(tree).get, answer_sets[:2] + [5, [{"x": 1}]]))
+    assert set(batch["errors"]) == {"2", "3"}
+    assert batch["rows"][2] == {"leaf": None, "result_hash": None, "result": None}
+    assert batch["rows"][0]["result"] == 0
+
+
+def test_batch_fallback_decodes_other_engines(tree, answer_sets):
+    batch = json.loads(encode_batch(lambda answers: encode_response(tree.traverse(answers)), answer_sets[:30]))
+    for answers, row in zip(answer_sets, batch["rows"]):
+        assert row["leaf"] is None
+        assert expand(batch, row) == tree.traverse({answer["questionId"]: answer["value"] for answer in answers})
+
+
+def test_parse_batch_formats():
+    assert parse_batch([[]]) == ([[]], False)
+    assert parse_batch({"answers": [], "format": "columns"}) == ([], True)
+    assert parse_batch({"answers": [], "format": "columns"}, "rows") == ([], False)
+    with pytest.raises(ValueError):
+        parse_batch({"answers": 3})
+    with pytest.raises(ValueError):
+        parse_batch([], "xml")
+
+
+def test_http_batch_accepts_bodies_over_the_single_query_limit(start_server, answer_sets):
+    _, port = start_server()
+    body = json.dumps(answer_sets).encode("utf-8")
+    assert len(body) > 64 * 1024
+
+    status, _, payload = post_json(port, "/api/recommendations/batch?format=columns", body)
+    assert status == 200
+    assert json.loads(payload)["count"] == len(answer_sets)
+
+    status, _, _ = post_json(port, "/api/recommendations", body)
+    assert status == 413
+
+
+def test_http_batch_limit_is_configurable(start_server, answer_sets):
+    _, port = start_server("--max-batch-body", "1024")
+    status, _, _ = post_json(port, "/api/recommendations/batch", answer_sets)
+    assert status == 413
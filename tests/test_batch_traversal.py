@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from answer_space import QUESTIONS, iter_answer_space
+from decision_tree import DEFAULT_LEAF
+
+pytest.importorskip("numpy")
+
+
+def resolved_leaf(tree, answers) -> int:
+    leaf, _ = tree.resolve(answers)
+    return DEFAULT_LEAF if leaf is None else leaf.leaf_id
+
+
+def partial_answers(count: int):
+    """Respuestas incompletas, con valores desconocidos, de otra pregunta o ids inexistentes"""
+    rng = random.Random(4)
+    values = [value for _, question_values in QUESTIONS for value in question_values]
+    batch = [{}, {"projectType": "web"}, {"app-type": "cli"}, {"app-type": "small", "scale": "web"}]
+    for _ in range(count):
+        answers = {}
+        for question_id, question_values in QUESTIONS:
+            roll = rng.random()
+            if roll < 0.5:
+                answers[question_id] = rng.choice(question_values)
+            elif roll < 0.6:
+                answers[question_id] = rng.choice(values)
+            elif roll < 0.65:
+                answers[question_id] = "desconocido"
+        if rng.random() < 0.1:
+            answers["extra"] = "web"
+        batch.append(answers)
+    return batch
+
+
+def test_batch_matches_traverse_over_answer_space(tree):
+    space = list(iter_answer_space())
+    result = tree.traverse_many(space)
+
+    assert len(result) == len(space)
+    assert [int(leaf) for leaf in result.leaf] == [resolved_leaf(tree, answers) for answers in space]
+    assert result.to_dicts() == [tree.traverse(answers) for answers in space]
+
+
+def test_batch_matches_traverse_on_partial_and_invalid_answers(tree):
+    batch = partial_answers(3000)
+    result = tree.traverse_many(batch)
+
+    assert [int(leaf) for leaf in result.leaf] == [resolved_leaf(tree, answers) for answers in batch]
+    for index, answers in enumerate(batch):
+        assert result.row(index) == tree.traverse(answers), answers
+
+
+def test_empty_batch(tree):
+    result = tree.traverse_many([])
+    assert len(result) == 0
+    assert result.to_dicts() == []
@@ -0,0 +1,118 @@
+import csv
+import itertools
+import json
+
+import pytest
+
+import bulk_score
+from answer_space import QUESTION_IDS, iter_answer_space
+from conftest import answers_list
+
+
+def sample(count: int, step: int = 7):
+    return list(itertools.islice(iter_answer_space(), 0, None, step))[:count]
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("id",) + QUESTION_IDS)
+        for record_id, answers in rows:
+            writer.writerow((record_id,) + tuple(answers[question_id] for question_id in QUESTION_IDS))
+
+
+def read_csv_output(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_quoted_newlines_and_bad_rows_are_per_row(tmp_path, tree):
+    rows = sample(6)
+    source = tmp_path / "envios.csv"
+    write_csv(source, [(f"envío {i}\nsegunda línea" if i == 2 else str(i), answers) for i, answers in enumerate(rows)])
+    # Fila con bytes que no son UTF-8 entre dos filas válidas
+    data = source.read_bytes().splitlines(keepends=True)
+    data.insert(3, b"\xff\xfe,web,public,small,low,solo,fast,simple\r\n")
+    source.write_bytes(b"".join(data))
+
+    output = tmp_path / "resultados.csv"
+    assert bulk_score.run(str(source), str(output), "csv", "csv", workers=1, chunk_size=2) == 7
+
+    results = read_csv_output(output)
+    assert [result["row"] for result in results] == [str(i) for i in range(7)]
+    assert results[2]["leaf"] == "error" and "UTF-8" in results[2]["decision_path"]
+    valid = results[:2] + results[3:]
+    assert valid[2]["id"] == "envío 2\nsegunda línea"
+    for answers, result in zip(rows, valid):
+        assert result["decision_path"] == tree.traverse(answers)["decision_path"]
+
+
+def test_ndjson_bad_lines_are_per_row(tmp_path, tree):
+    rows = sample(4)
+    lines = [json.dumps(answers_list(answers)).encode("utf-8") for answers in rows]
+    lines.insert(1, b"{no es json")
+    lines.insert(3, b'"\xff"')
+    source = tmp_path / "envios.ndjson"
+    source.write_bytes(b"\n".join(lines) + b"\n")
+
+    output = tmp_path / "resultados.ndjson"
+    bulk_score.run(str(source), str(output), "ndjson", "ndjson", workers=1, chunk_size=2)
+
+    results = [json.loads(line) for line in output.read_bytes().splitlines()]
+    assert "error" in results[1] and "error" in results[3]
+    valid = [results[0], results[2], results[4], results[5]]
+    for answers, result in zip(rows, valid):
+        result.pop("result_hash")
+        assert result == tree.traverse(answers)
+
+
+@pytest.mark.parametrize("input_format", ["csv", "ndjson"])
+def test_interrupted_run_resumes_to_the_same_output(tmp_path, monkeypatch, input_format):
+    rows = sample(40, step=13)
+    source = tmp_path / f"envios.{input_format}"
+    if input_format == "csv":
+        write_csv(source, [(f"{i}\n{i}" if i % 5 == 0 else str(i), answers) for i, answers in enumerate(rows)])
+    else:
+        source.write_text("".join(json.dumps(answers_list(answers)) + "\n" for answers in rows), encoding="utf-8")
+
+    expected = tmp_path / "completo.csv"
+    bulk_score.run(str(source), str(expected), input_format, "csv", workers=1, chunk_size=4)
+
+    save = bulk_score._save_checkpoint
+    saves = []
+
+    def interrupted(path, state):
+        save(path, state)
+        saves.append(state)
+        if len(saves) == 3:
+            raise KeyboardInterrupt
+
+    output = tmp_path / "resultados.csv"
+    monkeypatch.setattr(bulk_score, "_save_checkpoint", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        bulk_score.run(str(source), str(output), input_format, "csv", workers=1, chunk_size=4)
+    monkeypatch.setattr(bulk_score, "_save_checkpoint", save)
+
+    # Salida escrita después del último checkpoint: se descarta al reanudar
+    with open(output, "ab") as f:
+        f.write(b"basura parcial")
+    assert bulk_score.run(str(source), str(output), input_format, "csv", workers=1, chunk_size=4) == 40
+    assert output.read_bytes() == expected.read_bytes()
+
+
+def test_empty_ndjson_input(tmp_path):
+    source = tmp_path / "vacio.ndjson"
+    source.write_bytes(b"\n")
+    output = tmp_path / "resultados.ndjson"
+    assert bulk_score.run(str(source), str(output), "ndjson", "ndjson", workers=1) == 0
+    assert output.read_bytes() == b""
+    assert not (tmp_path / "resultados.ndjson.checkpoint").exists()
+
+
+def test_header_only_csv_input(tmp_path):
+    source = tmp_path / "solo_cabecera.csv"
+    write_csv(source, [])
+    output = tmp_path / "resultados.csv"
+    assert bulk_score.run(str(source), str(output), "csv", "csv", workers=1) == 0
+    assert read_csv_output(output) == []
+    assert output.read_text(encoding="utf-8") == ",".join(bulk_score.CSV_FIELDS) + "\n"
@@ -0,0 +1,65 @@
+import json
+import urllib.request
+
+import pytest
+
+from conftest import answers_list, post_json
+
+ANSWERS = {"app-type": "api", "scale": "small", "timeline": "normal"}
+
+
+def get(port: int, query: str, headers=None):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/api/recommendations?{query}", headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+@pytest.fixture
+def port(start_server):
+    return start_server()[1]
+
+
+def test_etag_is_the_result_hash(port, tree):
+    status, headers, body = post_json(port, "/api/recommendations", answers_list(ANSWERS))
+    assert status == 200
+    result = json.loads(body)
+    assert headers["ETag"] == f'"{result.pop("result_hash")}"'
+    assert headers["Cache-Control"] == "no-cache"
+    assert result == tree.traverse(ANSWERS)
+
+    # GET con las respuestas en la query: misma salida y mismo ETag
+    status, get_headers, get_body = get(port, "&".join(f"{key}={value}" for key, value in ANSWERS.items()))
+    assert status == 200 and get_body == body and get_headers["ETag"] == headers["ETag"]
+
+    other = dict(ANSWERS, scale="large")
+    assert tree.traverse(other) != tree.traverse(ANSWERS)
+    _, other_headers, _ = post_json(port, "/api/recommendations", answers_list(other))
+    assert other_headers["ETag"] != headers["ETag"]
+
+
+@pytest.mark.parametrize("if_none_match", ['"{etag}"', 'W/"{etag}"', '"otro", "{etag}"', "*"])
+def test_matching_if_none_match_gets_304(port, if_none_match):
+    _, headers, body = post_json(port, "/api/recommendations", answers_list(ANSWERS))
+    etag = headers["ETag"].strip('"')
+
+    status, not_modified, empty = post_json(
+        port, "/api/recommendations", answers_list(ANSWERS), {"If-None-Match": if_none_match.format(etag=etag)}
+    )
+    assert status == 304
+    assert empty == b""
+    assert not_modified["ETag"] == headers["ETag"]
+
+
+def test_stale_if_none_match_gets_full_response(port):
+    _, headers, body = post_json(port, "/api/recommendations", answers_list(ANSWERS))
+    status, _, again = post_json(port, "/api/recommendations", answers_list(ANSWERS), {"If-None-Match": '"viejo"'})
+    assert status == 200 and again == body
+
+
+def test_errors_carry_no_etag(port):
+    status, headers, _ = post_json(port, "/api/recommendations", b"{no es json")
+    assert status == 500
+    assert "ETag" not in headers
@@ -0,0 +1,77 @@
+import pytest
+
+import metrics
+from decision_tree import DecisionTree
+from response_cache import ResponseCache
+from tree_definition import build_node
+
+RECOMMENDATIONS = {"backend": {"primary": ["Go"], "reasoning": "x", "alternatives": []}}
+
+
+def tree_with(complexity: str) -> DecisionTree:
+    data = {
+        "description": "raíz",
+        "children": {
+            "web": {
+                "description": "web",
+                "children": {
+                    "fast": {
+                        "description": "rápido",
+                        "children": {complexity: {"description": complexity, "recommendations": RECOMMENDATIONS}},
+                    }
+                },
+            }
+        },
+    }
+    return DecisionTree(root=build_node("root", data, "tree"))
+
+
+@pytest.fixture
+def registry():
+    metrics.disable()
+    registry = metrics.enable()
+    yield registry
+    metrics.disable()
+
+
+def path_counts(registry):
+    return {
+        dict(labels)["decision_path"]: value
+        for (name, labels), value in registry.counters.items()
+        if name == "decision_tree_decision_path_total"
+    }
+
+
+def test_path_labels_are_per_compiled_tree(registry):
+    simple = ResponseCache(tree_with("simple"))
+    moderate = ResponseCache(tree_with("moderate"))
+
+    simple.get({"app-type": "web", "timeline": "fast", "complexity": "simple"})
+    moderate.get({"app-type": "web", "timeline": "fast", "complexity": "moderate"})
+
+    assert path_counts(registry) == {
+        "app-type=web → timeline=fast → complexity=simple": 1,
+        "app-type=web → timeline=fast → complexity=moderate": 1,
+    }
+
+
+def test_traverse_and_cache_record_the_same_labels(registry, tree):
+    answers = {"app-type": "api", "scale": "small"}
+    tree.traverse(answers)
+    ResponseCache(tree).get(answers)
+    assert path_counts(registry) == {"app-type=api → scale=small": 2}
+
+
+def test_prewarm_is_not_counted_as_traffic(registry, tree):
+    cache = ResponseCache(tree)
+    assert cache.prewarm() > 0
+    assert registry.counters == {}
+    assert cache.hits == cache.misses == 0
+
+
+def test_labels_come_from_the_request_being_answered(registry, tree):
+    cache = ResponseCache(tree)
+    # Otra llamada a key() (p. ej. el hilo de recarga precalentando) entre medio no cambia la etiqueta
+    cache.key({"app-type": "web", "timeline": "fast", "complexity": "simple"})
+    cache.get({"app-type": "api", "scale": "small"})
+    assert path_counts(registry) == {"app-type=api → scale=small": 1}
@@ -0,0 +1,56 @@
+import itertools
+import json
+import subprocess
+import sys
+
+import pytest
+
+import json_lite
+from answer_space import iter_answer_space
+from benchmarks import startup_imports
+from conftest import SCRIPT, answers_list
+
+
+def run_one_shot(stdin: bytes) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, SCRIPT], input=stdin, capture_output=True)
+
+
+@pytest.mark.parametrize("answers", list(itertools.islice(iter_answer_space(), 0, 20480, 2048)))
+def test_one_shot_output_matches_traverse(tree, answers):
+    result = run_one_shot(json.dumps(answers_list(answers)).encode("utf-8"))
+    assert result.returncode == 0
+    assert result.stdout.decode("utf-8") == json.dumps(tree.traverse(answers), ensure_ascii=False, indent=2) + "\n"
+
+
+@pytest.mark.parametrize("stdin, error", [
+    (b"nojson", "Expecting value: line 1 column 1 (char 0)"),
+    (b'[{"questionId": "app-type"}]', "'value'"),
+])
+def test_one_shot_errors(stdin, error):
+    result = run_one_shot(stdin)
+    assert result.returncode == 1
+    assert json.loads(result.stdout)["error"] == error
+
+
+def test_one_shot_skips_deferred_imports():
+    assert startup_imports({"app-type": "web", "timeline": "fast"}) == []
+
+
+@pytest.mark.parametrize("value", [
+    [], {}, "á\"\n", [{"a": []}], {"x": {"y": ["ñ", "\t"], "z": {}}}, [1, 2.5, None, True], {"n": float("inf")},
+])
+def test_json_lite_dumps_matches_json(value):
+    assert json_lite.dumps_indented(value) == json.dumps(value, ensure_ascii=False, indent=2)
+
+
+@pytest.mark.parametrize("text", [
+    '[{"questionId": "a", "value": "b"}]', "  [1, 2] \n", "﻿[]", "[1] x", "", "[1e5, -0, 1.5]",
+    '"sin cerrar', "[", '{"a": 1,}',
+])
+def test_json_lite_loads_matches_json(text):
+    def outcome(loads):
+        try:
+            return "ok", loads(text)
+        except ValueError as e:
+            return type(e).__name__, str(e)
+    assert outcome(json_lite.loads) == outcome(json.loads)
@@ -0,0 +1,84 @@
+import gc
+import json
+
+from decision_tree import DecisionTree
+from payload_store import STORE, intern_payload
+from tree_definition import build_node
+from tree_registry import TreeRegistry
+
+
+def recommendations(tag: str):
+    return {
+        "backend": {"primary": [f"Go {tag}"], "reasoning": f"razón {tag}", "alternatives": [f"Rust {tag}"]},
+        "tools": {"primary": ["GitHub"], "reasoning": "compartido", "alternatives": []},
+    }
+
+
+def tree_with(tag: str) -> DecisionTree:
+    data = {
+        "description": "raíz",
+        "children": {"web": {"description": tag, "recommendations": recommendations(tag)}},
+    }
+    tree = DecisionTree(root=build_node("root", data, "tree"))
+    tree.version = tag
+    return tree
+
+
+def test_unused_payloads_release_their_strings(tree):
+    # El árbol incorporado (fixture) sigue vivo y usa "GitHub"
+    before = STORE.stats()
+    tree = tree_with("liberable")
+    assert "razón liberable" in STORE.ids
+    assert STORE.stats()["payloads"] == before["payloads"] + 1
+
+    del tree
+    gc.collect()
+    STORE.collect()
+    assert "razón liberable" not in STORE.ids
+    assert "GitHub" in STORE.ids
+    assert STORE.stats() == before
+
+
+def test_payload_shared_by_live_tree_is_kept():
+    first, second = tree_with("compartido"), tree_with("compartido")
+    payload = first.leaves[0].recommendations
+    assert second.leaves[0].recommendations is payload
+
+    del first
+    gc.collect()
+    STORE.collect()
+    assert intern_payload(recommendations("compartido")) is payload
+    assert payload.to_dict() == recommendations("compartido")
+
+
+def test_released_ids_are_reused_without_stale_fragments():
+    old = tree_with("viejo")
+    old.leaves[0].recommendations.json
+    freed = {STORE.ids[text] for text in ("Go viejo", "razón viejo", "Rust viejo")}
+    del old
+    gc.collect()
+    STORE.collect()
+
+    payload = intern_payload(recommendations("nuevo"))
+    assert freed & {string_id for entry in payload.entries for string_id in (entry[0], entry[2]) + entry[1] + entry[3]}
+    assert json.loads(payload.json) == recommendations("nuevo") == payload.to_dict()
+
+
+def test_registry_eviction_releases_payloads(tmp_path):
+    for version in ("uno", "dos"):
+        path = tmp_path / "es" / "default" / f"{version}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": version,
+            "tree": {"description": "raíz", "children": {"web": {"description": "web", "recommendations": recommendations(version)}}},
+        }
+        path.write_text(json.dumps(data), encoding="utf-8")
+
+    registry = TreeRegistry(str(tmp_path), max_variants=1)
+    registry.respond({"app-type": "web"}, "es/default/uno")
+    assert "razón uno" in STORE.ids
+    registry.respond({"app-type": "web"}, "es/default/dos")
+    gc.collect()
+    STORE.collect()
+    assert "razón uno" not in STORE.ids
+    assert "razón dos" in STORE.ids
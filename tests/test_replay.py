@@ -0,0 +1,130 @@
+import asyncio
+import itertools
+import json
+import socket
+import threading
+
+import pytest
+
+from answer_space import iter_answer_space
+from replay import _Pool, load_corpus, replay, run_closed
+from server import RecommendationServer
+from traffic_capture import TrafficCapture
+from tree_registry import TreeRegistry, UnknownVariant, VariantKey, VariantNotLoaded
+
+
+def read_capture(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_capture_replayed_against_server_is_captured_again(variants_dir, tmp_path):
+    original = tmp_path / "original.ndjson"
+    entries = []
+    for answers, variant in zip(itertools.islice(iter_answer_space(), 0, None, 997), itertools.cycle(["en", "pt"])):
+        entries.append({
+            "ts": 0,
+            "answers": [{"questionId": key, "value": value} for key, value in answers.items()],
+            "variant": variant,
+        })
+    original.write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+
+    # Las variantes se cargan en el executor tras VariantNotLoaded; cada petición se guarda una vez
+    registry = TreeRegistry(variants_dir, defer_builds=True)
+    capture = TrafficCapture(str(tmp_path / "replayed.ndjson"))
+
+    async def scenario():
+        server = RecommendationServer(capture.wrap(registry.respond), variants=True)
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        pool = _Pool("127.0.0.1", port, 1)
+        try:
+            corpus = load_corpus(str(original), f"127.0.0.1:{port}", "/api/recommendations")
+            return await run_closed(pool, corpus, 1, 30.0, len(corpus), timeout=10.0)
+        finally:
+            pool.close()
+            await server.shutdown(0)
+
+    recorder = asyncio.run(scenario())
+    capture.close()
+
+    assert recorder.statuses == {"200": len(entries)}
+    assert registry.builds == 2
+    replayed = read_capture(tmp_path / "replayed.ndjson")
+    assert [(entry["answers"], entry["variant"]) for entry in replayed] == [
+        (entry["answers"], entry["variant"]) for entry in entries
+    ]
+
+
+def test_failed_requests_are_captured_but_variant_retries_are_not(tmp_path):
+    path = str(tmp_path / "capture.ndjson")
+    capture = TrafficCapture(path)
+    key = VariantKey("en", "default", "current")
+    attempts = []
+
+    def respond(answers, variant):
+        attempts.append(variant)
+        if variant == "en" and attempts.count("en") == 1:
+            raise VariantNotLoaded(key, lambda: None)
+        if variant == "xx":
+            raise UnknownVariant(variant)
+        return b"{}"
+
+    capturing = capture.wrap(respond)
+    with pytest.raises(VariantNotLoaded):
+        capturing({"app-type": "web"}, "en")
+    assert capturing({"app-type": "web"}, "en") == b"{}"
+    with pytest.raises(UnknownVariant):
+        capturing({"app-type": "api"}, "xx")
+    capture.close()
+
+    assert [entry["variant"] for entry in read_capture(path)] == ["en", "xx"]
+
+
+@pytest.fixture
+def silent_server():
+    """Servidor que lee la cabecera de cada petición y nunca responde; retorna (puerto, líneas de petición)"""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    request_lines = []
+    connections = []
+
+    def accept():
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            connections.append(connection)
+            head = b""
+            while b"\r\n\r\n" not in head:
+                chunk = connection.recv(4096)
+                if not chunk:
+                    break
+                head += chunk
+            request_lines.append(head.split(b"\r\n", 1)[0].decode("latin-1"))
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    yield listener.getsockname()[1], request_lines
+    listener.close()
+    for connection in connections:
+        connection.close()
+
+
+def test_unanswered_requests_count_as_timeouts(silent_server, tmp_path):
+    port, request_lines = silent_server
+    corpus = tmp_path / "capture.ndjson"
+    corpus.write_text(json.dumps({"answers": [{"questionId": "app-type", "value": "web"}]}) + "\n", encoding="utf-8")
+
+    report = replay(
+        str(corpus), f"http://127.0.0.1:{port}/api/recommendations?format=columns",
+        concurrency=1, duration=30.0, total=2, timeout=0.2,
+    )
+
+    assert report["requests"] == 2
+    assert report["statuses"] == {"timeout": 2}
+    assert report["errors"] == 2
+    assert report["elapsed_s"] < 5
+    assert request_lines == ["POST /api/recommendations?format=columns HTTP/1.1"] * 2
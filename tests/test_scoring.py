@@ -0,0 +1,70 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from answer_space import iter_answer_space
+from conftest import SCRIPT, answers_list, post_json
+
+np = pytest.importorskip("numpy")
+
+ANSWERS = {"app-type": "web", "scale": "small", "timeline": "fast"}
+
+
+@pytest.fixture(scope="module")
+def engine(tree):
+    from scoring_engine import ScoringEngine
+    return ScoringEngine(tree)
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_top_k_rejects_non_positive(engine, k):
+    with pytest.raises(ValueError):
+        engine.top_k(ANSWERS, k)
+    with pytest.raises(ValueError):
+        engine.top_k_many(np.zeros((1, engine.weights.shape[1])), k)
+
+
+def test_top_k_caps_at_leaf_count(engine):
+    ranking = engine.top_k(ANSWERS, 1000)
+    assert len(ranking) == len(engine.leaf_names)
+
+
+def test_best_leaf_agrees_with_tree_over_answer_space(engine, tree):
+    space = list(iter_answer_space())
+    leaves, _ = engine.top_k_many(engine.encode_many(space), 1)
+
+    covered = 0
+    for index, answers in enumerate(space):
+        leaf, _ = tree.resolve(answers)
+        if leaf is None:
+            continue
+        covered += 1
+        assert leaves[index, 0] == leaf.leaf_id, answers
+        if index % 97 == 0:
+            assert engine.top_k(answers, 1)[0][0] == leaf.leaf_id, answers
+    assert covered
+
+
+def test_served_scoring_results_carry_etag(start_server):
+    _, port = start_server("--engine", "scoring")
+    status, headers, body = post_json(port, "/api/recommendations", answers_list(ANSWERS))
+    assert status == 200
+    result = json.loads(body)
+    assert headers["ETag"] == f'"{result["result_hash"]}"'
+    assert result["ranking"]
+
+    status, _, empty = post_json(port, "/api/recommendations", answers_list(ANSWERS), {"If-None-Match": headers["ETag"]})
+    assert status == 304 and empty == b""
+
+
+@pytest.mark.parametrize("value", ["0", "-3"])
+def test_cli_rejects_non_positive_top_k(value):
+    result = subprocess.run(
+        [sys.executable, SCRIPT, "--engine", "scoring", "--top-k", value],
+        input="[]", capture_output=True, text=True,
+    )
+    assert result.returncode == 2
+    assert "--top-k" in result.stderr
+    assert "Traceback" not in result.stderr
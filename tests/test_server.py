@@ -0,0 +1,92 @@
+import json
+import os
+import signal
+import socket
+import time
+
+import pytest
+
+from conftest import answers_list, post_json
+
+ANSWERS = {"app-type": "api", "scale": "small", "timeline": "normal"}
+
+
+def export_builtin(path, tree):
+    from tree_definition import export_definition
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(export_definition(tree), f, ensure_ascii=False)
+
+
+def test_prefork_reload_with_broken_definition_keeps_serving(tmp_path, tree, start_server):
+    definition = tmp_path / "arbol.json"
+    export_builtin(definition, tree)
+    process, port = start_server("--workers", "2", "--definition", str(definition))
+
+    status, _, before = post_json(port, "/api/recommendations", answers_list(ANSWERS))
+    assert status == 200
+
+    definition.write_text('{"version": "rota", "tree": {"description": "x", "children": {"web": 3}}}')
+    os.kill(process.pid, signal.SIGHUP)
+    time.sleep(1.0)
+
+    assert process.poll() is None
+    status, _, after = post_json(port, "/api/recommendations", answers_list(ANSWERS))
+    assert status == 200
+    assert after == before
+
+
+def raw_request(port: int, *chunks: bytes, pause: float = 0.0) -> bytes:
+    """Envía la petición por partes (con pausas entre ellas) y lee hasta que el servidor cierra"""
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        for chunk in chunks:
+            sock.sendall(chunk)
+            time.sleep(pause)
+        data = b""
+        while True:
+            received = sock.recv(65536)
+            if not received:
+                return data
+            data += received
+
+
+def split_response(data: bytes):
+    head, _, body = data.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(body)
+
+
+@pytest.mark.parametrize("chunks", [
+    # Cabecera que nunca termina
+    (b"POST /api/recommendations HTTP/1.1\r\nHost: x\r\n",),
+    # Cuerpo más corto que Content-Length
+    (b"POST /api/recommendations HTTP/1.1\r\nContent-Length: 100\r\n\r\n[",),
+])
+def test_slow_requests_time_out(start_server, chunks):
+    _, port = start_server("--read-timeout", "0.3")
+    started = time.monotonic()
+    status, body = split_response(raw_request(port, *chunks))
+    assert status == 408
+    assert "Tiempo agotado" in body["error"]
+    assert time.monotonic() - started < 5
+
+
+def test_idle_keepalive_is_not_a_timeout(start_server):
+    _, port = start_server("--read-timeout", "0.2")
+    request = b"GET /api/recommendations?app-type=web HTTP/1.1\r\nHost: x\r\n\r\n"
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        sock.sendall(request)
+        first = sock.recv(65536)
+        time.sleep(0.5)
+        sock.sendall(request)
+        second = sock.recv(65536)
+    assert first.startswith(b"HTTP/1.1 200") and second.startswith(b"HTTP/1.1 200")
+
+
+@pytest.mark.parametrize("request_bytes, status, message", [
+    (b"POST /api/recommendations HTTP/1.1\r\nContent-Length: 999999\r\n\r\n", 413, "Cuerpo demasiado grande"),
+    (b"POST /api/recommendations HTTP/1.1\r\nContent-Length: x\r\n\r\n", 400, "Content-Length inválido"),
+    (b"POST /api/recommendations HTTP/1.1\r\n\r\n", 411, "Falta Content-Length"),
+    (b"GET /api/recommendations HTTP/1.1\r\nX-Big: " + b"a" * 70000 + b"\r\n\r\n", 431, "Cabecera demasiado grande"),
+])
+def test_protocol_errors_have_their_own_bodies(start_server, request_bytes, status, message):
+    _, port = start_server()
+    assert split_response(raw_request(port, request_bytes)) == (status, {"error": message})
@@ -0,0 +1,75 @@
+import json
+from collections import Counter
+
+import pytest
+
+from answer_space import SPACE_SIZE, iter_answer_space
+from conftest import answers_list
+from space_analyzer import analyze
+from tree_definition import export_definition
+
+
+@pytest.fixture(scope="module")
+def report():
+    return analyze(workers=1, shards=1)
+
+
+def leaf_name(tree, answers) -> str:
+    leaf, _ = tree.resolve(answers)
+    return "default" if leaf is None else tree.leaf_names[leaf.leaf_id]
+
+
+def test_counts_match_resolve_over_answer_space(report, tree):
+    counts = Counter(leaf_name(tree, answers) for answers in iter_answer_space())
+    assert report["combinations"] == SPACE_SIZE
+    assert report["default"] == counts.pop("default")
+    assert report["leaves"] == {name: counts.get(name, 0) for name in tree.leaf_names}
+    assert sum(report["paths"].values()) == SPACE_SIZE
+
+
+def test_sharded_analysis_matches_single_process(report):
+    sharded = analyze(workers=2, shards=7)
+    assert sharded == report
+
+
+def test_audience_is_never_consulted(report):
+    assert report["never_consulted"] == ["audience"]
+    assert report["questions"]["audience"] == {"consulted": 0, "affects": ["considerations"]}
+    assert report["questions"]["app-type"]["consulted"] == SPACE_SIZE
+    assert "leaf" in report["questions"]["app-type"]["affects"]
+
+
+def test_unreachable_leaf_is_reported(tree, tmp_path):
+    definition = export_definition(tree)
+    web = definition["tree"]["children"]["web"]
+    # Ninguna pregunta tiene el valor "quantum": la hoja existe pero no se alcanza
+    web["children"]["quantum"] = {
+        "description": "Inalcanzable",
+        "recommendations": tree.leaves[0].recommendations.to_dict(),
+    }
+    path = tmp_path / "tree.json"
+    path.write_text(json.dumps(definition), encoding="utf-8")
+
+    report = analyze(str(path), workers=1, shards=2)
+    assert report["unreachable_leaves"] == ["web/quantum"]
+    assert report["leaves"]["web/quantum"] == 0
+
+
+def test_traffic_weighting(tree, tmp_path):
+    space = list(iter_answer_space())
+    heavy, light = space[0], space[-1]
+    assert leaf_name(tree, heavy) != leaf_name(tree, light)
+
+    lines = [json.dumps({"answers": answers_list(heavy)})] * 9
+    lines.append(json.dumps({"answers": answers_list(light)}))
+    lines += ["no es json", json.dumps({"variant": "en"})]
+    capture = tmp_path / "capture.ndjson"
+    capture.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    traffic = analyze(workers=1, shards=1, traffic=str(capture), chunk_size=3)["traffic"]
+    assert traffic["requests"] == 10
+    assert traffic["invalid"] == 2
+    assert traffic["leaves"] == {leaf_name(tree, heavy): 9, leaf_name(tree, light): 1}
+    assert sum(traffic["paths"].values()) == 10
+    assert traffic["prewarm"] == [leaf_name(tree, heavy)]
+    assert traffic["prewarm_coverage"] == 0.9
@@ -0,0 +1,102 @@
+import io
+import json
+import subprocess
+import sys
+
+import pytest
+
+from batch_response import encode_batch, parse_batch
+from cli import serve_stream
+from conftest import SCRIPT, answers_list
+from response_cache import ResponseCache
+from tree_registry import TreeRegistry
+
+WEB = {"app-type": "web", "timeline": "fast", "complexity": "simple"}
+API = {"app-type": "api", "scale": "small"}
+
+
+@pytest.fixture
+def cache(tree):
+    return ResponseCache(tree)
+
+
+def stream(respond, lines, variants=False):
+    stdout = io.BytesIO()
+    stdin = io.BytesIO(b"".join(line + b"\n" for line in lines))
+    serve_stream(respond, stdin, stdout, variants=variants)
+    return stdout.getvalue().splitlines()
+
+
+def encode(request) -> bytes:
+    return json.dumps(request).encode("utf-8")
+
+
+def test_one_output_line_per_input_line(cache, tree):
+    output = stream(cache.get, [encode(answers_list(WEB)), b"", encode({"answers": answers_list(API)})])
+    assert len(output) == 2
+    for line, answers in zip(output, (WEB, API)):
+        result = json.loads(line)
+        assert result.pop("result_hash")
+        assert result == tree.traverse(answers)
+
+
+def test_malformed_lines_get_error_lines_without_ending_the_stream(cache, tree):
+    output = stream(cache.get, [
+        b"{no es json",
+        encode([{"questionId": "app-type"}]),
+        encode({"answers": answers_list(WEB), "variant": "en"}),
+        encode(answers_list(WEB)),
+    ])
+    assert len(output) == 4
+    errors = [json.loads(line) for line in output[:3]]
+    assert all(error["technologies"] == {} and error["error"] for error in errors)
+    assert "Variantes no habilitadas" in errors[2]["error"]
+    assert output[3] == cache.get(WEB)
+
+
+def test_if_none_match(cache):
+    etag = cache.get(WEB).etag
+    output = stream(cache.get, [
+        encode({"answers": answers_list(WEB), "if_none_match": etag}),
+        encode({"answers": answers_list(WEB), "if_none_match": "viejo"}),
+    ])
+    assert json.loads(output[0]) == {"not_modified": True, "result_hash": etag}
+    assert output[1] == cache.get(WEB)
+
+
+def test_batch_lines(cache):
+    batch = [answers_list(WEB), answers_list(API), answers_list(WEB)]
+    output = stream(cache.get, [
+        encode({"batch": batch}),
+        encode({"batch": batch, "format": "columns"}),
+        encode({"batch": "no es un lote"}),
+    ])
+    assert len(output) == 3
+    for line, batch_format in zip(output, (None, "columns")):
+        answer_sets, columnar = parse_batch(batch, batch_format)
+        assert line == encode_batch(cache.get, answer_sets, columnar)
+    assert "error" in json.loads(output[2])
+
+
+def test_variant_lines(variants_dir, tree):
+    registry = TreeRegistry(variants_dir)
+    output = stream(registry.respond, [
+        encode({"answers": answers_list(API), "variant": "en"}),
+        encode({"batch": [answers_list(API)], "variant": "pt"}),
+        encode({"answers": answers_list(API), "variant": "xx"}),
+    ], variants=True)
+    assert json.loads(output[0])["decision_path"] == tree.traverse(API)["decision_path"]
+    assert sorted(stats["variant"].split("/")[0] for stats in registry.stats()) == ["en", "pt"]
+    assert "error" in json.loads(output[2])
+
+
+def test_stream_cli(tree):
+    lines = [json.dumps(answers_list(WEB)), "{no es json", json.dumps(answers_list(API))]
+    result = subprocess.run(
+        [sys.executable, SCRIPT, "--stream"], input="\n".join(lines) + "\n", capture_output=True, text=True,
+    )
+    assert result.returncode == 0
+    output = [json.loads(line) for line in result.stdout.splitlines()]
+    assert len(output) == 3
+    assert "error" in output[1]
+    assert output[2]["decision_path"] == tree.traverse(API)["decision_path"]
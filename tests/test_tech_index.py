@@ -0,0 +1,112 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from answer_space import encode_key, iter_answer_space
+from conftest import SCRIPTS
+from tech_index import Posting, TechIndex, iter_combinations
+
+TECH_INDEX = os.path.join(SCRIPTS, "tech_index.py")
+
+
+@pytest.fixture(scope="module")
+def index(tree):
+    return TechIndex(tree)
+
+
+@pytest.fixture(scope="module")
+def space(tree):
+    """(respuestas, tecnologías) de cada combinación, recorriendo el árbol"""
+    return [(answers, tree.traverse(answers)["technologies"]) for answers in iter_answer_space()]
+
+
+def brute_force(space, technology, roles=("primary", "alternatives"), **filters):
+    """Códigos de las combinaciones que reciben la tecnología con alguno de los roles"""
+    keys = set()
+    for answers, technologies in space:
+        if any(answers[question_id] != value for question_id, value in filters.items()):
+            continue
+        if any(technology in entry.get(role, ()) for entry in technologies.values() for role in roles):
+            keys.add(encode_key(answers))
+    return keys
+
+
+def decoded(bits):
+    return {encode_key(answers) for answers in iter_combinations(bits)}
+
+
+def test_postings_cover_every_recommendation(index, tree):
+    for leaf, node in enumerate(tree.leaves):
+        for category, entry in node.recommendations.to_dict().items():
+            for role in ("primary", "alternatives"):
+                for technology in entry.get(role, ()):
+                    assert Posting(leaf, category, role) in index.leaves_for(technology)
+                    assert index.names[technology.casefold()].casefold() == technology.casefold()
+
+
+def test_leaves_for_filters_by_role_and_category(index):
+    primary = index.leaves_for("redis", "primary")
+    assert primary and all(posting.role == "primary" for posting in primary)
+    alternatives = index.leaves_for("Redis", "alternative")
+    assert all(posting.role == "alternatives" for posting in alternatives)
+    assert set(primary) | set(alternatives) == set(index.leaves_for("REDIS"))
+
+    category = primary[0].category
+    assert all(posting.category == category for posting in index.leaves_for("Redis", category=category))
+
+
+@pytest.mark.parametrize("technology", ["Redis", "PostgreSQL", "Kubernetes", "GitHub"])
+def test_technology_query_matches_brute_force(index, space, technology):
+    result = index.query(technology)
+    expected = brute_force(space, technology)
+    assert result.count == len(expected)
+    assert decoded(result.bits) == expected
+
+
+def test_query_grammar(index, space):
+    result = index.query("redis:primary and Kubernetes AND audience=public")
+    expected = (
+        brute_force(space, "Redis", ("primary",), audience="public")
+        & brute_force(space, "Kubernetes")
+    )
+    assert decoded(result.bits) == expected
+    assert sum(result.leaves.values()) == result.count == len(expected)
+
+    alternatives = index.query("Redis:alternative AND scale=small")
+    assert decoded(alternatives.bits) == brute_force(space, "Redis", ("alternatives",), scale="small")
+
+
+def test_answer_filters_alone(index):
+    result = index.query("app-type=web AND scale=large")
+    assert result.count == 20480 // 5 // 4
+    assert all(answers["app-type"] == "web" for answers in iter_combinations(result.bits))
+
+
+@pytest.mark.parametrize("query, error, message", [
+    ("Redis:jefe", ValueError, "Rol desconocido"),
+    ("NoExiste", KeyError, "Tecnología desconocida"),
+    ("Redis AND audience=nadie", ValueError, "Respuesta desconocida"),
+])
+def test_query_errors(index, query, error, message):
+    with pytest.raises(error, match=message):
+        index.query(query)
+
+
+def test_cli_exits_on_unknown_role():
+    result = subprocess.run([sys.executable, TECH_INDEX, "Redis:jefe"], capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "Rol desconocido: jefe" in result.stderr
+    assert "Traceback" not in result.stderr
+
+
+def test_cli_lists_matching_combinations():
+    result = subprocess.run(
+        [sys.executable, TECH_INDEX, "Redis:primary AND audience=public", "--list", "2"],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0
+    lines = result.stdout.splitlines()
+    assert lines[0].endswith("de 20480 combinaciones")
+    assert sum("audience=public" in line for line in lines) == 2
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+from decision_tree import DecisionTree
+from tree_definition import ReloadingResponder, export_definition, load_definition, snapshot_dir
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def definition(tmp_path):
+    path = tmp_path / "tree.json"
+    path.write_text(json.dumps(export_definition(DecisionTree(), "v1"), ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def edit(path, version: str):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["version"] = version
+    data["tree"]["children"]["api"]["description"] = f"API {version}"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def test_snapshot_is_keyed_by_content_in_private_dir(definition, tree):
+    first, stats = load_definition(str(definition))
+    assert stats == {"reused": 0, "built": 5}
+    directory = snapshot_dir()
+    digest = hashlib.sha256(definition.read_bytes()).hexdigest()
+    assert os.path.exists(os.path.join(directory, f"{digest}.pickle"))
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    assert sorted(os.listdir(definition.parent)) == ["cache", "tree.json"]
+
+    second, stats = load_definition(str(definition))
+    assert stats == {"reused": 5, "built": 0}
+    assert second.version == "v1"
+    answers = {"app-type": "api", "scale": "large", "complexity": "complex"}
+    assert second.traverse(answers) == first.traverse(answers) == tree.traverse(answers)
+
+
+def test_edited_definition_rebuilds_only_changed_branch(definition):
+    load_definition(str(definition))
+    old_digest = hashlib.sha256(definition.read_bytes()).hexdigest()
+    edit(definition, "v2")
+
+    tree, stats = load_definition(str(definition))
+    assert stats == {"reused": 4, "built": 1}
+    assert tree.version == "v2"
+    assert tree.root.children["api"].description == "API v2"
+    assert not os.path.exists(os.path.join(snapshot_dir(), f"{old_digest}.pickle"))
+
+
+def test_snapshot_with_other_content_is_ignored(definition):
+    load_definition(str(definition))
+    directory = snapshot_dir()
+    digest = hashlib.sha256(definition.read_bytes()).hexdigest()
+    # Instantánea de otro contenido guardada con el nombre de este
+    edit(definition, "v2")
+    load_definition(str(definition))
+    other = hashlib.sha256(definition.read_bytes()).hexdigest()
+    shutil.copy(os.path.join(directory, f"{other}.pickle"), os.path.join(directory, f"{digest}.pickle"))
+    edit(definition, "v1")
+
+    tree, _ = load_definition(str(definition))
+    assert tree.root.children["api"].description == "API v1"
+
+
+def test_shared_snapshot_dir_is_not_used(cache_home):
+    directory = cache_home / "asistente" / "tree-snapshots"
+    directory.mkdir(parents=True)
+    directory.chmod(0o777)
+    assert snapshot_dir() is None
+
+
+def test_reload_happens_off_the_request_path(definition):
+    built = []
+
+    def make_responder(tree):
+        if built:
+            time.sleep(0.5)
+        built.append(tree.version)
+        return lambda answers: tree.version.encode("ascii")
+
+    responder = ReloadingResponder(str(definition), make_responder, interval=0.05)
+    try:
+        assert responder({}) == b"v1"
+        edit(definition, "v2")
+
+        deadline = time.monotonic() + 5
+        slowest = 0.0
+        while responder({}) != b"v2":
+            assert time.monotonic() < deadline
+            start = time.monotonic()
+            responder({})
+            slowest = max(slowest, time.monotonic() - start)
+            time.sleep(0.01)
+        assert slowest < 0.1
+        assert built == ["v1", "v2"]
+    finally:
+        responder.close()
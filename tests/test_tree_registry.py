@@ -0,0 +1,95 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+
+import pytest
+
+from answer_space import iter_answer_space
+from conftest import answers_list
+from server import RecommendationServer
+from tree_registry import TreeRegistry, VariantKey, VariantNotLoaded, tree_footprint
+
+
+def test_deferred_registry_raises_until_loaded(variants_dir, tree):
+    registry = TreeRegistry(variants_dir, defer_builds=True)
+    answers = {"app-type": "api"}
+    with pytest.raises(VariantNotLoaded) as info:
+        registry.respond(answers, "en")
+    assert info.value.key == VariantKey("en", "default", "current")
+    assert registry.builds == 0
+
+    info.value.load()
+    assert json.loads(registry.respond(answers, "en"))["decision_path"] == tree.traverse(answers)["decision_path"]
+    assert registry.builds == 1
+
+
+def test_cache_growth_respects_byte_budget(tree):
+    budget = tree_footprint(tree) + 20000
+    registry = TreeRegistry(max_bytes=budget)
+    for answers in itertools.islice(iter_answer_space(), 0, 20480, 41):
+        registry.respond(answers)
+        assert registry.nbytes <= budget
+    variant = registry.loaded(registry.default)
+    assert len(variant.cache) > 0
+    assert variant.cache.nbytes == sum(len(payload) for payload in variant.cache._entries.values())
+
+
+def test_cache_growth_evicts_other_variants(variants_dir, tree):
+    footprint = tree_footprint(tree)
+    registry = TreeRegistry(variants_dir, max_bytes=2 * footprint + 20000)
+    registry.respond({"app-type": "web"}, "en")
+    registry.respond({"app-type": "web"}, "pt")
+    assert registry.loaded(VariantKey("en", "default", "current")) is not None
+
+    for answers in itertools.islice(iter_answer_space(), 0, 20480, 41):
+        registry.respond(answers, "pt")
+    assert registry.loaded(VariantKey("en", "default", "current")) is None
+    assert registry.evictions >= 1
+
+
+async def _post(port: int, variant: str) -> float:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(answers_list({"app-type": "web"})).encode("utf-8")
+    writer.write(
+        b"POST /api/recommendations HTTP/1.1\r\nHost: x\r\nConnection: close\r\nX-Tree-Variant: %s\r\n"
+        b"Content-Length: %d\r\n\r\n%s" % (variant.encode("ascii"), len(body), body)
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    assert response.startswith(b"HTTP/1.1 200"), response[:200]
+    return time.monotonic()
+
+
+def test_server_builds_variants_off_the_event_loop(variants_dir):
+    registry = TreeRegistry(variants_dir, defer_builds=True)
+    registry.get(registry.default)
+    build = registry._build
+    started = threading.Event()
+
+    def slow_build(key):
+        started.set()
+        time.sleep(0.5)
+        return build(key)
+
+    registry._build = slow_build
+
+    async def scenario():
+        server = RecommendationServer(registry.respond, variants=True)
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            slow = asyncio.ensure_future(_post(port, "en"))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            fast_done = await _post(port, "es")
+            slow_done = await slow
+        finally:
+            await server.shutdown(1)
+        return fast_done, slow_done
+
+    fast_done, slow_done = asyncio.run(scenario())
+    assert fast_done < slow_done
+    assert registry.builds == 2
@@ -0,0 +1,104 @@
+import pytest
+
+from answer_space import QUESTIONS, iter_answer_space
+from decision_tree import DEFAULT_LEAF
+from wizard_session import WizardIndex
+
+
+@pytest.fixture(scope="module")
+def index(tree):
+    return WizardIndex(tree)
+
+
+def brute_force_leaves(tree, answers):
+    """Hojas de todas las combinaciones compatibles con las respuestas parciales"""
+    leaves = set()
+    for combination in iter_answer_space():
+        if all(combination[key] == value for key, value in answers.items()):
+            leaf, _ = tree.resolve(combination)
+            leaves.add(DEFAULT_LEAF if leaf is None else leaf.leaf_id)
+    return leaves
+
+
+@pytest.mark.parametrize("prefix", [
+    [],
+    [("app-type", "web")],
+    [("app-type", "web"), ("timeline", "fast")],
+    [("scale", "xlarge"), ("budget", "minimal")],
+    [("app-type", "api"), ("scale", "small"), ("complexity", "simple")],
+])
+def test_reachable_leaves_match_brute_force(index, tree, prefix):
+    state = index.state(prefix)
+    assert set(state.reachable_leaves) == brute_force_leaves(tree, dict(prefix))
+    assert state.determined == (len(state.reachable_leaves) == 1)
+
+
+def test_answers_only_narrow_the_candidates(index):
+    session = index.session()
+    previous = session.state.reachable_leaves
+    for question_id, value in [("app-type", "web"), ("timeline", "fast"), ("complexity", "simple")]:
+        state = session.answer(question_id, value)
+        assert state.reachable_leaves <= previous
+        previous = state.reachable_leaves
+    assert state.determined
+
+
+def test_next_question_is_unanswered_until_determined(index):
+    session = index.session()
+    while not session.state.determined:
+        question_id = session.state.next_question
+        assert question_id is not None and question_id not in session.state.answers
+        session.answer(question_id, dict(QUESTIONS)[question_id][0])
+    assert session.state.next_question is None
+
+
+def test_undo_returns_to_the_previous_state(index):
+    session = index.session()
+    before = session.answer("app-type", "mobile")
+    session.answer("scale", "large")
+    assert session.undo() is before
+    assert session.prefix == [("app-type", "mobile")]
+
+    session.undo()
+    assert session.undo().answers == {}
+
+
+def test_changing_an_answer_recomputes_from_scratch(index, tree):
+    session = index.session()
+    session.answer("app-type", "web")
+    state = session.answer("app-type", "api")
+    assert state.answers == {"app-type": "api"}
+    assert set(state.reachable_leaves) == brute_force_leaves(tree, {"app-type": "api"})
+
+
+def test_unknown_answer_is_rejected_without_changing_the_session(index):
+    session = index.session()
+    session.answer("app-type", "web")
+    with pytest.raises(ValueError):
+        session.answer("app-type", "cli")
+    assert session.prefix == [("app-type", "web")]
+
+
+def test_result_agrees_with_traverse_once_everything_is_answered(index, tree):
+    for key, answers in enumerate(iter_answer_space()):
+        if key % 211:
+            continue
+        session = index.session()
+        for pair in answers.items():
+            session.answer(*pair)
+        assert session.result() == tree.traverse(answers)
+
+
+def test_partial_result_only_carries_technologies(index, tree):
+    session = index.session()
+    session.answer("app-type", "web")
+    session.answer("timeline", "fast")
+    session.answer("complexity", "simple")
+    assert session.state.determined
+
+    partial = session.result()
+    assert list(partial) == ["technologies"]
+    for question_id, values in QUESTIONS:
+        if question_id not in session.state.answers:
+            session.answer(question_id, values[-1])
+    assert session.result()["technologies"] == partial["technologies"]